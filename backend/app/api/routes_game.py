@@ -1,13 +1,83 @@
-from fastapi import APIRouter
+from typing import Optional
 
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel
+
+from ..game import sharding
 from ..game.manager import manager
+from ..game.vectorized import HAS_NUMPY
 
 router = APIRouter(prefix="/api")
 
 
+class CreateGameRequest(BaseModel):
+    """Optional settings for a new game session."""
+
+    # Step zombies with the NumPy kernel instead of the scalar loop
+    vectorized: bool = False
+    # Seed for world generation and loot rolls; random when omitted
+    seed: Optional[int] = None
+    # Large world generated in chunks around the players
+    chunked: bool = False
+    # Simulate on a dedicated thread instead of the event loop
+    threaded: bool = False
+
+
 @router.post("/games")
-async def create_game():
-    """Create a new game session and return its ID."""
+async def create_game(request: Optional[CreateGameRequest] = None):
+    """Create a new game session and return its ID and world seed."""
+
+    request = request or CreateGameRequest()
+    if request.vectorized and not HAS_NUMPY:
+        raise HTTPException(status_code=400, detail="NumPy is not installed")
+    if request.vectorized and request.chunked:
+        raise HTTPException(
+            status_code=400, detail="Chunked worlds cannot use the NumPy kernel"
+        )
+    if sharding.router is not None:
+        try:
+            return await sharding.router.create_game(
+                vectorized=request.vectorized,
+                seed=request.seed,
+                chunked=request.chunked,
+                threaded=request.threaded,
+            )
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+    game_id = manager.create_game_session(
+        vectorized=request.vectorized,
+        seed=request.seed,
+        chunked=request.chunked,
+        threaded=request.threaded,
+    )
+    return {"gameId": game_id, "seed": manager.get_session(game_id).seed}
+
+
+@router.get("/metrics")
+async def server_metrics():
+    """Return session creation latency, template pool hit rate and loop lag.
+
+    ``loop`` reports how late this process's event loop runs its tasks. In
+    multi-process mode the metrics of every worker are returned as well.
+    """
+
+    if sharding.router is not None:
+        metrics = await sharding.router.metrics()
+        metrics["loop"] = manager.loop_monitor.to_dict()
+        return metrics
+    return manager.get_metrics()
+
+
+@router.get("/games/{game_id}/metrics")
+async def game_metrics(game_id: str):
+    """Return tick timing histograms and overrun counters for a session."""
 
-    game_id = manager.create_game_session()
-    return {"gameId": game_id}
+    if sharding.router is not None:
+        metrics = await sharding.router.game_metrics(game_id)
+    else:
+        # Reading metrics does not bring a hibernated session back
+        session = manager.get_session(game_id, restore=False)
+        metrics = session.get_metrics() if session else None
+    if metrics is None:
+        raise HTTPException(status_code=404, detail="Game not found")
+    return metrics
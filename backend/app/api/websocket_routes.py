@@ -1,35 +1,107 @@
 """WebSocket routes for real-time communication."""
 
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from typing import Any, Dict
 
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, status
+
+from ..game import sharding
+from ..game.connection import decode, dispatch, join
 from ..game.manager import manager
 
 router = APIRouter()
 
 
+async def _receive(websocket: WebSocket) -> Dict[str, Any]:
+    """Return the next raw frame, raising when the client disconnected."""
+
+    message = await websocket.receive()
+    if message["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(message.get("code", 1000))
+    return message
+
+
+async def _relay(
+    shards: sharding.ShardRouter, websocket: WebSocket, game_id: str
+) -> None:
+    """Serve ``websocket`` through the worker process owning ``game_id``.
+
+    A worker that does not answer the join closes the socket with an
+    internal error code.
+    """
+
+    await websocket.accept()
+    try:
+        conn_id = await shards.join(game_id, websocket, websocket.query_params)
+    except (TimeoutError, OSError):
+        await websocket.close(code=status.WS_1011_INTERNAL_ERROR)
+        return
+    if conn_id is None:
+        await websocket.close()
+        return
+    try:
+        while True:
+            message = await _receive(websocket)
+            shards.forward(conn_id, message.get("text"), message.get("bytes"))
+    except WebSocketDisconnect:
+        pass
+    finally:
+        shards.leave(conn_id)
+
+
 @router.websocket("/ws/game/{game_id}")
 async def game_ws(websocket: WebSocket, game_id: str) -> None:
-    """Handle a websocket connection for the provided game session."""
+    """Handle a websocket connection for the provided game session.
+
+    Clients may pass ``?sync=delta`` to receive a full snapshot once and then
+    per-tick deltas instead of the whole state every tick. ``?sync=aoi``
+    works the same way but only covers entities near the player, optionally
+    within ``&view=<radius>`` pixels. Delta and area of interest clients can
+    send ``{"type": "resync"}`` to get a fresh snapshot.
+
+    ``?encoding=msgpack``, or a ``{"type": "hello", "encoding": "msgpack"}``
+    message at any time, switches state messages to the compact binary
+    layout of :mod:`app.game.codec`. Inputs may then be sent as MessagePack
+    too. Handshake replies always stay JSON. Binary delta clients send
+    ``{"type": "ack", "tick": n}`` after applying the message of tick ``n``
+    so handles of removed entities can be reused.
+
+    Gameplay inputs are queued on the session and applied at the start of
+    its next tick, see :mod:`app.game.inputs`. A frame that cannot be
+    decoded closes the connection. In multi-process mode the connection is
+    relayed to the worker owning the game, see :mod:`app.game.sharding`,
+    which handles bad frames the same way.
+    """
+
+    if sharding.router is not None:
+        await _relay(sharding.router, websocket, game_id)
+        return
 
-    session = manager.get_session(game_id)
+    session = await manager.load_session(game_id)
     if not session:
         await websocket.close()
         return
 
     await websocket.accept()
-    player_id = session.add_player(websocket)
-    await websocket.send_json({"type": "welcome", "playerId": player_id})
+    player_id, welcome = join(session, websocket, websocket.query_params)
     print(f"Player {player_id} connected to game {game_id}")
     try:
+        await websocket.send_json(welcome)
         while True:
-            data = await websocket.receive_json()
-            msg_type = data.get("type")
-            if msg_type == "craft_item":
-                session.craft_item(player_id, data.get("itemId", ""))
-            elif msg_type == "use_item":
-                session.use_item(player_id, data.get("itemId", ""))
-            else:
-                session.update_player_state(player_id, data)
+            message = await _receive(websocket)
+            try:
+                data = decode(session, message.get("text"), message.get("bytes"))
+            except ValueError:
+                await websocket.close()
+                break
+            if data is None:
+                continue
+            reply = dispatch(session, player_id, data)
+            if reply is not None:
+                await websocket.send_json(reply)
     except WebSocketDisconnect:
+        pass
+    finally:
+        # Also runs on errors, so a broken connection never lingers and
+        # keeps an otherwise empty session ticking
         session.remove_player(player_id)
         print(f"Player {player_id} disconnected from game {game_id}")
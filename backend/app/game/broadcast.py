@@ -0,0 +1,197 @@
+"""Fan out encoded state messages to a session's WebSocket connections."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Any, Deque, Dict, List, Optional, Set, Tuple
+
+from fastapi import WebSocket
+from pydantic_core import to_json
+
+from .codec import ENCODING_JSON
+from .scheduler import percentiles
+
+if TYPE_CHECKING:  # pragma: no cover - imported for type hints only
+    from .manager import GameSession
+
+# Seconds the tick waits for sends before moving on without slow clients
+SEND_TIMEOUT = 0.01
+# Consecutive skipped broadcasts before a stalled connection is closed
+MAX_SKIPPED_TICKS = 120
+# Most recent send latencies kept for percentiles
+LATENCY_SAMPLES = 1000
+
+
+def encode_message(message: Dict[str, Any]) -> str:
+    """Serialize ``message`` to JSON text using pydantic's native encoder."""
+
+    return to_json(message).decode()
+
+
+class Broadcaster:
+    """Send one encoded copy of each state message to many clients.
+
+    Messages shared by several connections are encoded once per tick and wire
+    encoding, and the resulting text or bytes are sent to every connection
+    concurrently. The tick waits at most ``SEND_TIMEOUT`` seconds; sends still
+    in flight keep running in the background and their connections are
+    skipped on following ticks instead of queueing more data. A connection
+    stalled for ``MAX_SKIPPED_TICKS`` ticks in a row is closed.
+
+    The latency of a send runs from the start of the broadcast, before the
+    messages are built, until the socket accepted the data.
+    """
+
+    def __init__(
+        self,
+        send_timeout: float = SEND_TIMEOUT,
+        max_skipped_ticks: int = MAX_SKIPPED_TICKS,
+    ) -> None:
+        self.send_timeout = send_timeout
+        self.max_skipped_ticks = max_skipped_ticks
+        self.pending: Dict[str, asyncio.Task] = {}
+        self.skipped: Dict[str, int] = {}
+        self._closing: Set[asyncio.Task] = set()
+        # Totals useful for diagnosing slow clients
+        self.messages_sent = 0
+        self.messages_skipped = 0
+        self.connections_dropped = 0
+        self.latency_ms: Deque[float] = deque(maxlen=LATENCY_SAMPLES)
+
+    async def broadcast(self, session: "GameSession") -> None:
+        """Send this tick's state messages to every connection in ``session``."""
+
+        started = time.perf_counter()
+        ready = self._ready(session)
+        messages = session.state_messages([player_id for player_id, _ in ready])
+        sends = self._send_all(ready, self.encode(session, messages), started)
+        if sends:
+            await asyncio.wait(sends, timeout=self.send_timeout)
+        self._forget_closed(session)
+
+    def deliver(
+        self,
+        session: "GameSession",
+        encoded: Dict[str, str | bytes],
+        started: Optional[float] = None,
+    ) -> None:
+        """Send messages encoded off the event loop without waiting.
+
+        Used for sessions simulated on their own thread, which compute and
+        :meth:`encode` the messages of every connection themselves.
+        ``started`` is the ``time.perf_counter()`` value at which they began.
+        Connections still sending skip this tick as in :meth:`broadcast`.
+        """
+
+        if started is None:
+            started = time.perf_counter()
+        self._send_all(self._ready(session), encoded, started)
+        self._forget_closed(session)
+
+    def encode(
+        self, session: "GameSession", messages: Dict[str, Dict[str, Any]]
+    ) -> Dict[str, str | bytes]:
+        """Encode each distinct message once per wire encoding.
+
+        Does not touch the event loop, so it may run on a simulation thread.
+        """
+
+        cache: Dict[Tuple[int, str], str | bytes] = {}
+        encoded: Dict[str, str | bytes] = {}
+        for player_id, message in messages.items():
+            encoding = session.encodings.get(player_id, ENCODING_JSON)
+            key = (id(message), encoding)
+            data = cache.get(key)
+            if data is None:
+                if encoding == ENCODING_JSON:
+                    data = encode_message(message)
+                else:
+                    data = session.codec.encode(message)
+                cache[key] = data
+            encoded[player_id] = data
+        return encoded
+
+    def _ready(self, session: "GameSession") -> List[Tuple[str, WebSocket]]:
+        """Return connections able to take a message, skipping stalled ones."""
+
+        ready: List[Tuple[str, WebSocket]] = []
+        for player_id, websocket in list(session.get_connections().items()):
+            task = self.pending.get(player_id)
+            if task is not None and not task.done():
+                self._skip(session, player_id, websocket)
+            else:
+                self.skipped.pop(player_id, None)
+                ready.append((player_id, websocket))
+        return ready
+
+    def _send_all(
+        self,
+        ready: List[Tuple[str, WebSocket]],
+        encoded: Dict[str, str | bytes],
+        started: float,
+    ) -> List[asyncio.Task]:
+        sends: List[asyncio.Task] = []
+        for player_id, websocket in ready:
+            data = encoded.get(player_id)
+            if data is None:
+                continue
+            task = asyncio.create_task(self._send(websocket, data, started))
+            self.pending[player_id] = task
+            sends.append(task)
+        return sends
+
+    def _forget_closed(self, session: "GameSession") -> None:
+        for player_id in list(self.pending):
+            if player_id not in session.connections:
+                self.forget(player_id)
+
+    async def _send(
+        self, websocket: WebSocket, data: str | bytes, started: float
+    ) -> None:
+        try:
+            if isinstance(data, bytes):
+                await websocket.send_bytes(data)
+            else:
+                await websocket.send_text(data)
+            self.messages_sent += 1
+            self.latency_ms.append((time.perf_counter() - started) * 1000)
+        except Exception:
+            # Ignore send errors; connection cleanup happens elsewhere
+            pass
+
+    def _skip(
+        self, session: "GameSession", player_id: str, websocket: WebSocket
+    ) -> None:
+        self.messages_skipped += 1
+        # A delta client missed a delta so it needs a snapshot to catch up.
+        session.request_resync(player_id)
+        count = self.skipped.get(player_id, 0) + 1
+        self.skipped[player_id] = count
+        if count >= self.max_skipped_ticks:
+            self.connections_dropped += 1
+            self.forget(player_id)
+            # A threaded session reads its connections under the lock
+            with session.lock:
+                session.connections.pop(player_id, None)
+            task = asyncio.create_task(self._close(websocket))
+            self._closing.add(task)
+            task.add_done_callback(self._closing.discard)
+
+    async def _close(self, websocket: WebSocket) -> None:
+        try:
+            await websocket.close()
+        except Exception:
+            pass
+
+    def latency(self) -> Dict[str, float]:
+        """Return percentiles of recent send latencies in milliseconds."""
+
+        return percentiles(self.latency_ms)
+
+    def forget(self, player_id: str) -> None:
+        """Drop bookkeeping for a connection that went away."""
+
+        self.pending.pop(player_id, None)
+        self.skipped.pop(player_id, None)
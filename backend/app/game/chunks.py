@@ -0,0 +1,492 @@
+"""Chunked worlds generated around the players on demand.
+
+Large maps are split into square chunks of ``CHUNK_CELLS`` grid cells. A
+chunk's walls and containers are generated from the session seed and the
+chunk coordinates the first time a player or zombie comes near it. Chunks
+far from every player are evicted: their entities leave the game state.
+Chunks nobody changed are simply generated again when somebody returns;
+changed ones are kept as a small compressed blob, up to
+``EVICTED_BYTES_LIMIT`` bytes per session, after which the chunks evicted
+longest ago are dropped and come back as new. Memory therefore stays bounded
+however much of the map is explored.
+"""
+
+from __future__ import annotations
+
+import random
+import struct
+import zlib
+from collections import OrderedDict, deque
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from .flowfield import DIRECTIONS, UNREACHABLE, FlowField
+from .grid import WallGrid
+from .models import (
+    SEGMENT_SIZE,
+    WALL_MATERIALS,
+    ContainerState,
+    DoorState,
+    WallState,
+)
+from .world import Rng, generate_store_walls, spawn_containers
+
+Chunk = Tuple[int, int]
+
+# Grid cells along each side of a chunk
+CHUNK_CELLS = 16
+CHUNK_SIZE = CHUNK_CELLS * SEGMENT_SIZE
+# Default side length in pixels of a chunked world (64 x 64 chunks)
+CHUNKED_WORLD_SIZE = 64 * CHUNK_SIZE
+# Chunks loaded in every direction around each player and zombie
+LOAD_RADIUS = 1
+# Chunks kept loaded around each player; anything further away is evicted
+EVICT_RADIUS = 3
+# Ticks between eviction passes
+EVICT_INTERVAL = 60
+CONTAINERS_PER_CHUNK = 1
+# Bytes of evicted chunk blobs a session keeps before dropping the oldest
+EVICTED_BYTES_LIMIT = 4 * 1024 * 1024
+
+_HEADER = struct.Struct("<HHH")
+# local cell, material, hp, max hp, opened, item
+_WALL = struct.Struct("<HBHHBB")
+# x and y inside the chunk, opened, item, type
+_CONTAINER = struct.Struct("<ddBBB")
+_NONE = 0xFF
+_MATERIALS = tuple(WALL_MATERIALS)
+
+
+def chunk_of(x: float, y: float) -> Chunk:
+    """Return the chunk containing pixel position ``(x, y)``."""
+
+    return int(x // CHUNK_SIZE), int(y // CHUNK_SIZE)
+
+
+def pack_chunk(
+    origin: Tuple[float, float],
+    walls: Sequence[WallState],
+    containers: Sequence[ContainerState],
+) -> bytes:
+    """Serialize a chunk's entities to a compressed blob.
+
+    Positions are stored relative to the chunk ``origin``. Entity ids and
+    wall damage flashes are not kept; restored entities get fresh ids.
+    """
+
+    strings: List[str] = []
+    index: Dict[str, int] = {}
+
+    def ref(value: Optional[str]) -> int:
+        if value is None:
+            return _NONE
+        if value not in index:
+            index[value] = len(strings)
+            strings.append(value)
+        return index[value]
+
+    ox, oy = origin
+    body = bytearray()
+    for w in walls:
+        cell = int((w.y - oy) // SEGMENT_SIZE) * CHUNK_CELLS + int(
+            (w.x - ox) // SEGMENT_SIZE
+        )
+        body += _WALL.pack(
+            cell,
+            _MATERIALS.index(w.material),
+            w.hp,
+            w.max_hp,
+            w.opened,
+            ref(w.item),
+        )
+    for c in containers:
+        body += _CONTAINER.pack(
+            c.x - ox, c.y - oy, c.opened, ref(c.item), ref(c.type)
+        )
+
+    blob = bytearray(_HEADER.pack(len(strings), len(walls), len(containers)))
+    for value in strings:
+        encoded = value.encode()
+        blob.append(len(encoded))
+        blob += encoded
+    blob += body
+    return zlib.compress(bytes(blob))
+
+
+def unpack_chunk(
+    origin: Tuple[float, float], blob: bytes
+) -> Tuple[List[WallState], List[ContainerState]]:
+    """Rebuild the walls and containers stored by :func:`pack_chunk`."""
+
+    data = zlib.decompress(blob)
+    n_strings, n_walls, n_containers = _HEADER.unpack_from(data)
+    offset = _HEADER.size
+    strings: List[str] = []
+    for _ in range(n_strings):
+        length = data[offset]
+        strings.append(data[offset + 1 : offset + 1 + length].decode())
+        offset += 1 + length
+
+    def deref(idx: int) -> Optional[str]:
+        return None if idx == _NONE else strings[idx]
+
+    ox, oy = origin
+    walls = []
+    for _ in range(n_walls):
+        cell, material, hp, max_hp, opened, item = _WALL.unpack_from(data, offset)
+        offset += _WALL.size
+        walls.append(
+            WallState(
+                x=ox + (cell % CHUNK_CELLS) * SEGMENT_SIZE,
+                y=oy + (cell // CHUNK_CELLS) * SEGMENT_SIZE,
+                size=SEGMENT_SIZE,
+                material=_MATERIALS[material],
+                hp=hp,
+                max_hp=max_hp,
+                opened=bool(opened),
+                item=deref(item),
+            )
+        )
+    containers = []
+    for _ in range(n_containers):
+        x, y, opened, item, kind = _CONTAINER.unpack_from(data, offset)
+        offset += _CONTAINER.size
+        containers.append(
+            ContainerState(
+                x=ox + x,
+                y=oy + y,
+                opened=bool(opened),
+                item=deref(item),
+                type=deref(kind),
+            )
+        )
+    return walls, containers
+
+
+class ChunkGrid(WallGrid):
+    """Wall grid holding one small occupancy array per loaded chunk.
+
+    Queries cross chunk borders transparently. Cells of chunks that are not
+    loaded report as blocked so nothing walks into ground that has not been
+    generated yet.
+
+    There is no dense ``cells`` array, so every :class:`WallGrid` method
+    reading it or the free cell list is overridden here. Code that needs
+    the dense array, such as the NumPy zombie kernel, cannot run on a
+    chunked world, and :class:`~app.game.manager.GameSession` rejects that
+    combination.
+    """
+
+    def __init__(self, width: int, height: int) -> None:
+        self.width = width
+        self.height = height
+        self.grid_w = width // SEGMENT_SIZE
+        self.grid_h = height // SEGMENT_SIZE
+        self.version = 0
+        self.chunks: Dict[Chunk, bytearray] = {}
+        # Free cells are listed from the loaded chunks on demand instead
+        self._free = None
+        self._free_slot = None
+
+    @property
+    def cells(self) -> bytearray:  # type: ignore[override]
+        raise TypeError("chunked grids have no dense cell array, use blocked()")
+
+    def copy(self) -> "ChunkGrid":
+        grid = ChunkGrid(self.width, self.height)
+        grid.version = self.version
+        grid.chunks = {key: bytearray(cells) for key, cells in self.chunks.items()}
+        return grid
+
+    def load_chunk(self, chunk: Chunk, walls: Iterable[WallState]) -> None:
+        self.chunks[chunk] = bytearray(CHUNK_CELLS * CHUNK_CELLS)
+        for wall in walls:
+            self._mark(wall, 1)
+        self.version += 1
+
+    def unload_chunk(self, chunk: Chunk) -> None:
+        if self.chunks.pop(chunk, None) is not None:
+            self.version += 1
+
+    def _mark(self, wall: WallState, delta: int) -> None:
+        gx, gy = self.cell_of(wall)
+        cells = self.chunks.get((gx // CHUNK_CELLS, gy // CHUNK_CELLS))
+        if cells is None or not (0 <= gx < self.grid_w and 0 <= gy < self.grid_h):
+            return
+        idx = (gy % CHUNK_CELLS) * CHUNK_CELLS + gx % CHUNK_CELLS
+        cells[idx] = max(0, cells[idx] + delta)
+
+    def blocked(self, gx: int, gy: int) -> bool:
+        if not (0 <= gx < self.grid_w and 0 <= gy < self.grid_h):
+            return False
+        cells = self.chunks.get((gx // CHUNK_CELLS, gy // CHUNK_CELLS))
+        if cells is None:
+            return True
+        return cells[(gy % CHUNK_CELLS) * CHUNK_CELLS + gx % CHUNK_CELLS] > 0
+
+    def _loaded_free_cells(self) -> List[Tuple[int, int]]:
+        free = []
+        for (cx, cy), cells in sorted(self.chunks.items()):
+            for idx, count in enumerate(cells):
+                gx = cx * CHUNK_CELLS + idx % CHUNK_CELLS
+                gy = cy * CHUNK_CELLS + idx // CHUNK_CELLS
+                if not count and gx < self.grid_w and gy < self.grid_h:
+                    free.append((gx, gy))
+        return free
+
+    def _free_cells(self) -> List[int]:
+        grid_w = self.grid_w
+        return [gy * grid_w + gx for gx, gy in self._loaded_free_cells()]
+
+    def free_count(self) -> int:
+        return len(self._loaded_free_cells())
+
+    def random_free_cell(self, rng: random.Random) -> Optional[Tuple[int, int]]:
+        """Return a random empty cell of a loaded chunk.
+
+        Costs O(loaded cells), which is fine for the occasional player spawn.
+        """
+
+        free = self._loaded_free_cells()
+        return rng.choice(free) if free else None
+
+
+class SparseFlowField(FlowField):
+    """Flow field storing distances only for cells the search reached.
+
+    The search stays inside loaded chunks because every other cell is
+    blocked, so its cost and memory follow the explored area.
+    """
+
+    def _blank_dist(self) -> Dict[int, int]:  # type: ignore[override]
+        return {}
+
+    def _rebuild(self, sources: Sequence[Tuple[int, int]], grid: WallGrid) -> None:
+        grid_w = self.grid_w
+        grid_h = self.grid_h
+        chunks = grid.chunks if isinstance(grid, ChunkGrid) else None
+        # Walls and unloaded cells are stored as -2 so each is tested once.
+        dist: Dict[int, int] = {}
+        queue: deque[Tuple[int, int]] = deque()
+        for sx, sy in sources:
+            if 0 <= sx < grid_w and 0 <= sy < grid_h:
+                dist[sy * grid_w + sx] = 0
+                queue.append((sx, sy))
+
+        while queue:
+            cx, cy = queue.popleft()
+            nd = dist[cy * grid_w + cx] + 1
+            for dx, dy in DIRECTIONS:
+                nx, ny = cx + dx, cy + dy
+                if nx < 0 or ny < 0 or nx >= grid_w or ny >= grid_h:
+                    continue
+                idx = ny * grid_w + nx
+                if idx in dist:
+                    continue
+                if chunks is None:
+                    wall = grid.blocked(nx, ny)
+                else:
+                    cells = chunks.get((nx // CHUNK_CELLS, ny // CHUNK_CELLS))
+                    wall = (
+                        cells is None
+                        or cells[(ny % CHUNK_CELLS) * CHUNK_CELLS + nx % CHUNK_CELLS]
+                        > 0
+                    )
+                if wall:
+                    dist[idx] = -2
+                    continue
+                dist[idx] = nd
+                queue.append((nx, ny))
+
+        self.dist = {idx: d for idx, d in dist.items() if d >= 0}
+        self.rebuilds += 1
+
+    def distance(self, gx: int, gy: int) -> int:
+        if not self.in_bounds(gx, gy):
+            return UNREACHABLE
+        return self.dist.get(gy * self.grid_w + gx, UNREACHABLE)
+
+
+class ChunkedWorld:
+    """Generate, evict and restore the chunks of one session's world.
+
+    ``walls`` and ``containers`` are the session's state lists. They are
+    updated in place as chunks come and go, so they only ever hold the
+    entities of loaded chunks. ``evicted`` holds the blobs of changed chunks
+    from least to most recently evicted; add blobs with :meth:`keep` so the
+    byte limit is enforced.
+    """
+
+    def __init__(
+        self,
+        width: int,
+        height: int,
+        seed: int,
+        walls: List[WallState],
+        containers: List[ContainerState],
+    ) -> None:
+        self.width = width
+        self.height = height
+        self.seed = seed
+        self.walls = walls
+        self.containers = containers
+        self.grid = ChunkGrid(width, height)
+        self.chunks_w = -(-width // CHUNK_SIZE)
+        self.chunks_h = -(-height // CHUNK_SIZE)
+        self.loaded: Set[Chunk] = set()
+        self.evicted: OrderedDict[Chunk, bytes] = OrderedDict()
+        self.evicted_bytes = 0
+        self.evicted_limit = EVICTED_BYTES_LIMIT
+        # Checksum of the blob of each loaded chunk as generated, so chunks
+        # evicted unchanged need not be kept
+        self._pristine: Dict[Chunk, int] = {}
+        # Chunk around which the world starts; it is never evicted
+        self.home: Chunk = (self.chunks_w // 2, self.chunks_h // 2)
+        self.generated = 0
+        self.restored = 0
+        self.evictions = 0
+        # Changed chunks lost to the byte limit since the process started
+        self.dropped = 0
+
+    def origin(self, chunk: Chunk) -> Tuple[float, float]:
+        return chunk[0] * CHUNK_SIZE, chunk[1] * CHUNK_SIZE
+
+    def in_bounds(self, chunk: Chunk) -> bool:
+        return 0 <= chunk[0] < self.chunks_w and 0 <= chunk[1] < self.chunks_h
+
+    def start(self, rng: Rng) -> DoorState:
+        """Load the home area and return a spawn door placed inside it."""
+
+        self.ensure_loaded([self.home], LOAD_RADIUS)
+        cx, cy = self.home
+        cell = self.grid.nearest_free_cell(
+            cx * CHUNK_CELLS + CHUNK_CELLS // 2, cy * CHUNK_CELLS + CHUNK_CELLS // 2, rng
+        )
+        if cell is None:
+            raise ValueError("no open cell for the spawn door")
+        x, y = self.grid.point_in_cell(*cell, rng)
+        return DoorState(x=x, y=y)
+
+    def _generate(self, chunk: Chunk) -> Tuple[List[WallState], List[ContainerState]]:
+        # String seeds hash the same in every process, unlike tuples of str.
+        rng = random.Random(f"{self.seed}:{chunk[0]}:{chunk[1]}")
+        ox, oy = self.origin(chunk)
+        size_w = min(CHUNK_SIZE, self.width - ox)
+        size_h = min(CHUNK_SIZE, self.height - oy)
+        walls = generate_store_walls(size_w, size_h, rng)
+        local = WallGrid.from_walls(size_w, size_h, walls)
+        containers = spawn_containers(
+            size_w, size_h, walls, CONTAINERS_PER_CHUNK, local, rng
+        )
+        for entity in (*walls, *containers):
+            entity.x += ox
+            entity.y += oy
+        return walls, containers
+
+    def load(self, chunk: Chunk) -> None:
+        """Make ``chunk`` part of the game state, generating it if needed."""
+
+        if chunk in self.loaded or not self.in_bounds(chunk):
+            return
+        blob = self.evicted.pop(chunk, None)
+        if blob is None:
+            walls, containers = self._generate(chunk)
+            self._pristine[chunk] = zlib.crc32(
+                pack_chunk(self.origin(chunk), walls, containers)
+            )
+            self.generated += 1
+        else:
+            self.evicted_bytes -= len(blob)
+            walls, containers = unpack_chunk(self.origin(chunk), blob)
+            self.restored += 1
+        self.walls.extend(walls)
+        self.containers.extend(containers)
+        self.grid.load_chunk(chunk, walls)
+        self.loaded.add(chunk)
+
+    def ensure_loaded(self, chunks: Iterable[Chunk], radius: int) -> None:
+        """Load every chunk within ``radius`` chunks of ``chunks``."""
+
+        for cx, cy in set(chunks):
+            for dx in range(-radius, radius + 1):
+                for dy in range(-radius, radius + 1):
+                    self.load((cx + dx, cy + dy))
+
+    def _around(self, chunks: Iterable[Chunk], radius: int) -> Set[Chunk]:
+        return {
+            (cx + dx, cy + dy)
+            for cx, cy in set(chunks)
+            for dx in range(-radius, radius + 1)
+            for dy in range(-radius, radius + 1)
+        }
+
+    def evict_idle(self, players: Iterable, zombies: Iterable) -> List[Chunk]:
+        """Evict loaded chunks that no player or zombie needs.
+
+        Chunks within ``EVICT_RADIUS`` of a player, within ``LOAD_RADIUS`` of
+        a zombie or around the home chunk stay loaded.
+        """
+
+        keep = self._around([chunk_of(p.x, p.y) for p in players], EVICT_RADIUS)
+        keep |= self._around([chunk_of(z.x, z.y) for z in zombies], LOAD_RADIUS)
+        keep |= self._around([self.home], LOAD_RADIUS)
+        idle = self.loaded - keep
+        if not idle:
+            return []
+
+        walls: Dict[Chunk, List[WallState]] = {chunk: [] for chunk in idle}
+        containers: Dict[Chunk, List[ContainerState]] = {chunk: [] for chunk in idle}
+        kept_walls = []
+        for wall in self.walls:
+            bucket = walls.get(chunk_of(wall.x, wall.y))
+            (kept_walls if bucket is None else bucket).append(wall)
+        kept_containers = []
+        for container in self.containers:
+            bucket = containers.get(chunk_of(container.x, container.y))
+            (kept_containers if bucket is None else bucket).append(container)
+        self.walls[:] = kept_walls
+        self.containers[:] = kept_containers
+
+        for chunk in sorted(idle):
+            blob = pack_chunk(self.origin(chunk), walls[chunk], containers[chunk])
+            if self._pristine.pop(chunk, None) != zlib.crc32(blob):
+                self.keep(chunk, blob)
+            self.grid.unload_chunk(chunk)
+            self.loaded.discard(chunk)
+        self.evictions += len(idle)
+        return sorted(idle)
+
+    def keep(self, chunk: Chunk, blob: bytes) -> None:
+        """Store the blob of evicted ``chunk``, dropping the oldest if full.
+
+        Dropped chunks are generated afresh when loaded again.
+        """
+
+        old = self.evicted.pop(chunk, None)
+        if old is not None:
+            self.evicted_bytes -= len(old)
+        self.evicted[chunk] = blob
+        self.evicted_bytes += len(blob)
+        while self.evicted_bytes > self.evicted_limit and len(self.evicted) > 1:
+            _, dropped = self.evicted.popitem(last=False)
+            self.evicted_bytes -= len(dropped)
+            self.dropped += 1
+
+    def update(self, players: Sequence, zombies: Sequence, tick: int) -> None:
+        """Load chunks around the entities and periodically evict idle ones."""
+
+        self.ensure_loaded(
+            [chunk_of(e.x, e.y) for e in (*players, *zombies)], LOAD_RADIUS
+        )
+        if tick % EVICT_INTERVAL == 0:
+            self.evict_idle(players, zombies)
+
+    def to_dict(self) -> Dict[str, int]:
+        return {
+            "loaded": len(self.loaded),
+            "evicted": len(self.evicted),
+            "evicted_bytes": self.evicted_bytes,
+            "dropped": self.dropped,
+            "generated": self.generated,
+            "restored": self.restored,
+            "evictions": self.evictions,
+        }
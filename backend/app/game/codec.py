@@ -0,0 +1,248 @@
+"""Compact binary encoding of state messages for WebSocket clients.
+
+JSON remains the default wire format. Connections that negotiate the
+``msgpack`` encoding receive the same messages packed with MessagePack in a
+denser layout:
+
+* entity ids are replaced by small integer handles assigned per session
+  and reused once clients acknowledged the entity's removal,
+* entities are arrays of field values in schema order instead of maps,
+* changed fields in deltas are maps keyed by field index,
+* floats are written as float32.
+
+The field order of every collection is exposed as :data:`SCHEMA` and sent to
+binary clients in their welcome message.
+"""
+
+from __future__ import annotations
+
+import heapq
+from collections import deque
+from typing import (
+    Any,
+    Callable,
+    Container,
+    Deque,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+)
+
+try:  # MessagePack is an optional dependency used only by this module
+    import msgpack
+except ImportError:  # pragma: no cover - exercised when msgpack is missing
+    msgpack = None
+
+from .schema import (
+    ContainerSchema,
+    PlayerAbilitiesSchema,
+    PlayerSchema,
+    WallSchema,
+    ZombieSchema,
+)
+from .sync import ENTITY_KEYS
+
+HAS_MSGPACK = msgpack is not None
+
+# Wire encodings a connection can choose
+ENCODING_JSON = "json"
+ENCODING_MSGPACK = "msgpack"
+
+# Field order of each entity array. The id is replaced by a handle placed in
+# front of the values.
+SCHEMA: Dict[str, Tuple[str, ...]] = {
+    "players": tuple(PlayerSchema.model_fields),
+    "zombies": tuple(f for f in ZombieSchema.model_fields if f != "id"),
+    "walls": tuple(f for f in WallSchema.model_fields if f != "id"),
+    "containers": tuple(f for f in ContainerSchema.model_fields if f != "id"),
+    "abilities": tuple(PlayerAbilitiesSchema.model_fields),
+}
+
+_FIELD_INDEX: Dict[str, Dict[str, int]] = {
+    key: {name: idx for idx, name in enumerate(SCHEMA[key])} for key in ENTITY_KEYS
+}
+
+
+def _pack_abilities(value: Dict[str, Any]) -> List[Any]:
+    return [value[name] for name in SCHEMA["abilities"]]
+
+
+def _pack_point(value: Optional[Dict[str, float]]) -> Optional[List[float]]:
+    return None if value is None else [value["x"], value["y"]]
+
+
+# Nested values flattened to arrays, by field name
+_NESTED: Dict[str, Callable[[Any], Any]] = {
+    "abilities": _pack_abilities,
+    "dest": _pack_point,
+}
+
+_NESTED_SLOTS: Dict[str, List[Tuple[int, Callable[[Any], Any]]]] = {
+    key: [
+        (idx, _NESTED[name])
+        for idx, name in enumerate(SCHEMA[key])
+        if name in _NESTED
+    ]
+    for key in ENTITY_KEYS
+}
+
+
+class Handles:
+    """Map entity ids to small integers and back.
+
+    Handles are assigned on first use. Once an entity has left the world
+    :meth:`release` puts its handle in quarantine; the handle still maps to
+    the old id, so removals encoded afterwards and inputs sent by clients
+    that have not yet seen the removal resolve as before. :meth:`reclaim`
+    frees quarantined handles once every client acknowledged a tick at or
+    after their release, and freed handles are reissued smallest first to
+    keep them short on the wire.
+    """
+
+    def __init__(self) -> None:
+        self._handles: Dict[str, int] = {}
+        self._ids: List[Optional[str]] = []
+        # Handle and release tick of quarantined ids, and the same entries
+        # with the id in release order
+        self._released: Dict[str, Tuple[int, int]] = {}
+        self._quarantine: Deque[Tuple[int, int, str]] = deque()
+        # Heap of handles free for reuse
+        self._free: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self._handles)
+
+    def handle(self, entity_id: str) -> int:
+        handle = self._handles.get(entity_id)
+        if handle is None:
+            released = self._released.pop(entity_id, None)
+            if released is not None:
+                handle = released[0]
+            elif self._free:
+                handle = heapq.heappop(self._free)
+                self._ids[handle] = entity_id
+            else:
+                handle = len(self._ids)
+                self._ids.append(entity_id)
+            self._handles[entity_id] = handle
+        return handle
+
+    def entity_id(self, handle: int) -> Optional[str]:
+        """Return the id behind ``handle`` or ``None`` if it is not issued."""
+
+        if 0 <= handle < len(self._ids):
+            return self._ids[handle]
+        return None
+
+    def release(self, live: Container[str], tick: int) -> int:
+        """Quarantine the handles of ids not in ``live`` as of ``tick``.
+
+        Returns the number of handles released.
+        """
+
+        gone = [eid for eid in self._handles if eid not in live]
+        for entity_id in gone:
+            handle = self._handles.pop(entity_id)
+            self._released[entity_id] = (handle, tick)
+            self._quarantine.append((tick, handle, entity_id))
+        return len(gone)
+
+    def reclaim(self, acked: int) -> int:
+        """Free handles released at or before tick ``acked``.
+
+        Handles whose entity came back while quarantined stay with it.
+        Returns the number of handles freed.
+        """
+
+        freed = 0
+        quarantine = self._quarantine
+        while quarantine and quarantine[0][0] <= acked:
+            tick, handle, entity_id = quarantine.popleft()
+            if self._released.get(entity_id) != (handle, tick):
+                continue
+            del self._released[entity_id]
+            self._ids[handle] = None
+            heapq.heappush(self._free, handle)
+            freed += 1
+        return freed
+
+
+class BinaryCodec:
+    """Pack state messages of one session with MessagePack."""
+
+    def __init__(self) -> None:
+        if not HAS_MSGPACK:
+            raise RuntimeError("msgpack is required for the binary encoding")
+        self.handles = Handles()
+        self._packer = msgpack.Packer(use_single_float=True)
+
+    def encode(self, message: Dict[str, Any]) -> bytes:
+        """Return the binary form of a full, snapshot or delta message."""
+
+        handle = self.handles.handle
+        delta = message.get("type") == "delta"
+        out: Dict[str, Any] = {}
+        for name, value in message.items():
+            if name in _FIELD_INDEX:
+                if delta:
+                    value = self._changes(name, value)
+                elif name == "players":
+                    value = [self._entity(name, pid, f) for pid, f in value.items()]
+                else:
+                    value = [self._entity(name, f["id"], f) for f in value]
+            elif name == "door":
+                value = _pack_point(value)
+            elif name == "loot_progress":
+                value = {handle(pid): ticks for pid, ticks in value.items()}
+            out[name] = value
+        return self._packer.pack(out)
+
+    def _entity(self, key: str, entity_id: str, fields: Dict[str, Any]) -> List[Any]:
+        values = [self.handles.handle(entity_id)]
+        values.extend(fields[name] for name in SCHEMA[key])
+        for idx, pack in _NESTED_SLOTS[key]:
+            values[idx + 1] = pack(values[idx + 1])
+        return values
+
+    def _changes(self, key: str, changes: Dict[str, Any]) -> Dict[str, Any]:
+        handle = self.handles.handle
+        index = _FIELD_INDEX[key]
+        out: Dict[str, Any] = {}
+        upsert = {}
+        for entity_id, fields in changes["upsert"].items():
+            packed = {}
+            for name, value in fields.items():
+                if name == "id":
+                    continue
+                pack = _NESTED.get(name)
+                packed[index[name]] = pack(value) if pack else value
+            upsert[handle(entity_id)] = packed
+        out["upsert"] = upsert
+        if "spawn" in changes:
+            out["spawn"] = [
+                self._entity(key, entity_id, fields)
+                for entity_id, fields in changes["spawn"].items()
+            ]
+        for name in ("remove", "despawn"):
+            if name in changes:
+                out[name] = [handle(entity_id) for entity_id in changes[name]]
+        return out
+
+    def decode_input(self, data: bytes) -> Dict[str, Any]:
+        """Unpack a client input message, mapping handles back to ids.
+
+        Raises ``ValueError`` for anything but a well formed map.
+        """
+
+        try:
+            message = msgpack.unpackb(data, strict_map_key=False)
+        except TypeError as exc:
+            # Raised for unhashable map keys such as arrays
+            raise ValueError(f"undecodable input: {exc}") from exc
+        if not isinstance(message, dict):
+            raise ValueError("input message must be a map")
+        container = message.get("containerId")
+        if isinstance(container, int):
+            message["containerId"] = self.handles.entity_id(container) or ""
+        return message
@@ -0,0 +1,112 @@
+"""Protocol handling shared by every kind of game connection.
+
+A player's socket can be served in this process by
+:mod:`app.api.websocket_routes` or, in multi-process mode, by a worker from
+:mod:`app.game.sharding` on behalf of the front process. Both use these
+helpers to join a session from the connection's query parameters, decode
+incoming frames and dispatch them, so the protocol is identical either way.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from .codec import ENCODING_JSON, ENCODING_MSGPACK, SCHEMA
+from .interest import View, clamp_view_radius
+from .manager import SYNC_AOI, SYNC_DELTA, SYNC_FULL, GameSession
+
+
+def negotiate(
+    session: GameSession, player_id: str, encoding: Optional[str]
+) -> Dict[str, Any]:
+    """Apply the requested wire encoding and describe the one in effect.
+
+    Unknown encodings, or ``msgpack`` without msgpack installed, keep JSON.
+    """
+
+    if encoding == ENCODING_MSGPACK:
+        try:
+            session.set_encoding(player_id, ENCODING_MSGPACK)
+        except RuntimeError:
+            encoding = ENCODING_JSON
+        else:
+            # Handles are also assigned by a threaded session's encoder
+            with session.lock:
+                handle = session.codec.handles.handle(player_id)
+            return {
+                "encoding": ENCODING_MSGPACK,
+                "playerHandle": handle,
+                "schema": SCHEMA,
+            }
+    session.set_encoding(player_id, ENCODING_JSON)
+    return {"encoding": ENCODING_JSON}
+
+
+def join(
+    session: GameSession, websocket: Any, params: Mapping[str, str]
+) -> Tuple[str, Dict[str, Any]]:
+    """Add a player for ``websocket`` configured by its query parameters.
+
+    Returns
+    -------
+    tuple[str, dict]
+        The new player ID and the welcome message to send first.
+    """
+
+    sync = params.get("sync")
+    if sync not in (SYNC_DELTA, SYNC_AOI):
+        sync = SYNC_FULL
+    view = None
+    if sync == SYNC_AOI and params.get("view"):
+        try:
+            view = View(clamp_view_radius(float(params["view"])))
+        except ValueError:
+            view = None
+    player_id = session.add_player(websocket, sync, view)
+    welcome = {"type": "welcome", "playerId": player_id}
+    welcome.update(negotiate(session, player_id, params.get("encoding")))
+    return player_id, welcome
+
+
+def decode(
+    session: GameSession, text: Optional[str], data: Optional[bytes]
+) -> Optional[Dict[str, Any]]:
+    """Return the input carried by a text or binary frame.
+
+    Binary input from a session without binary clients is ignored.
+
+    Raises
+    ------
+    ValueError
+        If the frame is not a JSON object or a MessagePack map. Callers end
+        the connection.
+    """
+
+    if data is not None:
+        if session.codec is None:
+            return None
+        return session.codec.decode_input(data)
+    message = json.loads(text if text is not None else "")
+    if not isinstance(message, dict):
+        raise ValueError("input message must be an object")
+    return message
+
+
+def dispatch(
+    session: GameSession, player_id: str, data: Dict[str, Any]
+) -> Optional[Dict[str, Any]]:
+    """Handle one decoded input and return a reply to send, if any."""
+
+    msg_type = data.get("type")
+    if msg_type == "hello":
+        reply = {"type": "hello"}
+        reply.update(negotiate(session, player_id, data.get("encoding")))
+        return reply
+    if msg_type == "resync":
+        session.request_resync(player_id)
+    elif msg_type == "ack":
+        session.acknowledge(player_id, data.get("tick"))
+    else:
+        session.queue_input(player_id, data)
+    return None
@@ -0,0 +1,146 @@
+"""Shared distance map used to steer every zombie toward the players."""
+
+from __future__ import annotations
+
+from collections import deque
+from typing import Container, Iterable, List, Sequence, Tuple
+
+from .grid import WallGrid
+from .models import SEGMENT_SIZE, PlayerState
+
+# Neighbour order matches ``find_path`` so ties resolve the same way.
+DIRECTIONS = [(1, 0), (-1, 0), (0, 1), (0, -1)]
+
+UNREACHABLE = -1
+
+
+class FlowField:
+    """Multi-source breadth first search over the wall grid.
+
+    A single search is run from every cell containing a player. Each grid cell
+    then stores its step distance to the closest player so any zombie can look
+    up its next move in constant time. The field is only rebuilt when a player
+    moves into a different cell or the walls change.
+    """
+
+    def __init__(self, width: int, height: int) -> None:
+        self.width = width
+        self.height = height
+        self.grid_w = width // SEGMENT_SIZE
+        self.grid_h = height // SEGMENT_SIZE
+        self.dist = self._blank_dist()
+        self._sources: Tuple[Tuple[int, int], ...] | None = None
+        self._grid_key: Tuple[int, int] | None = None
+        # Number of times the field was recomputed, useful for tests/metrics.
+        self.rebuilds = 0
+
+    def _blank_dist(self) -> List[int]:
+        return [UNREACHABLE] * (self.grid_w * self.grid_h)
+
+    def invalidate(self) -> None:
+        """Force the next :meth:`update` call to recompute the field."""
+
+        self._sources = None
+        self._grid_key = None
+
+    def in_bounds(self, gx: int, gy: int) -> bool:
+        return 0 <= gx < self.grid_w and 0 <= gy < self.grid_h
+
+    def update(self, players: Iterable[PlayerState], grid: WallGrid) -> bool:
+        """Recompute the field if players changed cells or walls changed.
+
+        Returns
+        -------
+        bool
+            ``True`` when the field was rebuilt.
+        """
+
+        sources = tuple(
+            sorted(
+                {
+                    (int(p.x // SEGMENT_SIZE), int(p.y // SEGMENT_SIZE))
+                    for p in players
+                }
+            )
+        )
+        grid_key = (id(grid), grid.version)
+        if sources == self._sources and grid_key == self._grid_key:
+            return False
+        self._sources = sources
+        self._grid_key = grid_key
+        self._rebuild(sources, grid)
+        return True
+
+    def _rebuild(self, sources: Sequence[Tuple[int, int]], grid: WallGrid) -> None:
+        grid_w = self.grid_w
+        grid_h = self.grid_h
+        # Mark walls with a sentinel so the search never enters them.
+        dist = [-2 if count else UNREACHABLE for count in grid.cells]
+
+        queue: deque[Tuple[int, int]] = deque()
+        for sx, sy in sources:
+            if 0 <= sx < grid_w and 0 <= sy < grid_h:
+                dist[sy * grid_w + sx] = 0
+                queue.append((sx, sy))
+
+        while queue:
+            cx, cy = queue.popleft()
+            nd = dist[cy * grid_w + cx] + 1
+            for dx, dy in DIRECTIONS:
+                nx, ny = cx + dx, cy + dy
+                if nx < 0 or ny < 0 or nx >= grid_w or ny >= grid_h:
+                    continue
+                idx = ny * grid_w + nx
+                if dist[idx] != UNREACHABLE:
+                    continue
+                dist[idx] = nd
+                queue.append((nx, ny))
+
+        self.dist = [d if d >= 0 else UNREACHABLE for d in dist]
+        self.rebuilds += 1
+
+    def distance(self, gx: int, gy: int) -> int:
+        """Return the step distance from cell ``(gx, gy)`` to the nearest player."""
+
+        if not self.in_bounds(gx, gy):
+            return UNREACHABLE
+        return self.dist[gy * self.grid_w + gx]
+
+    def next_step(
+        self,
+        gx: int,
+        gy: int,
+        blocked: Container[Tuple[int, int]] | None = None,
+    ) -> Tuple[int, int] | None:
+        """Return the neighbouring cell that moves closer to a player.
+
+        Parameters
+        ----------
+        gx, gy : int
+            Current grid cell.
+        blocked : container[tuple[int, int]] | None, optional
+            Temporary obstacles such as other zombies.
+
+        Returns
+        -------
+        tuple[int, int] | None
+            The next cell to walk toward or ``None`` when already at a player
+            cell or no unblocked neighbour leads toward one.
+        """
+
+        here = self.distance(gx, gy)
+        if here <= 0:
+            return None
+        blocked = blocked or ()
+        best: Tuple[int, int] | None = None
+        best_dist = here + 1
+        for dx, dy in DIRECTIONS:
+            nx, ny = gx + dx, gy + dy
+            d = self.distance(nx, ny)
+            if d == UNREACHABLE or d >= best_dist or (nx, ny) in blocked:
+                continue
+            # Sideways steps (``d == here``) let zombies slip around blockers
+            # but a step never leads away from the players.
+            best = (nx, ny)
+            best_dist = d
+        return best
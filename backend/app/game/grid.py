@@ -0,0 +1,253 @@
+"""Occupancy grid for wall segments."""
+
+from __future__ import annotations
+
+import random
+from itertools import compress
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .models import SEGMENT_SIZE, WallState
+
+# Distance in pixels kept between a sampled point and its cell's borders so
+# the point never touches a neighbouring cell.
+CELL_MARGIN = 1
+# Translation table turning cell counts into 1 for empty and 0 for walls
+_EMPTY_MASK = bytes([1] + [0] * 255)
+
+
+class WallGrid:
+    """Per-cell wall counts allowing constant time collision queries.
+
+    Walls are always aligned to the ``SEGMENT_SIZE`` grid so a single byte per
+    cell is enough to describe the map. Counts rather than flags are stored
+    because the generator can place more than one segment in the same cell.
+    ``version`` increases on every change so caches such as the flow field
+    can tell when the layout is stale.
+
+    A list of free cells is built the first time a random open position is
+    requested and kept up to date by :meth:`add` and :meth:`remove`, so
+    sampling is constant time and always lands outside every wall.
+    """
+
+    def __init__(self, width: int, height: int) -> None:
+        self.width = width
+        self.height = height
+        self.grid_w = width // SEGMENT_SIZE
+        self.grid_h = height // SEGMENT_SIZE
+        self.cells = bytearray(self.grid_w * self.grid_h)
+        self.version = 0
+        # Flat indexes of empty cells, built on first use, and the position
+        # of each index in that list, built on the first change after that
+        self._free: List[int] | None = None
+        self._free_slot: Dict[int, int] | None = None
+
+    @classmethod
+    def from_walls(
+        cls, width: int, height: int, walls: Iterable[WallState]
+    ) -> "WallGrid":
+        """Build a grid containing ``walls``."""
+
+        grid = cls(width, height)
+        for wall in walls:
+            grid._mark(wall, 1)
+        return grid
+
+    def copy(self) -> "WallGrid":
+        """Return an independent grid with the same cells and version."""
+
+        grid = WallGrid.__new__(WallGrid)
+        grid.width = self.width
+        grid.height = self.height
+        grid.grid_w = self.grid_w
+        grid.grid_h = self.grid_h
+        grid.cells = bytearray(self.cells)
+        grid.version = self.version
+        grid._free = None if self._free is None else list(self._free)
+        grid._free_slot = None if self._free_slot is None else dict(self._free_slot)
+        return grid
+
+    @staticmethod
+    def cell_of(wall: WallState) -> Tuple[int, int]:
+        return int(wall.x // SEGMENT_SIZE), int(wall.y // SEGMENT_SIZE)
+
+    def _mark(self, wall: WallState, delta: int) -> None:
+        gx, gy = self.cell_of(wall)
+        if 0 <= gx < self.grid_w and 0 <= gy < self.grid_h:
+            idx = gy * self.grid_w + gx
+            old = self.cells[idx]
+            new = max(0, old + delta)
+            self.cells[idx] = new
+            if self._free is not None and (old == 0) != (new == 0):
+                self._update_free(idx, new == 0)
+
+    def _update_free(self, idx: int, empty: bool) -> None:
+        free = self._free
+        slots = self._free_slot
+        if slots is None:
+            slots = self._free_slot = {cell: slot for slot, cell in enumerate(free)}
+        if empty:
+            slots[idx] = len(free)
+            free.append(idx)
+            return
+        slot = slots.pop(idx)
+        last = free.pop()
+        if last != idx:
+            free[slot] = last
+            slots[last] = slot
+
+    def _free_cells(self) -> List[int]:
+        if self._free is None:
+            empty = self.cells.translate(_EMPTY_MASK)
+            self._free = list(compress(range(len(empty)), empty))
+        return self._free
+
+    def free_count(self) -> int:
+        """Return how many cells contain no wall."""
+
+        return len(self._free_cells())
+
+    def random_free_cell(self, rng: random.Random) -> Optional[Tuple[int, int]]:
+        """Return a uniformly chosen empty cell or ``None`` if all are walls."""
+
+        free = self._free_cells()
+        if not free:
+            return None
+        idx = free[rng.randrange(len(free))]
+        return idx % self.grid_w, idx // self.grid_w
+
+    def nearest_free_cell(
+        self, gx: int, gy: int, rng: random.Random
+    ) -> Optional[Tuple[int, int]]:
+        """Return a random empty cell from the closest ring around ``(gx, gy)``.
+
+        Rings are searched outward in Chebyshev distance; ``None`` is
+        returned only when the grid has no empty cell at all.
+        """
+
+        if not self.free_count():
+            return None
+        gx = min(max(gx, 0), self.grid_w - 1)
+        gy = min(max(gy, 0), self.grid_h - 1)
+        for ring in range(max(self.grid_w, self.grid_h)):
+            if ring == 0:
+                ring_cells = [(gx, gy)]
+            else:
+                ring_cells = [(gx + d, gy - ring) for d in range(-ring, ring + 1)]
+                ring_cells += [(gx + d, gy + ring) for d in range(-ring, ring + 1)]
+                ring_cells += [(gx - ring, gy + d) for d in range(-ring + 1, ring)]
+                ring_cells += [(gx + ring, gy + d) for d in range(-ring + 1, ring)]
+            found = [
+                (cx, cy)
+                for cx, cy in ring_cells
+                if 0 <= cx < self.grid_w
+                and 0 <= cy < self.grid_h
+                and not self.blocked(cx, cy)
+            ]
+            if found:
+                return rng.choice(found)
+        return None
+
+    @staticmethod
+    def point_in_cell(gx: int, gy: int, rng: random.Random) -> Tuple[float, float]:
+        """Return a random point strictly inside cell ``(gx, gy)``."""
+
+        span = SEGMENT_SIZE - 2 * CELL_MARGIN
+        return (
+            gx * SEGMENT_SIZE + CELL_MARGIN + rng.random() * span,
+            gy * SEGMENT_SIZE + CELL_MARGIN + rng.random() * span,
+        )
+
+    def add(self, wall: WallState) -> None:
+        """Mark the cell occupied by ``wall``."""
+
+        self._mark(wall, 1)
+        self.version += 1
+
+    def remove(self, wall: WallState) -> None:
+        """Clear one wall from the cell occupied by ``wall``."""
+
+        self._mark(wall, -1)
+        self.version += 1
+
+    def blocked(self, gx: int, gy: int) -> bool:
+        """Return ``True`` if grid cell ``(gx, gy)`` contains a wall."""
+
+        if 0 <= gx < self.grid_w and 0 <= gy < self.grid_h:
+            return self.cells[gy * self.grid_w + gx] > 0
+        return False
+
+    def collides(self, x: float, y: float) -> bool:
+        """Return ``True`` if point ``(x, y)`` touches any wall.
+
+        Wall bounds are inclusive on both sides, so a point lying exactly on a
+        cell border also tests the neighbouring cell.
+        """
+
+        gx = int(x // SEGMENT_SIZE)
+        gy = int(y // SEGMENT_SIZE)
+        xs = (gx, gx - 1) if x == gx * SEGMENT_SIZE else (gx,)
+        ys = (gy, gy - 1) if y == gy * SEGMENT_SIZE else (gy,)
+        for cx in xs:
+            for cy in ys:
+                if self.blocked(cx, cy):
+                    return True
+        return False
+
+
+class CellCounts:
+    """Number of moving entities, such as zombies, in each grid cell.
+
+    Filled once per tick in O(n). Counts are kept in a dict holding only the
+    occupied cells, so neither memory nor resetting depends on the map size.
+    """
+
+    def __init__(self, width: int, height: int) -> None:
+        self.width = width
+        self.height = height
+        self.grid_w = width // SEGMENT_SIZE
+        self.grid_h = height // SEGMENT_SIZE
+        self.counts: Dict[int, int] = {}
+
+    def index(self, gx: int, gy: int) -> int:
+        """Return the flat index of ``(gx, gy)`` or ``-1`` when off the grid."""
+
+        if 0 <= gx < self.grid_w and 0 <= gy < self.grid_h:
+            return gy * self.grid_w + gx
+        return -1
+
+    def fill(self, entities: Iterable) -> None:
+        """Reset the counts to the cells occupied by ``entities``."""
+
+        counts = self.counts
+        counts.clear()
+        for entity in entities:
+            idx = self.index(
+                int(entity.x // SEGMENT_SIZE), int(entity.y // SEGMENT_SIZE)
+            )
+            if idx >= 0:
+                counts[idx] = counts.get(idx, 0) + 1
+
+    def others(self, own: Tuple[int, int]) -> "OtherOccupants":
+        """Return the cells occupied by entities other than one in ``own``."""
+
+        return OtherOccupants(self, own)
+
+
+class OtherOccupants:
+    """``in`` test for cells holding any entity besides the caller."""
+
+    __slots__ = ("cells", "own")
+
+    def __init__(self, cells: CellCounts, own: Tuple[int, int]) -> None:
+        self.cells = cells
+        self.own = own
+
+    def __contains__(self, cell: object) -> bool:
+        gx, gy = cell  # type: ignore[misc]
+        idx = self.cells.index(gx, gy)
+        if idx < 0:
+            return False
+        count = self.cells.counts.get(idx, 0)
+        if cell == self.own:
+            count -= 1
+        return count > 0
@@ -0,0 +1,176 @@
+"""Per-player input queues drained once per simulation tick.
+
+WebSocket handlers push client inputs into an :class:`InputQueue` instead of
+applying them on arrival. The session drains every queue at the start of its
+tick, so the work a player causes per tick is bounded no matter how fast
+their client sends. Every move stays its own entry and is applied as its own
+collision checked step, exactly as a predicting client replays it; only
+facing-only updates are merged into the previous entry. Token buckets drop
+inputs sent faster than a well-behaved client would, with separate budgets
+for the per-frame stream of moves and for one-off actions.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+# Sustained moves and facing updates per second a connection may send: one
+# per frame on displays refreshing at up to 240 Hz
+INPUT_RATE = 240.0
+# Moves a connection may save up and send at once, e.g. after a hiccup
+INPUT_BURST = 60
+# Looting, crafting and other one-off actions have their own budget, so a
+# stream of moves can never starve them
+ACTION_RATE = 20.0
+ACTION_BURST = 10
+# Moves and facing updates held per player between ticks
+MAX_QUEUED_INPUTS = 32
+# Pixels moved by the legacy ``direction`` form of the move input
+DIRECTION_STEP = 2.0
+# Largest displacement a single move may request along each axis
+MAX_MOVE_STEP = DIRECTION_STEP
+
+_DIRECTIONS: Dict[str, Tuple[float, float]] = {
+    "left": (-DIRECTION_STEP, 0.0),
+    "right": (DIRECTION_STEP, 0.0),
+    "up": (0.0, -DIRECTION_STEP),
+    "down": (0.0, DIRECTION_STEP),
+}
+
+
+def move_vector(data: Dict[str, Any]) -> Tuple[float, float]:
+    """Return the ``(dx, dy)`` requested by a move input.
+
+    Moves are either explicit ``moveX``/``moveY`` deltas or, for older
+    clients, a ``direction`` string. Each component is limited to
+    ``MAX_MOVE_STEP`` so one input cannot carry a player across a wall.
+    """
+
+    if "moveX" in data or "moveY" in data:
+        dx, dy = float(data.get("moveX", 0)), float(data.get("moveY", 0))
+        return _clamp_step(dx), _clamp_step(dy)
+    return _DIRECTIONS.get(data.get("direction"), (0.0, 0.0))
+
+
+def _clamp_step(value: float) -> float:
+    if value != value:
+        return 0.0
+    return max(-MAX_MOVE_STEP, min(MAX_MOVE_STEP, value))
+
+
+def _is_move(data: Dict[str, Any]) -> bool:
+    return data.get("action") == "move"
+
+
+def _is_facing(data: Dict[str, Any]) -> bool:
+    return "action" not in data and "type" not in data
+
+
+class TokenBucket:
+    """Allow ``rate`` events per second with bursts of up to ``burst``."""
+
+    def __init__(
+        self,
+        rate: float,
+        burst: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.tokens = float(burst)
+        self.updated = clock()
+
+    def take(self) -> bool:
+        """Consume one token, returning ``False`` if none is available."""
+
+        now = self.clock()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class InputQueue:
+    """Inputs one player sent since the last tick.
+
+    Moves and facing updates are charged to ``bucket`` and limited to
+    ``limit`` queued entries. One-off actions are charged to ``actions``
+    only, so they are never lost behind a flood of moves. Counters record
+    every input received, those dropped by a rate limiter or a full queue,
+    and facing updates merged into an earlier queued input.
+    """
+
+    def __init__(
+        self,
+        rate: float = INPUT_RATE,
+        burst: float = INPUT_BURST,
+        limit: int = MAX_QUEUED_INPUTS,
+        clock: Callable[[], float] = time.monotonic,
+        action_rate: float = ACTION_RATE,
+        action_burst: float = ACTION_BURST,
+    ) -> None:
+        self.bucket = TokenBucket(rate, burst, clock)
+        self.actions = TokenBucket(action_rate, action_burst, clock)
+        self.limit = limit
+        self.pending: List[Dict[str, Any]] = []
+        # Pushes come from the event loop and drains from a threaded
+        # session's simulation thread
+        self.lock = threading.Lock()
+        self.received = 0
+        self.dropped = 0
+        self.merged = 0
+
+    def __len__(self) -> int:
+        return len(self.pending)
+
+    def push(self, data: Dict[str, Any]) -> bool:
+        """Queue ``data`` and return ``False`` if it was dropped."""
+
+        with self.lock:
+            return self._push(data)
+
+    def _push(self, data: Dict[str, Any]) -> bool:
+        self.received += 1
+        streamed = _is_move(data) or _is_facing(data)
+        if not (self.bucket if streamed else self.actions).take():
+            self.dropped += 1
+            return False
+        last = self.pending[-1] if self.pending else None
+        if last is not None and self._merge(last, data):
+            if "seq" in data:
+                last["seq"] = data["seq"]
+            self.merged += 1
+            return True
+        if streamed and len(self.pending) >= self.limit:
+            self.dropped += 1
+            return False
+        self.pending.append(dict(data))
+        return True
+
+    @staticmethod
+    def _merge(last: Dict[str, Any], data: Dict[str, Any]) -> bool:
+        """Fold a facing update ``data`` into the queued input ``last``.
+
+        Moves are never summed: ``move_player`` only checks the end point of
+        a step, so one large step could pass through a wall.
+        """
+
+        if not (_is_facing(data) and (_is_move(last) or _is_facing(last))):
+            return False
+        if data.get("facingX") is not None and data.get("facingY") is not None:
+            last["facingX"] = data["facingX"]
+            last["facingY"] = data["facingY"]
+        return True
+
+    def drain(self) -> List[Dict[str, Any]]:
+        """Return the queued inputs in arrival order and empty the queue."""
+
+        with self.lock:
+            pending = self.pending
+            self.pending = []
+        return pending
@@ -0,0 +1,118 @@
+"""Lookup of the shelves and containers players can loot.
+
+:class:`InteractableIndex` maps container ids to containers and buckets
+shelves and containers by grid cell, so a ``start_looting`` request only
+looks at the targets around the player instead of every wall and container
+in the world. Like the wall hash of :class:`app.game.interest.InterestIndex`
+it is rebuilt only when the wall layout changes; whether a target was
+already opened is checked at query time.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Any, Dict, List, Tuple
+
+from .models import SEGMENT_SIZE, ContainerState, WallState
+from .spatial import SpatialHash
+
+
+def wall_distance(px: float, py: float, wall: WallState) -> float:
+    """Return the distance from point ``(px, py)`` to a wall's edge."""
+
+    closest_x = max(wall.x, min(px, wall.x + wall.size))
+    closest_y = max(wall.y, min(py, wall.y + wall.size))
+    return math.hypot(px - closest_x, py - closest_y)
+
+
+class InteractableIndex:
+    """Container ids and grid buckets of a session's lootable targets.
+
+    Shelves are bucketed by their top left corner and containers by their
+    centre. Containers are reached within a radius of their centre and
+    shelves within a radius of their edge, so shelf queries widen the
+    searched cells by the largest wall size.
+    """
+
+    def __init__(self, cell_size: int = SEGMENT_SIZE) -> None:
+        self.containers: Dict[str, ContainerState] = {}
+        self.shelves = SpatialHash(cell_size)
+        self.boxes = SpatialHash(cell_size)
+        self._wall_size = 0
+        self._walls: List[WallState] | None = None
+        self._container_list: List[ContainerState] | None = None
+        self._version: Tuple[Any, ...] | None = None
+
+    def sync(
+        self,
+        walls: List[WallState],
+        containers: List[ContainerState],
+        version: Tuple[Any, ...],
+    ) -> None:
+        """Rebuild the index if the layout changed since the last call.
+
+        ``version`` identifies the layout, typically the identity and
+        ``version`` of the session's wall grid plus the container count.
+        Replacing either list also triggers a rebuild.
+        """
+
+        if (
+            walls is self._walls
+            and containers is self._container_list
+            and version == self._version
+        ):
+            return
+        self.shelves.sync(walls)
+        self._wall_size = max((w.size for w in walls), default=0)
+        self.boxes.sync(containers)
+        self.containers = {c.id: c for c in containers}
+        self._walls = walls
+        self._container_list = containers
+        self._version = version
+
+    def replace_shelf(self, old: WallState, new: WallState) -> None:
+        """Swap ``new`` in for ``old``, such as a session's copy of a wall."""
+
+        self.shelves.remove(old)
+        self.shelves.update(new)
+
+    def container(self, cid: str) -> ContainerState | None:
+        """Return the container with id ``cid`` or ``None``."""
+
+        return self.containers.get(cid)
+
+    def nearest(
+        self, x: float, y: float, radius: float
+    ) -> WallState | ContainerState | None:
+        """Return the closest unopened shelf or container within ``radius``.
+
+        Ties go to shelves before containers and then to the target with
+        the smaller position, so the choice does not depend on the order
+        of the buckets.
+        """
+
+        best: WallState | ContainerState | None = None
+        best_key = (radius, 2, 0.0, 0.0)
+        shelves = self.shelves
+        reach = radius + self._wall_size
+        cx0, cy0 = shelves.cell_of(x - reach, y - reach)
+        cx1, cy1 = shelves.cell_of(x + radius, y + radius)
+        buckets = shelves.buckets
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                bucket = buckets.get((cx, cy))
+                if not bucket:
+                    continue
+                for wall in bucket.values():
+                    if wall.opened:
+                        continue
+                    key = (wall_distance(x, y, wall), 0, wall.x, wall.y)
+                    if key < best_key:
+                        best, best_key = wall, key
+        for box in self.boxes.query_radius(x, y, radius):
+            if box.opened:
+                continue
+            key = (math.hypot(box.x - x, box.y - y), 1, box.x, box.y)
+            if key < best_key:
+                best, best_key = box, key
+        return best
@@ -0,0 +1,219 @@
+"""Area of interest filtering of per-player state updates.
+
+Connections using the ``aoi`` sync mode only hear about entities near their
+player. :class:`InterestIndex` keeps coarse spatial hashes over a session's
+entities and each connection's :class:`View` remembers which entities it was
+told about, turning entities that come into range into ``spawn`` events and
+entities that leave range (or the world) into ``despawn`` events.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Set, Tuple
+
+from .models import SEGMENT_SIZE, GameState
+from .spatial import SpatialHash
+from .sync import ENTITY_KEYS, SCALAR_KEYS, StateSync
+
+# Default distance within which entities become visible
+VIEW_RADIUS = 800
+# Extra distance a visible entity may move away before it is despawned, so
+# entities sitting on the edge do not flicker in and out every tick
+VIEW_HYSTERESIS = 100
+# Range accepted for client requested view radii
+MIN_VIEW_RADIUS = 200
+MAX_VIEW_RADIUS = 4000
+# Bucket size of the interest indexes. Much coarser than the collision grid
+# because view queries cover hundreds of pixels.
+INTEREST_CELL_SIZE = 4 * SEGMENT_SIZE
+
+
+def clamp_view_radius(radius: float) -> float:
+    """Return ``radius`` limited to the supported view radius range."""
+
+    return max(MIN_VIEW_RADIUS, min(MAX_VIEW_RADIUS, radius))
+
+
+class InterestIndex:
+    """Spatial hashes over every entity collection of a session.
+
+    Players, zombies and containers are re-synced on every call to
+    :meth:`sync`. Walls only move when they are added or removed, so their
+    hash is rebuilt only when the wall grid changes.
+    """
+
+    def __init__(self, cell_size: int = INTEREST_CELL_SIZE) -> None:
+        self.indexes: Dict[str, SpatialHash] = {
+            key: SpatialHash(cell_size) for key in ENTITY_KEYS
+        }
+        self._player_ids: Dict[int, str] = {}
+        self._wall_version: Tuple[int, int] | None = None
+
+    def sync(self, state: GameState, wall_version: Tuple[int, int]) -> None:
+        """Index the current positions of ``state``'s entities.
+
+        ``wall_version`` identifies the wall layout, typically the identity
+        and ``version`` of the session's wall grid.
+        """
+
+        players = state.players
+        self.indexes["players"].sync(players.values())
+        self._player_ids = {id(p): pid for pid, p in players.items()}
+        self.indexes["zombies"].sync(state.zombies)
+        self.indexes["containers"].sync(state.containers)
+        if wall_version != self._wall_version:
+            self.indexes["walls"].sync(state.walls)
+            self._wall_version = wall_version
+
+    def visible(
+        self,
+        key: str,
+        x: float,
+        y: float,
+        radius: float,
+        outer: float,
+        seen: Set[str],
+    ) -> Set[str]:
+        """Return ids of ``key`` entities visible from ``(x, y)``.
+
+        Entities within ``radius`` are visible, as are entities in ``seen``
+        that are still within ``outer``.
+        """
+
+        index = self.indexes[key]
+        player_ids = self._player_ids if key == "players" else None
+        cx0, cy0 = index.cell_of(x - outer, y - outer)
+        cx1, cy1 = index.cell_of(x + outer, y + outer)
+        inner2 = radius * radius
+        outer2 = outer * outer
+        buckets = index.buckets
+        found: Set[str] = set()
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                bucket = buckets.get((cx, cy))
+                if not bucket:
+                    continue
+                for entity in bucket.values():
+                    dx = entity.x - x
+                    dy = entity.y - y
+                    d2 = dx * dx + dy * dy
+                    if d2 > outer2:
+                        continue
+                    if player_ids is None:
+                        entity_id = entity.id
+                    else:
+                        entity_id = player_ids[id(entity)]
+                    if d2 <= inner2 or entity_id in seen:
+                        found.add(entity_id)
+        return found
+
+
+class View:
+    """The entities one connection currently sees.
+
+    An entity enters the view once it is within ``radius`` of the view
+    center and leaves it once it is farther than ``radius + hysteresis``.
+    """
+
+    def __init__(
+        self, radius: float = VIEW_RADIUS, hysteresis: float = VIEW_HYSTERESIS
+    ) -> None:
+        self.radius = radius
+        self.hysteresis = hysteresis
+        self.x = 0.0
+        self.y = 0.0
+        self.visible: Dict[str, Set[str]] = {key: set() for key in ENTITY_KEYS}
+        # Tick of the last message built for this view, the next delta's base
+        self.tick: int | None = None
+        # Totals of spawn and despawn events sent, for diagnostics
+        self.spawned = 0
+        self.despawned = 0
+
+    def _update(
+        self, index: InterestIndex, x: float, y: float
+    ) -> Dict[str, Set[str]]:
+        """Move the view to ``(x, y)`` and return the previous visible sets."""
+
+        self.x, self.y = x, y
+        outer = self.radius + self.hysteresis
+        previous = self.visible
+        self.visible = {
+            key: index.visible(key, x, y, self.radius, outer, previous[key])
+            for key in ENTITY_KEYS
+        }
+        return previous
+
+    def snapshot(
+        self, index: InterestIndex, sync: StateSync, x: float, y: float, tick: int
+    ) -> Dict[str, Any]:
+        """Return a snapshot holding only the entities in view.
+
+        ``sync`` must already have produced its delta for ``tick`` so its
+        entity fields are current.
+        """
+
+        self.visible = {key: set() for key in ENTITY_KEYS}
+        self._update(index, x, y)
+        message: Dict[str, Any] = {"type": "snapshot", "tick": tick}
+        for key in ENTITY_KEYS:
+            fields = sync.fields(key)
+            visible = self.visible[key]
+            self.spawned += len(visible)
+            if key == "players":
+                message[key] = {pid: fields[pid] for pid in visible}
+            else:
+                message[key] = [fields[entity_id] for entity_id in visible]
+        message.update(sync.scalars())
+        self.tick = tick
+        return message
+
+    def delta(
+        self,
+        index: InterestIndex,
+        sync: StateSync,
+        changes: Dict[str, Any],
+        x: float,
+        y: float,
+        tick: int,
+    ) -> Dict[str, Any]:
+        """Return the view's share of the session delta ``changes``.
+
+        Each collection lists entities that came into view with all their
+        fields under ``spawn``, changed fields of entities that stayed in
+        view under ``upsert`` and the ids of entities that left the view or
+        the world under ``despawn``.
+        """
+
+        previous = self._update(index, x, y)
+        message: Dict[str, Any] = {"type": "delta", "tick": tick, "base": self.tick}
+        for key in ENTITY_KEYS:
+            old = previous[key]
+            new = self.visible[key]
+            fields = sync.fields(key)
+            spawn = {entity_id: fields[entity_id] for entity_id in new - old}
+            despawn: List[str] = list(old - new)
+            upsert: Dict[str, Any] = {}
+            changed = changes.get(key)
+            if changed:
+                changed = changed["upsert"]
+                if len(changed) < len(new):
+                    upsert = {
+                        entity_id: value
+                        for entity_id, value in changed.items()
+                        if entity_id in new and entity_id in old
+                    }
+                else:
+                    upsert = {
+                        entity_id: changed[entity_id]
+                        for entity_id in new & old
+                        if entity_id in changed
+                    }
+            if spawn or upsert or despawn:
+                message[key] = {"spawn": spawn, "upsert": upsert, "despawn": despawn}
+            self.spawned += len(spawn)
+            self.despawned += len(despawn)
+        for key in SCALAR_KEYS:
+            if key in changes:
+                message[key] = changes[key]
+        self.tick = tick
+        return message
@@ -0,0 +1,325 @@
+"""Append-only journals of session inputs and a headless replay.
+
+A session's simulation only depends on its seed and the inputs it applies:
+world generation, spawns, loot rolls and zombies all draw from the session's
+seeded random generator. An :class:`InputJournal` records the rest. Every
+tick that applied inputs appends the inputs exactly as they were applied,
+after rate limiting and merging by :class:`app.game.inputs.InputQueue`,
+together with the tick number and wall clock time. Joins and leaves are
+recorded with the tick they happened before, and closing a journal records
+a digest of the state so a replay can tell whether it diverged.
+
+Recording is kept off the hot path: the tick only appends a tuple that
+references the already decoded inputs to an in-memory buffer.
+:class:`JournalFlusher` serializes the buffer as JSON lines and appends it
+to the journal file as one gzip member from a worker thread once a second.
+Consecutive members read back as a single stream, and a member cut short
+by a crash only loses the records of its last flush.
+
+Records, one JSON array per line after a header object::
+
+    ["i", tick, time, [[player_id, input], ...]]   inputs applied by a tick
+    ["j", tick, player_id, sync, x, y]              join and spawn position
+    ["l", tick, player_id]                          leave
+    ["r", tick]                                     session restored
+    ["c", tick, digest]                             state digest
+
+:func:`replay` re-creates the session from the header's seed and runs the
+journal as fast as it can, see ``benchmarks/replay.py``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+from .persistence import _GAME_ID
+from .schema import state_to_dict
+
+JOURNAL_VERSION = 1
+JOURNAL_SUFFIX = ".journal"
+# Seconds between flushes of buffered records
+JOURNAL_FLUSH_INTERVAL = 1.0
+# Cheap compression keeps flushes short; inputs repeat a lot anyway
+JOURNAL_COMPRESSION = 1
+
+
+def journal_dir() -> str | None:
+    """Return ``GAME_JOURNAL_DIR``, or ``None`` if journaling is disabled."""
+
+    directory = os.environ.get("GAME_JOURNAL_DIR")
+    if not directory:
+        return None
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+def journal_path(directory: str, game_id: str) -> Optional[str]:
+    """Return the journal file of ``game_id``, or ``None`` for unsafe IDs."""
+
+    if not _GAME_ID.match(game_id):
+        return None
+    return os.path.join(directory, game_id + JOURNAL_SUFFIX)
+
+
+def _canonical(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {k: _canonical(v) for k, v in value.items() if k != "id"}
+    if isinstance(value, list):
+        return [_canonical(v) for v in value]
+    if isinstance(value, int) and not isinstance(value, bool):
+        return float(value)
+    return value
+
+
+def state_digest(session: Any) -> str:
+    """Return a short hash of the session's full state.
+
+    Entity IDs are random UUIDs rather than drawn from the session's seed,
+    so they are left out; a replay creates the same entities under other
+    IDs. Numbers are hashed by value, as a restored session may hold
+    ``80.0`` where the original generated ``80``.
+    """
+
+    state = _canonical(state_to_dict(session.state))
+    data = json.dumps(state, sort_keys=True, default=str)
+    return hashlib.sha256(data.encode()).hexdigest()[:16]
+
+
+class InputJournal:
+    """Buffered, append-only input journal of one session."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        # Records not yet written; appended by the tick, drained by ``flush``
+        self.pending: Deque[Tuple[Any, ...]] = deque()
+        self._write_lock = threading.Lock()
+        self.records = 0
+        self.bytes_written = 0
+
+    @classmethod
+    def create(cls, path: str, session: Any) -> "InputJournal":
+        """Start a new journal for ``session``, replacing any old file."""
+
+        journal = cls(path)
+        header = {
+            "v": JOURNAL_VERSION,
+            "seed": session.seed,
+            "chunked": session.chunks is not None,
+            "vectorized": session.zombie_arrays is not None,
+            "tick": session.tick,
+        }
+        line = json.dumps(header, separators=(",", ":")) + "\n"
+        with open(path, "wb") as fh:
+            fh.write(gzip.compress(line.encode(), JOURNAL_COMPRESSION))
+        return journal
+
+    @classmethod
+    def resume(cls, path: str, session: Any) -> Optional["InputJournal"]:
+        """Continue the journal of a restored session if it has one."""
+
+        if not os.path.exists(path):
+            return None
+        journal = cls(path)
+        journal.pending.append(("r", session.tick))
+        return journal
+
+    def inputs(self, tick: int, applied: List[Tuple[str, Dict[str, Any]]]) -> None:
+        """Record the inputs applied by the step starting at ``tick``."""
+
+        self.pending.append(("i", tick, round(time.time(), 3), applied))
+
+    def join(self, tick: int, player_id: str, sync: str, x: float, y: float) -> None:
+        """Record a player joining before the step starting at ``tick``."""
+
+        self.pending.append(("j", tick, player_id, sync, x, y))
+
+    def leave(self, tick: int, player_id: str) -> None:
+        """Record a player leaving before the step starting at ``tick``."""
+
+        self.pending.append(("l", tick, player_id))
+
+    def flush(self) -> int:
+        """Append buffered records to the file and return how many."""
+
+        with self._write_lock:
+            lines = []
+            pending = self.pending
+            while pending:
+                lines.append(
+                    json.dumps(pending.popleft(), separators=(",", ":"), default=str)
+                )
+            if not lines:
+                return 0
+            data = gzip.compress(
+                ("\n".join(lines) + "\n").encode(), JOURNAL_COMPRESSION
+            )
+            with open(self.path, "ab") as fh:
+                fh.write(data)
+            self.records += len(lines)
+            self.bytes_written += len(data)
+            return len(lines)
+
+    def to_dict(self) -> Dict[str, int]:
+        """Return counters for the metrics endpoint."""
+
+        return {
+            "pending": len(self.pending),
+            "records": self.records,
+            "bytes": self.bytes_written,
+        }
+
+    def close(self, session: Any) -> None:
+        """Record a digest of the session's state and flush."""
+
+        with session.lock:
+            self.pending.append(("c", session.tick, state_digest(session)))
+        self.flush()
+
+
+class JournalFlusher:
+    """Periodically write the buffered journal records of a manager."""
+
+    def __init__(self, manager: Any, interval: float = JOURNAL_FLUSH_INTERVAL) -> None:
+        self.manager = manager
+        self.interval = interval
+
+    def flush(self) -> int:
+        """Flush every session's journal and return the records written."""
+
+        written = 0
+        for session in list(self.manager.get_all_sessions().values()):
+            journal = session.journal
+            if journal is not None and journal.pending:
+                written += journal.flush()
+        return written
+
+    async def run(self) -> None:
+        """Flush on a worker thread every ``interval`` seconds until cancelled."""
+
+        while True:
+            await asyncio.sleep(self.interval)
+            await asyncio.to_thread(self.flush)
+
+
+def read_journal(path: str) -> Tuple[Dict[str, Any], Iterator[List[Any]]]:
+    """Return the header of the journal at ``path`` and an iterator of records.
+
+    Records of a flush cut short by a crash are silently dropped.
+
+    Raises
+    ------
+    ValueError
+        If the file is not a journal of a supported version.
+    """
+
+    fh = gzip.open(path, "rt")
+    try:
+        header = json.loads(fh.readline())
+    except (OSError, EOFError, ValueError) as exc:
+        fh.close()
+        raise ValueError(f"{path} is not a session journal") from exc
+    if not isinstance(header, dict) or header.get("v") != JOURNAL_VERSION:
+        fh.close()
+        raise ValueError(f"unsupported journal version in {path}")
+
+    def records() -> Iterator[List[Any]]:
+        with fh:
+            try:
+                for line in fh:
+                    if line.endswith("\n"):
+                        yield json.loads(line)
+            except (EOFError, gzip.BadGzipFile):
+                return
+
+    return header, records()
+
+
+@dataclass(slots=True)
+class ReplayResult:
+    """Outcome of :func:`replay`."""
+
+    session: Any
+    ticks: int = 0
+    seconds: float = 0.0
+    # Duration of every replayed step, in milliseconds
+    tick_ms: List[float] = field(default_factory=list)
+    # ``(tick, recorded, replayed)`` of every digest that did not match
+    mismatches: List[Tuple[int, str, str]] = field(default_factory=list)
+
+
+def replay(
+    path: str,
+    until: int | None = None,
+    on_tick: Callable[[Any], None] | None = None,
+) -> ReplayResult:
+    """Re-run the journal at ``path`` headlessly, as fast as possible.
+
+    The session is created from the journal's seed; recorded joins add
+    players without a connection and recorded inputs are applied by the
+    same steps that applied them originally. Replaying stops at tick
+    ``until`` if given. ``on_tick`` is called with the session after every
+    step.
+
+    Raises
+    ------
+    ValueError
+        If the journal cannot be replayed, such as one that continues from
+        a checkpoint older than its last records after a crash.
+    """
+
+    from .manager import GameSession
+
+    header, records = read_journal(path)
+    if header["tick"] != 0:
+        raise ValueError("journal does not start with a new session")
+    session = GameSession(
+        vectorized=header["vectorized"],
+        seed=header["seed"],
+        chunked=header["chunked"],
+    )
+    result = ReplayResult(session)
+    start = time.perf_counter()
+
+    def step(inputs: List[Tuple[str, Dict[str, Any]]] | None = None) -> None:
+        began = time.perf_counter()
+        session.update_world(inputs)
+        result.tick_ms.append((time.perf_counter() - began) * 1000)
+        result.ticks += 1
+        if on_tick is not None:
+            on_tick(session)
+
+    def advance(tick: int) -> None:
+        if tick < session.tick:
+            raise ValueError(
+                f"journal goes back to tick {tick} after tick {session.tick}"
+            )
+        while session.tick < tick:
+            step()
+
+    for record in records:
+        kind, tick = record[0], record[1]
+        if until is not None and tick >= until:
+            advance(until)
+            break
+        advance(tick)
+        if kind == "i":
+            step([(player_id, data) for player_id, data in record[3]])
+        elif kind == "j":
+            session.add_player(None, record[3], player_id=record[2])
+        elif kind == "l":
+            session.remove_player(record[2])
+        elif kind == "c":
+            digest = state_digest(session)
+            if digest != record[2]:
+                result.mismatches.append((tick, record[2], digest))
+    result.seconds = time.perf_counter() - start
+    return result
@@ -0,0 +1,131 @@
+"""Pause, hibernate and expire sessions nobody is playing.
+
+A session stops ticking as soon as its last connection leaves, see
+:class:`app.game.scheduler.SessionScheduler`. :class:`SessionReaper` then
+hibernates sessions that stayed empty for ``HIBERNATE_AFTER`` seconds: the
+session is packed with :func:`app.game.persistence.pack_session` into the
+manager's :class:`SessionStore` and dropped from memory. The next join of
+that game ID restores it through :meth:`GameManager.load_session`, which
+reads the save on a worker thread.
+Hibernated sessions nobody resumes within ``SESSION_TTL`` seconds are
+deleted.
+
+The same store makes restarts lossless. :class:`Checkpointer` saves the
+sessions that changed every ``CHECKPOINT_INTERVAL`` seconds, the application
+saves all of them on shutdown, and the sessions in memory at the last
+checkpoint are restored on startup by :meth:`GameManager.restore_checkpoint`.
+
+Both tasks pack sessions on the event loop, where nothing ticks under them,
+and write and fsync the saves on a worker thread with
+:meth:`GameManager.write_saves`, so disk latency never stalls a tick.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+
+from .manager import GameManager
+from .persistence import CHECKPOINT_INDEX, SessionStore
+
+# Seconds a session may stay without connections before it is hibernated
+HIBERNATE_AFTER = 60.0
+# Seconds a hibernated session is kept on disk before it is deleted
+SESSION_TTL = 24 * 3600.0
+# Seconds between reaper passes
+REAP_INTERVAL = 5.0
+# Seconds between checkpoints of changed sessions
+CHECKPOINT_INTERVAL = 30.0
+
+
+def session_store() -> SessionStore | None:
+    """Return the store in ``GAME_SESSION_DIR``, or ``None`` if it is unset.
+
+    Saving is opt-in: without a directory sessions live in memory only, are
+    never hibernated and do not survive a restart.
+    """
+
+    directory = os.environ.get("GAME_SESSION_DIR")
+    return SessionStore(directory) if directory else None
+
+
+class SessionReaper:
+    """Hibernate idle sessions of a manager and expire old hibernations."""
+
+    def __init__(
+        self,
+        manager: GameManager,
+        hibernate_after: float = HIBERNATE_AFTER,
+        ttl: float = SESSION_TTL,
+        interval: float = REAP_INTERVAL,
+    ) -> None:
+        self.manager = manager
+        self.hibernate_after = hibernate_after
+        self.ttl = ttl
+        self.interval = interval
+
+    def reap(self, now: float | None = None) -> None:
+        """Hibernate sessions idle for too long and delete expired saves."""
+
+        if self.hibernate_idle(now):
+            self.manager.write_saves()
+        self.expire()
+
+    def hibernate_idle(self, now: float | None = None) -> int:
+        """Pack and drop sessions idle for too long, leaving the writes.
+
+        Returns the number of sessions hibernated.
+        """
+
+        now = time.monotonic() if now is None else now
+        manager = self.manager
+        if manager.store is None:
+            return 0
+        hibernated = 0
+        for game_id, session in list(manager.get_all_sessions().items()):
+            idle = session.idle_since
+            if idle is not None and now - idle >= self.hibernate_after:
+                hibernated += manager.hibernate(game_id, write=False)
+        return hibernated
+
+    def expire(self) -> None:
+        """Delete saves nobody resumed within the time to live."""
+
+        manager = self.manager
+        if manager.store is None:
+            return
+        keep = [*manager.get_all_sessions(), *manager.unsaved]
+        expired = manager.store.expire(self.ttl, keep=keep)
+        manager.sessions_expired += len(expired)
+
+    async def run(self) -> None:
+        """Reap every ``interval`` seconds until cancelled."""
+
+        while True:
+            await asyncio.sleep(self.interval)
+            if self.hibernate_idle():
+                await asyncio.to_thread(self.manager.write_saves)
+            await asyncio.to_thread(self.expire)
+
+
+class Checkpointer:
+    """Periodically save the sessions of a manager that changed."""
+
+    def __init__(
+        self,
+        manager: GameManager,
+        interval: float = CHECKPOINT_INTERVAL,
+        index: str = CHECKPOINT_INDEX,
+    ) -> None:
+        self.manager = manager
+        self.interval = interval
+        self.index = index
+
+    async def run(self) -> None:
+        """Checkpoint every ``interval`` seconds until cancelled."""
+
+        while True:
+            await asyncio.sleep(self.interval)
+            self.manager.checkpoint(self.index, write=False)
+            await asyncio.to_thread(self.manager.write_saves)
@@ -1,67 +1,395 @@
 """Holds the authoritative game state on the server."""
 
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 from uuid import uuid4
 
 from fastapi import WebSocket
+import asyncio
+import copy
+import logging
 import random
 import math
+import threading
+import time
 
 from .models import (
     CONTAINER_LOOT,
     CRAFTING_MATERIALS,
     SHELF_LOOT_CHANCE,
+    WORLD_HEIGHT,
+    WORLD_WIDTH,
     GameState,
     PlayerState,
+    WallState,
 )
-from .world import generate_world, spawn_player, update_zombies
+from .broadcast import Broadcaster
+from .chunks import CHUNKED_WORLD_SIZE, ChunkedWorld, SparseFlowField
+from .codec import ENCODING_MSGPACK, BinaryCodec
+from .flowfield import FlowField
+from .grid import CellCounts, WallGrid
+from .inputs import InputQueue, move_vector
+from .interactables import InteractableIndex, wall_distance
+from .interest import InterestIndex, View
+from .journal import InputJournal, journal_path
+from .persistence import (
+    CHECKPOINT_INDEX,
+    SavedSession,
+    SessionStore,
+    pack_session,
+    unpack_session,
+)
+from .scheduler import LoopMonitor, TickMetrics
+from .spatial import SpatialHash
+from .vectorized import ZombieArrays, update_zombies_vectorized
+from .schema import state_to_dict
+from .sync import StateSync, snapshot_message
+from .templates import TemplatePool, WorldTemplate
+from .timers import TimerWheel
+from .world import (
+    ZOMBIE_WAVE_SIZE,
+    move_player,
+    spawn_player,
+    spawn_zombie_wave,
+    update_zombies,
+)
+
+logger = logging.getLogger(__name__)
 
 LOOT_TICKS = 180
 INTERACT_RANGE = 20
+# Distance at which a zombie's touch damages a player
+ZOMBIE_ATTACK_RANGE = 16
+# Connection protocols: full state every tick, snapshot followed by deltas,
+# or snapshot and deltas limited to the player's area of interest
+SYNC_FULL = "full"
+SYNC_DELTA = "delta"
+SYNC_AOI = "aoi"
+# Ticks a damaged wall flashes, matching the client side effect
+WALL_DAMAGE_FLASH_TICKS = 5
+# Ticks before a zombie attacks again and before a hit player can be hurt
+ATTACK_COOLDOWN_TICKS = 30
+# Ticks between scans for binary handles of entities that left the world
+HANDLE_SWEEP_TICKS = 60
+# Ticks after which a removal counts as seen by binary clients that do not
+# acknowledge ticks, such as full-state clients
+HANDLE_ACK_GRACE_TICKS = 600
 
 
-def _wall_distance(px: float, py: float, wall) -> float:
-    """Return the distance from point ``(px, py)`` to a wall's edge."""
-
-    closest_x = max(wall.x, min(px, wall.x + wall.size))
-    closest_y = max(wall.y, min(py, wall.y + wall.size))
-    return math.hypot(px - closest_x, py - closest_y)
-
+def _in_loot_range(player: PlayerState, info: Dict[str, Any]) -> bool:
+    """Return whether ``player`` can still reach the target of a loot timer."""
 
-def _collides(x: float, y: float, walls) -> bool:
-    """Return True if point ``(x, y)`` intersects a wall."""
-    return any(w.x <= x <= w.x + w.size and w.y <= y <= w.y + w.size for w in walls)
+    if "container" in info:
+        target = info["container"]
+        return math.hypot(player.x - target.x, player.y - target.y) <= INTERACT_RANGE
+    return wall_distance(player.x, player.y, info["shelf"]) <= INTERACT_RANGE
 
 
 class GameSession:
     """A single game session with its own state and connections."""
 
-    def __init__(self) -> None:
-        self.state = GameState(players={})
-        walls, zombies, containers, door = generate_world(
-            self.state.width, self.state.height
-        )
-        self.state.walls = walls
-        self.state.zombies = zombies
-        self.state.containers = containers
+    def __init__(
+        self,
+        vectorized: bool = False,
+        seed: int | None = None,
+        template: WorldTemplate | None = None,
+        chunked: bool = False,
+        threaded: bool = False,
+        saved: SavedSession | None = None,
+    ) -> None:
+        """Create a session from a world template.
+
+        ``vectorized`` steps zombies with the NumPy kernel from
+        :mod:`app.game.vectorized` instead of the scalar loop. ``seed`` seeds
+        the session's random generator, which drives world generation,
+        player spawns and loot rolls; a random seed is picked when omitted.
+        ``template`` supplies an already generated world, in which case its
+        seed is used and ``seed`` is ignored. ``chunked`` creates a large
+        world generated chunk by chunk around the players instead, see
+        :mod:`app.game.chunks`. ``threaded`` simulates the session on its own
+        thread instead of the event loop, see
+        :func:`app.game.scheduler.run_session_threaded`. ``saved`` continues a
+        session unpacked by :func:`app.game.persistence.unpack_session`
+        instead of creating a world; use :meth:`load`.
+        """
+
+        if chunked and (vectorized or template is not None):
+            raise ValueError("chunked worlds use neither templates nor NumPy")
+        if vectorized and saved is not None and saved.chunks is not None:
+            raise ValueError("chunked worlds use neither templates nor NumPy")
+        if template is None and not chunked and saved is None:
+            if seed is None:
+                seed = random.getrandbits(32)
+            template = WorldTemplate(WORLD_WIDTH, WORLD_HEIGHT, seed)
+        # Template walls not yet copied by this session, see ``_own_wall``
+        self._shared_walls: set[int] = set()
+        self._wall_copies: Dict[int, WallState] = {}
+        # Chunk loader of a chunked world, ``None`` for fixed size worlds
+        self.chunks: ChunkedWorld | None = None
+        if saved is not None:
+            self._template = None
+            self.seed = saved.seed
+            self.rng = random.Random()
+            self.rng.setstate(saved.rng_state)
+            self.state = saved.state
+            self.chunks = saved.chunks
+            if self.chunks is not None:
+                self._wall_grid = self.chunks.grid
+            else:
+                self._wall_grid = WallGrid.from_walls(
+                    self.state.width, self.state.height, self.state.walls
+                )
+            door = self.state.door
+        elif chunked:
+            self._template = None
+            self.seed = random.getrandbits(32) if seed is None else seed
+            self.rng = random.Random(self.seed)
+            self.state = GameState(
+                players={}, width=CHUNKED_WORLD_SIZE, height=CHUNKED_WORLD_SIZE
+            )
+            self.chunks = ChunkedWorld(
+                self.state.width,
+                self.state.height,
+                self.seed,
+                self.state.walls,
+                self.state.containers,
+            )
+            door = self.chunks.start(self.rng)
+            self._wall_grid = self.chunks.grid
+            self.state.zombies = spawn_zombie_wave(
+                ZOMBIE_WAVE_SIZE,
+                door,
+                self.state.width,
+                self.state.height,
+                "normal",
+                self.state.walls,
+                self._wall_grid,
+                self.rng,
+            )
+        else:
+            # Keeps the shared wall objects alive while the session uses them
+            self._template = template
+            self.seed = template.seed
+            self.rng = random.Random()
+            self.rng.setstate(template.rng_state)
+            self.state = GameState(
+                players={}, width=template.width, height=template.height
+            )
+            self.state.walls = list(template.walls)
+            self._shared_walls = {id(wall) for wall in self.state.walls}
+            self._wall_grid = template.grid.copy()
+            self.state.zombies = [copy.copy(z) for z in template.zombies]
+            self.state.containers = [copy.copy(c) for c in template.containers]
+            door = copy.copy(template.door)
+        self._grid_walls = self.state.walls
         self.spawn_door = door
         self.state.door = door
         # Track active WebSocket connections for broadcasting state
         self.connections: Dict[str, WebSocket] = {}
-        # active looting timers
+        # Target, due tick and completion timer of every looting player
         self.loot_timers: Dict[str, Dict[str, Any]] = {}
+        # Distance map shared by all zombies, rebuilt only when needed
+        flow_field_type = FlowField if self.chunks is None else SparseFlowField
+        self.flow_field = flow_field_type(self.state.width, self.state.height)
+        # Grid buckets for proximity queries against players
+        self.player_index = SpatialHash()
+        # Zombies per grid cell, used for zombie to zombie avoidance
+        self.zombie_cells = CellCounts(self.state.width, self.state.height)
+        # Struct-of-arrays zombie mirror when the vectorized kernel is enabled
+        self.zombie_arrays = ZombieArrays() if vectorized else None
+        # Loot completions and other work due at a later tick
+        self.timers = TimerWheel(self.tick)
+        self.sync = StateSync()
+        # Bumped on every change to a wall or container made here, so deltas
+        # can skip both collections while nothing changed
+        self.static_revision = 0
+        # Sync protocol chosen by each connection
+        self.sync_modes: Dict[str, str] = {}
+        # Delta clients that must receive a full snapshot next broadcast
+        self.needs_snapshot: set[str] = set()
+        # Entity indexes and per-connection views of area of interest clients
+        self.interest = InterestIndex()
+        # Container ids and grid buckets of the targets players can loot
+        self.interactables = InteractableIndex()
+        self.views: Dict[str, View] = {}
+        # Inputs received from each player, applied at the start of a tick
+        self.inputs: Dict[str, InputQueue] = {}
+        # Wire encoding of connections that did not keep the JSON default
+        self.encodings: Dict[str, str] = {}
+        # Binary encoder and entity handles, created for the first binary client
+        self.codec: BinaryCodec | None = None
+        # Latest tick each binary client acknowledged having applied
+        self.acked_ticks: Dict[str, int] = {}
+        self.broadcaster = Broadcaster()
+        self.tick_metrics = TickMetrics()
+        # Simulate on a dedicated thread; the lock is held while it steps, so
+        # the event loop takes it before changing players or connections
+        self.threaded = threaded
+        self.lock = threading.RLock()
+        # ``time.monotonic()`` when the last connection left, ``None`` while
+        # somebody is connected; idle sessions are hibernated
+        self.idle_since: float | None = time.monotonic()
+        # Input journal, see :mod:`app.game.journal`; ``None`` when disabled
+        self.journal: InputJournal | None = None
+        if saved is not None:
+            for player_id, info in saved.loot_timers.items():
+                target = info.get("container") or info.get("shelf")
+                self.start_looting(player_id, target, info["ticks"])
+
+    @property
+    def tick(self) -> int:
+        """Number of simulation steps taken, used to version state deltas.
+
+        Stored on the state, as cooldown deadlines are ticks of this clock.
+        """
+
+        return self.state.tick
+
+    @tick.setter
+    def tick(self, value: int) -> None:
+        self.state.tick = value
+
+    def save(self) -> bytes:
+        """Return the session packed by :func:`pack_session`."""
+
+        with self.lock:
+            return pack_session(self)
 
-    def add_player(self, websocket: WebSocket) -> str:
+    @classmethod
+    def load(cls, blob: bytes) -> "GameSession":
+        """Continue a session from a blob returned by :meth:`save`."""
+
+        saved = unpack_session(blob)
+        return cls(vectorized=saved.vectorized, threaded=saved.threaded, saved=saved)
+
+    @property
+    def wall_grid(self) -> WallGrid:
+        """Return the occupancy grid for the current walls.
+
+        The grid is patched in place by :meth:`add_wall` and
+        :meth:`remove_wall`. It is only rebuilt when the wall list itself is
+        replaced or the world is resized.
+        """
+
+        grid = self._wall_grid
+        if (
+            self._grid_walls is not self.state.walls
+            or grid.width != self.state.width
+            or grid.height != self.state.height
+        ):
+            grid = WallGrid.from_walls(
+                self.state.width, self.state.height, self.state.walls
+            )
+            self._wall_grid = grid
+            self._grid_walls = self.state.walls
+        return grid
+
+    def _own_wall(self, wall: WallState) -> WallState:
+        """Return the session's private copy of ``wall`` for modification.
+
+        Walls cloned from a template are shared with other sessions. The
+        first change copies the wall and swaps the copy into the wall list
+        and any loot timer targeting it.
+        """
+
+        key = id(wall)
+        if key not in self._shared_walls:
+            return self._wall_copies.get(key, wall)
+        self._shared_walls.discard(key)
+        own = copy.copy(wall)
+        self._wall_copies[key] = own
+        walls = self.state.walls
+        for idx, existing in enumerate(walls):
+            if existing is wall:
+                walls[idx] = own
+                break
+        for info in self.loot_timers.values():
+            if info.get("shelf") is wall:
+                info["shelf"] = own
+        self.interactables.replace_shelf(wall, own)
+        return own
+
+    def add_wall(self, wall: WallState) -> None:
+        """Place a new wall segment such as a barricade."""
+
+        grid = self.wall_grid
+        self.state.walls.append(wall)
+        grid.add(wall)
+        self.static_revision += 1
+
+    def remove_wall(self, wall: WallState) -> None:
+        """Remove a destroyed wall segment from the world."""
+
+        wall = self._own_wall(wall)
+        grid = self.wall_grid
+        try:
+            self.state.walls.remove(wall)
+        except ValueError:
+            return
+        grid.remove(wall)
+        self.static_revision += 1
+        for pid, info in list(self.loot_timers.items()):
+            if info.get("shelf") is wall:
+                self.stop_looting(pid)
+
+    def damage_wall(self, wall: WallState, amount: int) -> bool:
+        """Apply ``amount`` damage to ``wall``.
+
+        Returns
+        -------
+        bool
+            ``True`` if the wall was destroyed.
+        """
+
+        wall = self._own_wall(wall)
+        wall.hp = max(0, wall.hp - amount)
+        wall.damage_flash_until = self.tick + 1 + WALL_DAMAGE_FLASH_TICKS
+        self.static_revision += 1
+        if wall.hp == 0:
+            self.remove_wall(wall)
+            return True
+        return False
+
+    def add_player(
+        self,
+        websocket: WebSocket,
+        sync: str = SYNC_FULL,
+        view: View | None = None,
+        player_id: str | None = None,
+    ) -> str:
         """Add a new player with a unique ID and store the WebSocket connection.
 
+        ``sync`` selects whether the connection receives the full state every
+        tick, a snapshot followed by per-tick deltas, or snapshots and deltas
+        limited to the entities near the player. ``view`` configures the
+        area of interest of ``SYNC_AOI`` connections and defaults to the
+        standard view radius. ``player_id`` reuses a known ID, such as one
+        recorded in a journal, instead of generating one.
+
         Returns
         -------
         str
-            The generated player ID.
+            The player ID.
         """
 
-        player_id = str(uuid4())
-        x, y = spawn_player(self.state.width, self.state.height, self.state.walls)
+        with self.lock:
+            return self._add_player(websocket, sync, view, player_id)
+
+    def _add_player(
+        self,
+        websocket: WebSocket,
+        sync: str,
+        view: View | None,
+        player_id: str | None,
+    ) -> str:
+        if player_id is None:
+            player_id = str(uuid4())
+        x, y = spawn_player(
+            self.state.width,
+            self.state.height,
+            self.state.walls,
+            self.wall_grid,
+            self.rng,
+        )
         self.state.players[player_id] = PlayerState(
             x=x,
             y=y,
@@ -69,82 +397,230 @@ class GameSession:
             facing_y=1.0,
         )
         self.connections[player_id] = websocket
+        self.idle_since = None
+        self.inputs[player_id] = InputQueue()
+        self.sync_modes[player_id] = sync
+        if sync == SYNC_AOI:
+            self.views[player_id] = view if view is not None else View()
+        if sync in (SYNC_DELTA, SYNC_AOI):
+            self.needs_snapshot.add(player_id)
+        if self.journal is not None:
+            self.journal.join(self.tick, player_id, sync, x, y)
         return player_id
 
     def remove_player(self, player_id: str) -> None:
         """Remove a player from the game if present and drop connection."""
 
-        self.state.players.pop(player_id, None)
-        self.connections.pop(player_id, None)
+        with self.lock:
+            self.stop_looting(player_id)
+            self.state.players.pop(player_id, None)
+            self.connections.pop(player_id, None)
+            self.sync_modes.pop(player_id, None)
+            self.needs_snapshot.discard(player_id)
+            self.views.pop(player_id, None)
+            self.inputs.pop(player_id, None)
+            self.encodings.pop(player_id, None)
+            self.acked_ticks.pop(player_id, None)
+            if not self.connections and self.idle_since is None:
+                self.idle_since = time.monotonic()
+            if self.journal is not None:
+                self.journal.leave(self.tick, player_id)
+        self.broadcaster.forget(player_id)
 
-    def update_world(self) -> None:
-        """Advance the game simulation one step."""
+    def remove_disconnected_players(self) -> List[str]:
+        """Remove every player without a connection and return their IDs.
 
-        update_zombies(
-            self.state.zombies,
-            list(self.state.players.values()),
-            self.state.walls,
+        A restored session brings back the players it was saved with, but
+        not their connections; clients that come back join as new players.
+        """
+
+        with self.lock:
+            gone = [pid for pid in self.state.players if pid not in self.connections]
+            for player_id in gone:
+                self.remove_player(player_id)
+        return gone
+
+    def set_encoding(self, player_id: str, encoding: str) -> None:
+        """Choose the wire encoding of ``player_id``'s state messages.
+
+        Raises
+        ------
+        RuntimeError
+            If ``encoding`` is ``msgpack`` and msgpack is not installed.
+        """
+
+        with self.lock:
+            if encoding == ENCODING_MSGPACK:
+                if self.codec is None:
+                    self.codec = BinaryCodec()
+                self.encodings[player_id] = encoding
+                # Handles released before now were never sent to this client
+                self.acked_ticks.setdefault(player_id, self.tick)
+            else:
+                self.encodings.pop(player_id, None)
+                self.acked_ticks.pop(player_id, None)
+
+    def acknowledge(self, player_id: str, tick: Any) -> None:
+        """Record that ``player_id`` applied the state message of ``tick``.
+
+        Handles of entities removed up to the oldest tick acknowledged by
+        every binary client can be reused. Ticks from the future, ticks
+        older than the last acknowledged one and non-integers are ignored.
+        """
+
+        if not isinstance(tick, int) or isinstance(tick, bool):
+            return
+        with self.lock:
+            acked = self.acked_ticks.get(player_id)
+            if acked is not None and acked < tick <= self.tick:
+                self.acked_ticks[player_id] = tick
+
+    def _sweep_handles(self) -> None:
+        """Release binary handles of gone entities and reuse acknowledged ones."""
+
+        state = self.state
+        live = set(state.players)
+        live.update(z.id for z in state.zombies)
+        live.update(w.id for w in state.walls)
+        live.update(c.id for c in state.containers)
+        handles = self.codec.handles
+        handles.release(live, self.tick)
+        acked = min(self.acked_ticks.values(), default=self.tick)
+        handles.reclaim(max(acked, self.tick - HANDLE_ACK_GRACE_TICKS))
+
+    def request_resync(self, player_id: str) -> None:
+        """Send ``player_id`` a full snapshot on the next broadcast."""
+
+        with self.lock:
+            if self.sync_modes.get(player_id) in (SYNC_DELTA, SYNC_AOI):
+                self.needs_snapshot.add(player_id)
+
+    def queue_input(self, player_id: str, data: Dict[str, Any]) -> bool:
+        """Queue an input from ``player_id`` for the next tick.
+
+        Returns ``False`` if the input was dropped by the rate limiter or
+        because the player is not connected.
+        """
+
+        queue = self.inputs.get(player_id)
+        if queue is None:
+            return False
+        return queue.push(data)
+
+    def _drain_inputs(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        for player_id, queue in list(self.inputs.items()):
+            if queue.pending:
+                for data in queue.drain():
+                    yield player_id, data
+
+    def apply_inputs(
+        self, inputs: Iterable[Tuple[str, Dict[str, Any]]] | None = None
+    ) -> None:
+        """Apply every queued input in arrival order, player by player.
+
+        Inputs may carry an increasing ``seq`` number. The highest one
+        applied is stored as the player's ``input_seq`` and broadcast with
+        the player, so a predicting client can drop acknowledged inputs and
+        replay the rest with :func:`app.game.world.move_player`. Each move is
+        its own step, so the client's replay of several moves sent within
+        one tick ends where the server's does.
+
+        ``inputs`` applies the given ``(player_id, input)`` pairs instead of
+        the queues, which is how :func:`app.game.journal.replay` feeds
+        recorded inputs. Applied inputs are recorded in the journal.
+        """
+
+        if inputs is None:
+            inputs = self._drain_inputs()
+        journal = self.journal
+        applied: List[Tuple[str, Dict[str, Any]]] = []
+        for player_id, data in inputs:
+            if journal is not None:
+                applied.append((player_id, data))
+            msg_type = data.get("type")
+            if msg_type == "craft_item":
+                self.craft_item(player_id, data.get("itemId", ""))
+            elif msg_type == "use_item":
+                self.use_item(player_id, data.get("itemId", ""))
+            else:
+                self.update_player_state(player_id, data)
+            seq = data.get("seq")
+            player = self.state.players.get(player_id)
+            if isinstance(seq, int) and player is not None:
+                player.input_seq = max(player.input_seq, seq)
+        if applied:
+            journal.inputs(self.tick, applied)
+
+    def update_world(
+        self, inputs: Iterable[Tuple[str, Dict[str, Any]]] | None = None
+    ) -> None:
+        """Advance the game simulation one step.
+
+        ``inputs`` replaces the queued inputs, see :meth:`apply_inputs`.
+        """
+
+        self.apply_inputs(inputs)
+        if (self.flow_field.width, self.flow_field.height) != (
             self.state.width,
             self.state.height,
-        )
-        for player in self.state.players.values():
-            if player.damage_cooldown > 0:
-                player.damage_cooldown -= 1
-        for zombie in self.state.zombies:
-            if zombie.attack_cooldown > 0:
-                zombie.attack_cooldown -= 1
-            for player in self.state.players.values():
-                dist = math.hypot(player.x - zombie.x, player.y - zombie.y)
-                if dist < 16 and zombie.attack_cooldown == 0:
-                    if player.damage_cooldown == 0:
-                        player.health = max(0, player.health - 1)
-                        player.damage_cooldown = 30
-                    zombie.attack_cooldown = 30
-
-        to_remove = []
-        for pid, info in list(self.loot_timers.items()):
-            target = info.get("container") or info.get("shelf")
-            player = self.state.players.get(pid)
-            if not player or target.opened:
-                to_remove.append(pid)
-                continue
-
-            if "container" in info:
-                in_range = (
-                    math.hypot(player.x - target.x, player.y - target.y)
-                    <= INTERACT_RANGE
+        ):
+            self.flow_field = type(self.flow_field)(self.state.width, self.state.height)
+            self.zombie_cells = CellCounts(self.state.width, self.state.height)
+        zombies = self.state.zombies
+        players = list(self.state.players.values())
+        if self.chunks is not None:
+            self.chunks.update(players, zombies, self.tick)
+        if self.zombie_arrays is not None:
+            # Moves zombies and decrements their cooldowns in one batch.
+            attackers = [
+                zombies[i]
+                for i in update_zombies_vectorized(
+                    self.zombie_arrays,
+                    zombies,
+                    players,
+                    self.state.width,
+                    self.state.height,
+                    self.flow_field,
+                    self.wall_grid,
+                    self.player_index,
+                    ZOMBIE_ATTACK_RANGE,
                 )
-            else:
-                in_range = _wall_distance(player.x, player.y, target) <= INTERACT_RANGE
+            ]
+        else:
+            update_zombies(
+                zombies,
+                players,
+                self.state.walls,
+                self.state.width,
+                self.state.height,
+                self.flow_field,
+                self.wall_grid,
+                self.player_index,
+                self.zombie_cells,
+            )
+            attackers = zombies
+        self.player_index.sync(players)
+        for zombie in attackers:
+            self._zombie_attack(zombie)
+        self.timers.advance(self.tick + 1)
+        self.tick += 1
+        if self.codec is not None and self.tick % HANDLE_SWEEP_TICKS == 0:
+            self._sweep_handles()
 
-            if not in_range:
-                to_remove.append(pid)
-                continue
+    def _zombie_attack(self, zombie) -> None:
+        """Let ``zombie`` hit a player within reach if its cooldown allows."""
 
-            info["ticks"] -= 1
-            if info["ticks"] <= 0:
-                if "container" in info:
-                    target.opened = True
-                    target.item = random.choice(CONTAINER_LOOT)
-                    item = target.item
-                    if item:
-                        player.inventory[item] = player.inventory.get(item, 0) + 1
-                else:
-                    if not target.opened:
-                        if random.random() < SHELF_LOOT_CHANCE:
-                            target.item = random.choice(CRAFTING_MATERIALS)
-                        target.opened = True
-                        if target.item:
-                            item = target.item
-                            player.inventory[item] = player.inventory.get(item, 0) + 1
-                to_remove.append(pid)
-
-        for pid in to_remove:
-            self.loot_timers.pop(pid, None)
-
-        self.state.loot_progress = {
-            pid: info["ticks"] for pid, info in self.loot_timers.items()
-        }
+        # Cooldowns end at the end of a step; this step ends at ``now``
+        now = self.tick + 1
+        for player in self.player_index.query_radius(
+            zombie.x, zombie.y, ZOMBIE_ATTACK_RANGE
+        ):
+            dist = math.hypot(player.x - zombie.x, player.y - zombie.y)
+            if dist < ZOMBIE_ATTACK_RANGE and zombie.attack_cooldown_until <= now:
+                if player.damage_cooldown_until <= now:
+                    player.health = max(0, player.health - 1)
+                    player.damage_cooldown_until = now + ATTACK_COOLDOWN_TICKS
+                zombie.attack_cooldown_until = now + ATTACK_COOLDOWN_TICKS
 
     def update_player_state(self, player_id: str, input_data: Dict[str, Any]) -> None:
         """Update the player's state using the received input."""
@@ -156,61 +632,40 @@ class GameSession:
         # Movement can be expressed either as a single direction string or as
         # explicit deltas. Support both formats so older clients continue to
         # work while newer clients can send more granular values.
-        speed = 2
         if input_data.get("action") == "move":
             if player.health <= 0:
                 return
-            dx = dy = 0.0
-            if "moveX" in input_data or "moveY" in input_data:
-                dx = float(input_data.get("moveX", 0))
-                dy = float(input_data.get("moveY", 0))
-            else:
-                direction = input_data.get("direction")
-                if direction == "left":
-                    dx = -speed
-                elif direction == "right":
-                    dx = speed
-                elif direction == "up":
-                    dy = -speed
-                elif direction == "down":
-                    dy = speed
-
-            new_x = player.x + dx
-            new_y = player.y + dy
-
-            if 0 <= new_x <= self.state.width and not _collides(
-                new_x, player.y, self.state.walls
-            ):
-                player.x = new_x
-            if 0 <= new_y <= self.state.height and not _collides(
-                player.x, new_y, self.state.walls
-            ):
-                player.y = new_y
+            dx, dy = move_vector(input_data)
+            player.x, player.y = move_player(
+                player.x,
+                player.y,
+                dx,
+                dy,
+                self.state.width,
+                self.state.height,
+                self.wall_grid,
+            )
+            # Players only move here, so walking away cancels looting here
+            info = self.loot_timers.get(player_id)
+            if info is not None and not _in_loot_range(player, info):
+                self.stop_looting(player_id)
         elif input_data.get("action") == "start_looting":
+            index = self.index_interactables()
             cid = input_data.get("containerId")
             if cid:
-                for c in self.state.containers:
-                    if c.id == cid and not c.opened:
-                        dist = math.hypot(player.x - c.x, player.y - c.y)
-                        if dist <= INTERACT_RANGE:
-                            self.loot_timers[player_id] = {
-                                "container": c,
-                                "ticks": LOOT_TICKS,
-                            }
-                        break
+                c = index.container(cid)
+                if (
+                    c is not None
+                    and not c.opened
+                    and math.hypot(player.x - c.x, player.y - c.y) <= INTERACT_RANGE
+                ):
+                    self.start_looting(player_id, c)
             else:
-                for w in self.state.walls:
-                    if (
-                        not w.opened
-                        and _wall_distance(player.x, player.y, w) <= INTERACT_RANGE
-                    ):
-                        self.loot_timers[player_id] = {
-                            "shelf": w,
-                            "ticks": LOOT_TICKS,
-                        }
-                        break
+                target = index.nearest(player.x, player.y, INTERACT_RANGE)
+                if target is not None:
+                    self.start_looting(player_id, target)
         elif input_data.get("action") == "cancel_looting":
-            self.loot_timers.pop(player_id, None)
+            self.stop_looting(player_id)
 
         facing_x = input_data.get("facingX")
         facing_y = input_data.get("facingY")
@@ -218,6 +673,71 @@ class GameSession:
             player.facing_x = float(facing_x)
             player.facing_y = float(facing_y)
 
+    def index_interactables(self) -> InteractableIndex:
+        """Return the interactables index, rebuilt if the layout changed."""
+
+        grid = self.wall_grid
+        state = self.state
+        self.interactables.sync(
+            state.walls,
+            state.containers,
+            (id(grid), grid.version, len(state.containers)),
+        )
+        return self.interactables
+
+    def start_looting(
+        self, player_id: str, target: Any, ticks: int = LOOT_TICKS
+    ) -> None:
+        """Let ``player_id`` loot a container or shelf ``target``.
+
+        Looting finishes at the end of the ``ticks``-th step from now,
+        counting a step in progress, unless the player walks out of range,
+        cancels or somebody else opens the target first.
+        """
+
+        self.stop_looting(player_id)
+        key = "shelf" if isinstance(target, WallState) else "container"
+        due = self.tick + ticks
+        self.loot_timers[player_id] = {
+            key: target,
+            "due": due,
+            "timer": self.timers.schedule(due, self._finish_looting, player_id),
+        }
+        self.state.loot_due[player_id] = due
+
+    def stop_looting(self, player_id: str) -> None:
+        """Cancel ``player_id``'s looting, if any."""
+
+        info = self.loot_timers.pop(player_id, None)
+        if info is not None:
+            self.timers.cancel(info["timer"])
+            self.state.loot_due.pop(player_id, None)
+
+    def _finish_looting(self, player_id: str) -> None:
+        info = self.loot_timers.pop(player_id)
+        self.state.loot_due.pop(player_id, None)
+        player = self.state.players.get(player_id)
+        looted = target = info.get("container") or info.get("shelf")
+        if player is None or target.opened or not _in_loot_range(player, info):
+            return
+        if "container" in info:
+            target.opened = True
+            target.item = self.rng.choice(CONTAINER_LOOT)
+        else:
+            target = self._own_wall(target)
+            if self.rng.random() < SHELF_LOOT_CHANCE:
+                target.item = self.rng.choice(CRAFTING_MATERIALS)
+            target.opened = True
+        self.static_revision += 1
+        item = target.item
+        if item:
+            player.inventory[item] = player.inventory.get(item, 0) + 1
+        # Others looting the same target would find it empty
+        for other, other_info in list(self.loot_timers.items()):
+            other_target = other_info.get("container") or other_info.get("shelf")
+            if other_target is looted or other_target is target:
+                self.stop_looting(other)
+
     def craft_item(self, player_id: str, item_id: str) -> None:
         """Attempt to craft ``item_id`` for the specified player."""
 
@@ -243,6 +763,104 @@ class GameSession:
 
         return self.state
 
+    def state_messages(
+        self, player_ids: Iterable[str] | None = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """Return the state message each connection should receive this tick.
+
+        Full-state clients share one dump of the world. Delta clients share
+        one delta, except those waiting for a snapshot after joining or
+        asking for a resync. Area of interest clients get their own message
+        cut from the same delta. ``player_ids`` limits the result to the
+        given connections and defaults to all of them.
+        """
+
+        if player_ids is None:
+            player_ids = list(self.connections)
+        messages: Dict[str, Dict[str, Any]] = {}
+        full = delta = snapshot = None
+        indexed = False
+        for player_id in player_ids:
+            mode = self.sync_modes.get(player_id)
+            if mode == SYNC_AOI:
+                if delta is None:
+                    delta = self._delta()
+                if not indexed:
+                    grid = self.wall_grid
+                    self.interest.sync(self.state, (id(grid), grid.version))
+                    indexed = True
+                messages[player_id] = self._view_message(player_id, delta)
+            elif mode != SYNC_DELTA:
+                if full is None:
+                    full = state_to_dict(self.state)
+                messages[player_id] = full
+            elif player_id in self.needs_snapshot:
+                if delta is None:
+                    delta = self._delta()
+                if snapshot is None:
+                    snapshot = snapshot_message(self.state, self.tick)
+                messages[player_id] = snapshot
+                self.needs_snapshot.discard(player_id)
+            else:
+                if delta is None:
+                    delta = self._delta()
+                messages[player_id] = delta
+        return messages
+
+    def _delta(self) -> Dict[str, Any]:
+        grid = self.wall_grid
+        version = (id(grid), grid.version, self.static_revision)
+        return self.sync.delta(self.state, self.tick, static_version=version)
+
+    def _view_message(self, player_id: str, delta: Dict[str, Any]) -> Dict[str, Any]:
+        """Return the area of interest message for ``player_id``.
+
+        The view follows the player and stays put while the player is dead
+        or otherwise missing from the state.
+        """
+
+        view = self.views[player_id]
+        player = self.state.players.get(player_id)
+        x, y = (player.x, player.y) if player is not None else (view.x, view.y)
+        if player_id in self.needs_snapshot:
+            self.needs_snapshot.discard(player_id)
+            return view.snapshot(self.interest, self.sync, x, y, self.tick)
+        return view.delta(self.interest, self.sync, delta, x, y, self.tick)
+
+    async def broadcast_state(self) -> None:
+        """Send the current state to every connection."""
+
+        await self.broadcaster.broadcast(self)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Return tick timing and broadcast counters for this session."""
+
+        return {
+            "tick": self.tick,
+            "players": len(self.state.players),
+            "zombies": len(self.state.zombies),
+            "connections": len(self.connections),
+            "timing": self.tick_metrics.to_dict(),
+            "chunks": self.chunks.to_dict() if self.chunks else None,
+            "journal": self.journal.to_dict() if self.journal else None,
+            "inputs": {
+                "received": sum(q.received for q in self.inputs.values()),
+                "dropped": sum(q.dropped for q in self.inputs.values()),
+                "merged": sum(q.merged for q in self.inputs.values()),
+            },
+            "interest": {
+                "views": len(self.views),
+                "spawned": sum(v.spawned for v in self.views.values()),
+                "despawned": sum(v.despawned for v in self.views.values()),
+            },
+            "broadcast": {
+                "sent": self.broadcaster.messages_sent,
+                "skipped": self.broadcaster.messages_skipped,
+                "dropped": self.broadcaster.connections_dropped,
+                "latency": self.broadcaster.latency(),
+            },
+        }
+
     def get_connections(self) -> Dict[str, WebSocket]:
         """Return the current active websocket connections."""
 
@@ -255,18 +873,269 @@ class GameManager:
     def __init__(self) -> None:
         # Map of game_id -> GameSession
         self.game_sessions: Dict[str, GameSession] = {}
+        # Pre-generated worlds cloned by new sessions
+        self.templates = TemplatePool()
+        # Event loop lag, sampled while the application runs
+        self.loop_monitor = LoopMonitor()
+        # Directory idle sessions are hibernated to, see
+        # :mod:`app.game.lifecycle`; ``None`` keeps every session in memory
+        self.store: SessionStore | None = None
+        self.sessions_hibernated = 0
+        self.sessions_restored = 0
+        self.sessions_expired = 0
+        # Saves deleted because they could not be unpacked
+        self.saves_dropped = 0
+        # Tick at which each session was last written to the store, so
+        # checkpoints skip sessions that did not change
+        self.saved_ticks: Dict[str, int] = {}
+        # Saves packed on the event loop and not yet written by
+        # :meth:`write_saves`, and the checkpoint index to write with them
+        self.unsaved: Dict[str, bytes] = {}
+        self._unsaved_index: Tuple[str, List[str]] | None = None
+        self._unsaved_lock = threading.Lock()
+        # Held while writing so two writer threads never race on one file
+        self._write_lock = threading.Lock()
+        self.checkpoints = 0
+        self.checkpoint_ms = 0.0
+        # Directory new sessions journal their inputs to, see
+        # :mod:`app.game.journal`; ``None`` disables journaling
+        self.journal_dir: str | None = None
+        # Session creation latency
+        self.sessions_created = 0
+        self.creation_ms_total = 0.0
+        self.creation_ms_max = 0.0
 
-    def create_game_session(self) -> str:
-        """Create a new ``GameSession`` and return its ID."""
+    def create_game_session(
+        self,
+        vectorized: bool = False,
+        seed: int | None = None,
+        chunked: bool = False,
+        game_id: str | None = None,
+        threaded: bool = False,
+    ) -> str:
+        """Create a new ``GameSession`` and return its ID.
+
+        ``game_id`` lets a caller that already picked the ID, such as the
+        front process in multi-process mode, reuse it.
+        """
 
-        game_id = str(uuid4())
-        self.game_sessions[game_id] = GameSession()
+        start = time.perf_counter()
+        if game_id is None:
+            game_id = str(uuid4())
+        if chunked:
+            session = GameSession(seed=seed, chunked=True, threaded=threaded)
+        else:
+            template = self.templates.take(seed=seed)
+            session = GameSession(
+                vectorized=vectorized, template=template, threaded=threaded
+            )
+        self.game_sessions[game_id] = session
+        if self.journal_dir is not None:
+            path = journal_path(self.journal_dir, game_id)
+            if path is not None:
+                session.journal = InputJournal.create(path, session)
+        ms = (time.perf_counter() - start) * 1000
+        self.sessions_created += 1
+        self.creation_ms_total += ms
+        self.creation_ms_max = max(self.creation_ms_max, ms)
         return game_id
 
-    def get_session(self, game_id: str) -> Optional[GameSession]:
-        """Return the session matching ``game_id`` if it exists."""
+    def get_metrics(self) -> Dict[str, Any]:
+        """Return session creation latency and world template pool counters."""
+
+        created = self.sessions_created
+        return {
+            "sessions": len(self.game_sessions),
+            "creation": {
+                "sessions_created": created,
+                "mean_ms": self.creation_ms_total / created if created else 0.0,
+                "max_ms": self.creation_ms_max,
+            },
+            "templates": self.templates.to_dict(),
+            "loop": self.loop_monitor.to_dict(),
+            "lifecycle": {
+                "idle": sum(
+                    1 for s in self.game_sessions.values() if not s.connections
+                ),
+                "hibernated": self.sessions_hibernated,
+                "restored": self.sessions_restored,
+                "expired": self.sessions_expired,
+                "dropped": self.saves_dropped,
+                "checkpoints": self.checkpoints,
+                "checkpoint_ms": self.checkpoint_ms,
+            },
+        }
+
+    def get_session(
+        self, game_id: str, restore: bool = True
+    ) -> Optional[GameSession]:
+        """Return the session matching ``game_id`` if it exists.
+
+        A hibernated session is restored from the store first unless
+        ``restore`` is false. A save that cannot be unpacked is logged and
+        deleted, and ``None`` returned. The save is read on the calling
+        thread; the event loop uses :meth:`load_session` instead.
+        """
+
+        session = self.game_sessions.get(game_id)
+        if session is None and restore and self.store is not None:
+            blob = self.unsaved.get(game_id) or self.store.load(game_id)
+            if blob is not None:
+                loaded = self._unpack(game_id, blob)
+                if loaded is not None:
+                    session = self._restored(game_id, loaded)
+        return session
+
+    async def load_session(self, game_id: str) -> Optional[GameSession]:
+        """Return the session matching ``game_id``, restoring it if needed.
+
+        Like :meth:`get_session`, but the save is read and unpacked on a
+        worker thread so the event loop keeps ticking other sessions.
+        """
+
+        session = self.game_sessions.get(game_id)
+        if session is not None or self.store is None:
+            return session
+        blob = self.unsaved.get(game_id)
+        if blob is None:
+            blob = await asyncio.to_thread(self.store.load, game_id)
+        if blob is None:
+            return None
+        loaded = await asyncio.to_thread(self._unpack, game_id, blob)
+        # Another connection may have restored the session meanwhile
+        session = self.game_sessions.get(game_id)
+        if session is None and loaded is not None:
+            session = self._restored(game_id, loaded)
+        return session
+
+    def _unpack(self, game_id: str, blob: bytes) -> Optional[GameSession]:
+        """Return the session saved in ``blob``, deleting it if unreadable."""
+
+        try:
+            return GameSession.load(blob)
+        except ValueError as exc:
+            logger.warning("dropping unreadable save of %s: %s", game_id, exc)
+            with self._unsaved_lock:
+                if self.unsaved.get(game_id) is blob:
+                    del self.unsaved[game_id]
+            with self._write_lock:
+                self.store.delete(game_id)
+            self.saves_dropped += 1
+            return None
+
+    def _restored(self, game_id: str, session: GameSession) -> GameSession:
+        """Register a session loaded from its save under ``game_id``."""
+
+        if self.journal_dir is not None:
+            path = journal_path(self.journal_dir, game_id)
+            if path is not None:
+                session.journal = InputJournal.resume(path, session)
+        session.remove_disconnected_players()
+        self.game_sessions[game_id] = session
+        self.saved_ticks[game_id] = session.tick
+        self.sessions_restored += 1
+        return session
+
+    def hibernate(self, game_id: str, write: bool = True) -> bool:
+        """Save an idle session to the store and drop it from memory.
+
+        With ``write`` false the session is only packed and its save is
+        left for :meth:`write_saves`, so the caller can do the disk I/O off
+        the event loop. Returns ``False`` if the session does not exist,
+        has connections or there is no store.
+        """
+
+        session = self.game_sessions.get(game_id)
+        if session is None or session.connections or self.store is None:
+            return False
+        if self.saved_ticks.get(game_id) != session.tick:
+            with self._unsaved_lock:
+                self.unsaved[game_id] = session.save()
+        if session.journal is not None:
+            session.journal.close(session)
+        del self.game_sessions[game_id]
+        self.saved_ticks.pop(game_id, None)
+        self.sessions_hibernated += 1
+        if write:
+            self.write_saves()
+        return True
+
+    def checkpoint(self, index: str = CHECKPOINT_INDEX, write: bool = True) -> int:
+        """Save every session that changed since its last save.
+
+        The IDs of all sessions in memory are written to the store's
+        ``index`` so :meth:`restore_checkpoint` can bring them back after a
+        restart. With ``write`` false the sessions are only packed, see
+        :meth:`hibernate`; ``checkpoint_ms`` then measures the time spent on
+        the event loop. Returns the number of sessions packed.
+        """
+
+        if self.store is None:
+            return 0
+        start = time.perf_counter()
+        packed = 0
+        for game_id, session in list(self.game_sessions.items()):
+            tick = session.tick
+            if self.saved_ticks.get(game_id) != tick:
+                blob = session.save()
+                with self._unsaved_lock:
+                    self.unsaved[game_id] = blob
+                self.saved_ticks[game_id] = tick
+                packed += 1
+        with self._unsaved_lock:
+            self._unsaved_index = (index, list(self.game_sessions))
+        self.checkpoints += 1
+        self.checkpoint_ms = (time.perf_counter() - start) * 1000
+        if write:
+            self.write_saves()
+        return packed
+
+    def write_saves(self) -> int:
+        """Write the saves packed by :meth:`checkpoint` and :meth:`hibernate`.
+
+        Safe to call from a worker thread, which is how the lifecycle tasks
+        keep disk writes and fsyncs off the event loop. A save replaced by a
+        newer one while it was being written stays queued. Returns the
+        number of saves written.
+        """
+
+        if self.store is None:
+            return 0
+        with self._write_lock:
+            with self._unsaved_lock:
+                saves = list(self.unsaved.items())
+                index, self._unsaved_index = self._unsaved_index, None
+            for game_id, blob in saves:
+                self.store.save(game_id, blob)
+                with self._unsaved_lock:
+                    if self.unsaved.get(game_id) is blob:
+                        del self.unsaved[game_id]
+            if index is not None:
+                self.store.save_index(*index)
+        return len(saves)
+
+    def restore_checkpoint(self, index: str = CHECKPOINT_INDEX) -> int:
+        """Load the sessions listed in the store's ``index``.
+
+        Returns the number of sessions restored. Missing saves are skipped
+        and unreadable ones deleted, see :meth:`get_session`.
+        """
+
+        if self.store is None:
+            return 0
+        restored = 0
+        for game_id in self.store.load_index(index):
+            if game_id in self.game_sessions:
+                continue
+            restored += self.get_session(game_id) is not None
+        return restored
+
+    def close_journals(self) -> None:
+        """Record a state digest in every journal and flush it."""
 
-        return self.game_sessions.get(game_id)
+        for session in list(self.game_sessions.values()):
+            if session.journal is not None:
+                session.journal.close(session)
 
     def get_all_sessions(self) -> Dict[str, GameSession]:
         """Return all active game sessions."""
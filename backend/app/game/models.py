@@ -1,12 +1,25 @@
-"""Pydantic models describing the authoritative world state."""
+"""Plain state objects describing the authoritative world state.
+
+The simulation mutates these objects many times per tick so they are slotted
+dataclasses rather than Pydantic models: attribute writes are plain stores and
+instances carry no per-instance ``__dict__``. Validation and wire conversion
+live in :mod:`app.game.schema`.
+
+Cooldowns and timers are stored as the tick at which they end rather than
+counted down every tick; see :mod:`app.game.timers`. The wire format carries
+the remaining ticks, derived from ``GameState.tick`` when serializing.
+"""
 
 from __future__ import annotations
 
+from dataclasses import dataclass, field
 from typing import Dict, List, Optional
 from uuid import uuid4
-from pydantic import Field
 
-from pydantic import BaseModel
+
+def _new_id() -> str:
+    return str(uuid4())
+
 
 # ---------------------------------------------------------------------------
 # Item definitions
@@ -47,6 +60,9 @@ ITEM_IDS = [
 # Wall definitions
 # ---------------------------------------------------------------------------
 
+# Width and height in pixels of a single wall segment / grid cell.
+SEGMENT_SIZE = 40
+
 WALL_MATERIALS = {
     "steel": {"hp": 30},
     "wood": {"hp": 20},
@@ -54,16 +70,19 @@ WALL_MATERIALS = {
 }
 
 
-class WallState(BaseModel):
+@dataclass(slots=True, kw_only=True)
+class WallState:
     """State for a single wall segment."""
 
+    id: str = field(default_factory=_new_id)
     x: float
     y: float
     size: int
     material: str
     hp: int
     max_hp: int
-    damage_timer: int = 0
+    # Tick at which the damage flash ends
+    damage_flash_until: int = 0
     opened: bool = False
     item: Optional[str] = None
 
@@ -75,9 +94,11 @@ class WallState(BaseModel):
 ZOMBIE_MAX_HEALTH = 2
 
 
-class ZombieState(BaseModel):
+@dataclass(slots=True, kw_only=True)
+class ZombieState:
     """State for an AI controlled zombie."""
 
+    id: str = field(default_factory=_new_id)
     x: float
     y: float
     facing_x: float = 0.0
@@ -88,7 +109,8 @@ class ZombieState(BaseModel):
     wander_angle: float = 0.0
     wander_timer: int = 0
     health: int = ZOMBIE_MAX_HEALTH
-    attack_cooldown: int = 0
+    # Tick from which the zombie may attack again
+    attack_cooldown_until: int = 0
     variant: str = "normal"
 
 
@@ -99,7 +121,8 @@ class ZombieState(BaseModel):
 PLAYER_MAX_HEALTH = 10
 
 
-class PlayerAbilities(BaseModel):
+@dataclass(slots=True, kw_only=True)
+class PlayerAbilities:
     fireball: bool = False
     fireballLevel: int = 0
     fireOrb: bool = False
@@ -108,7 +131,8 @@ class PlayerAbilities(BaseModel):
     phoenixRevivalLevel: int = 0
 
 
-class PlayerState(BaseModel):
+@dataclass(slots=True, kw_only=True)
+class PlayerState:
     """State for a single connected player."""
 
     x: float
@@ -117,15 +141,18 @@ class PlayerState(BaseModel):
     facing_y: float = 0.0
     speed: float = 2.0
     health: int = PLAYER_MAX_HEALTH
-    damage_cooldown: int = 0
+    # Tick from which the player can be damaged again
+    damage_cooldown_until: int = 0
     weapon: Optional[str] = None
-    swing_timer: int = 0
-    abilities: PlayerAbilities = PlayerAbilities()
+    swing_until: int = 0
+    abilities: PlayerAbilities = field(default_factory=PlayerAbilities)
     fire_mutation_points: int = 0
-    phoenix_cooldown: int = 0
-    damage_buff_timer: int = 0
+    phoenix_cooldown_until: int = 0
+    damage_buff_until: int = 0
     damage_buff_mult: float = 1.0
-    inventory: Dict[str, int] = Field(default_factory=dict)
+    inventory: Dict[str, int] = field(default_factory=dict)
+    # Highest input sequence number applied, echoed for client prediction
+    input_seq: int = 0
 
 
 # ---------------------------------------------------------------------------
@@ -148,10 +175,11 @@ CRAFTING_MATERIALS = [
 SHELF_LOOT_CHANCE = 0.2
 
 
-class ContainerState(BaseModel):
+@dataclass(slots=True, kw_only=True)
+class ContainerState:
     """Lootable container such as a cardboard box."""
 
-    id: str = Field(default_factory=lambda: str(uuid4()))
+    id: str = field(default_factory=_new_id)
     x: float
     y: float
     opened: bool = False
@@ -159,7 +187,8 @@ class ContainerState(BaseModel):
     type: str = "cardboard_box"
 
 
-class DoorState(BaseModel):
+@dataclass(slots=True, kw_only=True)
+class DoorState:
     """Simple spawn door descriptor."""
 
     x: float
@@ -170,16 +199,23 @@ class DoorState(BaseModel):
 # Game state container
 # ---------------------------------------------------------------------------
 
+# Default world size in pixels
+WORLD_WIDTH = 2400
+WORLD_HEIGHT = 1600
+
 
-class GameState(BaseModel):
+@dataclass(slots=True, kw_only=True)
+class GameState:
     """Container for the entire game world state."""
 
-    players: Dict[str, PlayerState] = {}
-    zombies: List[ZombieState] = []
-    walls: List[WallState] = []
-    containers: List[ContainerState] = []
+    players: Dict[str, PlayerState] = field(default_factory=dict)
+    zombies: List[ZombieState] = field(default_factory=list)
+    walls: List[WallState] = field(default_factory=list)
+    containers: List[ContainerState] = field(default_factory=list)
     door: DoorState | None = None
-    width: int = 2400
-    height: int = 1600
-    # Remaining loot timer ticks for each player
-    loot_progress: Dict[str, int] = Field(default_factory=dict)
+    width: int = WORLD_WIDTH
+    height: int = WORLD_HEIGHT
+    # Tick at which each looting player finishes, sent as ``loot_progress``
+    loot_due: Dict[str, int] = field(default_factory=dict)
+    # Simulation steps taken; the clock cooldown deadlines refer to
+    tick: int = 0
@@ -0,0 +1,610 @@
+"""Compact binary saves of whole game sessions.
+
+:func:`pack_session` records everything a session needs to continue later:
+world size, seed, tick and random generator state, every wall, zombie,
+container and player, running loot timers and, for chunked worlds, the
+loaded chunks and the blobs of evicted ones. Entities are fixed size
+``struct`` records. Strings such as ids and item names are stored once in a
+table and referenced by index, and the body is compressed with zlib like
+the chunk blobs of :mod:`app.game.chunks`. A header carries a format
+version so a save written by another version of the format is rejected
+instead of misread.
+
+:class:`SessionStore` keeps saves as files in a local directory. Files are
+written to a temporary name, flushed to disk and renamed over the previous
+save, so a crash leaves either the old or the new save, never a torn one.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import struct
+import time
+import zlib
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .chunks import ChunkedWorld, chunk_of
+from .models import (
+    ContainerState,
+    DoorState,
+    GameState,
+    PlayerAbilities,
+    PlayerState,
+    WallState,
+    ZombieState,
+)
+from .timers import remaining
+
+MAGIC = b"ZGSV"
+SAVE_VERSION = 1
+# zlib level of saves; positions are nearly incompressible doubles, so higher
+# levels cost twice the time for a percent or two of size
+COMPRESSION_LEVEL = 1
+# File name suffix of saved sessions in a ``SessionStore``
+SAVE_SUFFIX = ".session"
+# File name suffix of lists of game IDs, such as the sessions in memory at
+# the last checkpoint
+INDEX_SUFFIX = ".index"
+# Index written by in-process checkpoints
+CHECKPOINT_INDEX = "live"
+
+_HEADER = struct.Struct("<4sH")
+# seed, tick, width, height, flags, has door, door x, door y
+_SESSION = struct.Struct("<QqIIBBdd")
+# strings, walls, zombies, containers, players, loot timers
+_COUNTS = struct.Struct("<IIIIII")
+_STRING = struct.Struct("<H")
+# Mersenne Twister words and position, then whether a gauss value is cached
+_RNG = struct.Struct("<625I")
+_GAUSS = struct.Struct("<Bd")
+# id, x, y, size, material, hp, max hp, damage timer, opened, item
+_WALL = struct.Struct("<IddHIiiiBI")
+# id, x, y, facing, triggered, has dest, dest, idle timer, wander angle,
+# wander timer, health, attack cooldown, variant
+_ZOMBIE = struct.Struct("<IddddBBddidiiiI")
+# id, x, y, opened, item, type
+_CONTAINER = struct.Struct("<IddBII")
+# id, x, y, facing, speed, health, damage cooldown, weapon, swing timer,
+# fire mutation points, phoenix cooldown, damage buff timer, damage buff
+# multiplier, input seq, ability flags, ability levels, inventory entries
+_PLAYER = struct.Struct("<IdddddiiIiiiidqBiiiH")
+# item, count
+_ITEM = struct.Struct("<Ii")
+# player, target kind, target index, ticks
+_LOOT = struct.Struct("<IBIi")
+# home chunk, generated, restored, evictions, loaded chunks, evicted chunks
+_CHUNKS = struct.Struct("<iiIIIII")
+_CHUNK = struct.Struct("<ii")
+_BLOB = struct.Struct("<iiI")
+
+_NONE = 0xFFFFFFFF
+_CHUNKED, _VECTORIZED, _THREADED = 1, 2, 4
+_FIREBALL, _FIRE_ORB, _PHOENIX = 1, 2, 4
+_LOOT_CONTAINER, _LOOT_SHELF = 0, 1
+
+
+@dataclass(slots=True)
+class SavedSession:
+    """Everything :func:`unpack_session` recovers from a save.
+
+    ``loot_timers`` map each looting player to its target, already pointing
+    at the restored walls and containers, and the ``ticks`` left. ``chunks``
+    is a ready :class:`ChunkedWorld` for chunked worlds.
+    """
+
+    state: GameState
+    seed: int
+    tick: int
+    rng_state: Tuple[Any, ...]
+    loot_timers: Dict[str, Dict[str, Any]]
+    chunks: Optional[ChunkedWorld] = None
+    vectorized: bool = False
+    threaded: bool = False
+
+
+def pack_session(session: Any) -> bytes:
+    """Serialize ``session``, a :class:`GameSession`, to a compressed blob.
+
+    Connections, sync and interest bookkeeping are not saved; clients join
+    a restored session afresh.
+    """
+
+    strings: List[str] = []
+    index: Dict[str, int] = {}
+
+    def ref(value: Optional[str]) -> int:
+        if value is None:
+            return _NONE
+        idx = index.get(value)
+        if idx is None:
+            idx = index[value] = len(strings)
+            strings.append(value)
+        return idx
+
+    state = session.state
+    tick = session.tick
+    body = bytearray()
+    wall_index: Dict[int, int] = {}
+    for idx, w in enumerate(state.walls):
+        wall_index[id(w)] = idx
+        body += _WALL.pack(
+            ref(w.id),
+            w.x,
+            w.y,
+            w.size,
+            ref(w.material),
+            w.hp,
+            w.max_hp,
+            remaining(w.damage_flash_until, tick),
+            w.opened,
+            ref(w.item),
+        )
+    for z in state.zombies:
+        dest = z.dest
+        body += _ZOMBIE.pack(
+            ref(z.id),
+            z.x,
+            z.y,
+            z.facing_x,
+            z.facing_y,
+            z.triggered,
+            dest is not None,
+            dest["x"] if dest is not None else 0.0,
+            dest["y"] if dest is not None else 0.0,
+            z.idle_timer,
+            z.wander_angle,
+            z.wander_timer,
+            z.health,
+            remaining(z.attack_cooldown_until, tick),
+            ref(z.variant),
+        )
+    container_index: Dict[int, int] = {}
+    for idx, c in enumerate(state.containers):
+        container_index[id(c)] = idx
+        body += _CONTAINER.pack(
+            ref(c.id), c.x, c.y, c.opened, ref(c.item), ref(c.type)
+        )
+    for player_id, p in state.players.items():
+        a = p.abilities
+        flags = (
+            (_FIREBALL if a.fireball else 0)
+            | (_FIRE_ORB if a.fireOrb else 0)
+            | (_PHOENIX if a.phoenixRevival else 0)
+        )
+        body += _PLAYER.pack(
+            ref(player_id),
+            p.x,
+            p.y,
+            p.facing_x,
+            p.facing_y,
+            p.speed,
+            p.health,
+            remaining(p.damage_cooldown_until, tick),
+            ref(p.weapon),
+            remaining(p.swing_until, tick),
+            p.fire_mutation_points,
+            remaining(p.phoenix_cooldown_until, tick),
+            remaining(p.damage_buff_until, tick),
+            p.damage_buff_mult,
+            p.input_seq,
+            flags,
+            a.fireballLevel,
+            a.fireOrbLevel,
+            a.phoenixRevivalLevel,
+            len(p.inventory),
+        )
+        for item, count in p.inventory.items():
+            body += _ITEM.pack(ref(item), count)
+    timers = []
+    for player_id, info in session.loot_timers.items():
+        if "container" in info:
+            target = container_index.get(id(info["container"]))
+            kind = _LOOT_CONTAINER
+        else:
+            target = wall_index.get(id(info["shelf"]))
+            kind = _LOOT_SHELF
+        if target is not None:
+            ticks = remaining(info["due"], tick)
+            timers.append(_LOOT.pack(ref(player_id), kind, target, ticks))
+    for record in timers:
+        body += record
+
+    chunks = session.chunks
+    if chunks is not None:
+        body += _CHUNKS.pack(
+            *chunks.home,
+            chunks.generated,
+            chunks.restored,
+            chunks.evictions,
+            len(chunks.loaded),
+            len(chunks.evicted),
+        )
+        for chunk in sorted(chunks.loaded):
+            body += _CHUNK.pack(*chunk)
+        for chunk, blob in chunks.evicted.items():
+            body += _BLOB.pack(*chunk, len(blob))
+            body += blob
+
+    flags = (
+        (_CHUNKED if chunks is not None else 0)
+        | (_VECTORIZED if session.zombie_arrays is not None else 0)
+        | (_THREADED if session.threaded else 0)
+    )
+    door = state.door
+    head = bytearray(
+        _SESSION.pack(
+            session.seed,
+            session.tick,
+            state.width,
+            state.height,
+            flags,
+            door is not None,
+            door.x if door is not None else 0.0,
+            door.y if door is not None else 0.0,
+        )
+    )
+    _, words, gauss = session.rng.getstate()
+    head += _RNG.pack(*words)
+    head += _GAUSS.pack(gauss is not None, gauss or 0.0)
+    head += _COUNTS.pack(
+        len(strings),
+        len(state.walls),
+        len(state.zombies),
+        len(state.containers),
+        len(state.players),
+        len(timers),
+    )
+    for value in strings:
+        encoded = value.encode()
+        head += _STRING.pack(len(encoded))
+        head += encoded
+    data = zlib.compress(bytes(head + body), COMPRESSION_LEVEL)
+    return _HEADER.pack(MAGIC, SAVE_VERSION) + data
+
+
+def unpack_session(blob: bytes) -> SavedSession:
+    """Rebuild the session state stored by :func:`pack_session`.
+
+    Raises
+    ------
+    ValueError
+        If ``blob`` is not a saved session, uses another format version or
+        is truncated or corrupt.
+    """
+
+    try:
+        return _unpack_session(blob)
+    except (zlib.error, struct.error, IndexError, KeyError) as exc:
+        raise ValueError(f"corrupt saved session: {exc}") from exc
+
+
+def _unpack_session(blob: bytes) -> SavedSession:
+    if len(blob) < _HEADER.size:
+        raise ValueError("not a saved session")
+    magic, version = _HEADER.unpack_from(blob)
+    if magic != MAGIC:
+        raise ValueError("not a saved session")
+    if version != SAVE_VERSION:
+        raise ValueError(f"unsupported save version {version}")
+    data = zlib.decompress(blob[_HEADER.size :])
+
+    seed, tick, width, height, flags, has_door, door_x, door_y = (
+        _SESSION.unpack_from(data)
+    )
+    offset = _SESSION.size
+    words = _RNG.unpack_from(data, offset)
+    offset += _RNG.size
+    has_gauss, gauss = _GAUSS.unpack_from(data, offset)
+    offset += _GAUSS.size
+    rng_state = (3, words, gauss if has_gauss else None)
+    n_strings, n_walls, n_zombies, n_containers, n_players, n_timers = (
+        _COUNTS.unpack_from(data, offset)
+    )
+    offset += _COUNTS.size
+    strings: List[str] = []
+    for _ in range(n_strings):
+        (length,) = _STRING.unpack_from(data, offset)
+        offset += _STRING.size
+        strings.append(data[offset : offset + length].decode())
+        offset += length
+
+    def deref(idx: int) -> Optional[str]:
+        return None if idx == _NONE else strings[idx]
+
+    def until(ticks: int) -> int:
+        return tick + ticks if ticks else 0
+
+    state = GameState(players={}, width=width, height=height, tick=tick)
+    if has_door:
+        state.door = DoorState(x=door_x, y=door_y)
+    walls = state.walls
+    for values in _WALL.iter_unpack(data[offset : offset + n_walls * _WALL.size]):
+        wid, x, y, size, material, hp, max_hp, damage_timer, opened, item = values
+        walls.append(
+            WallState(
+                id=strings[wid],
+                x=x,
+                y=y,
+                size=size,
+                material=strings[material],
+                hp=hp,
+                max_hp=max_hp,
+                damage_flash_until=until(damage_timer),
+                opened=bool(opened),
+                item=deref(item),
+            )
+        )
+    offset += n_walls * _WALL.size
+    zombies = state.zombies
+    end = offset + n_zombies * _ZOMBIE.size
+    for values in _ZOMBIE.iter_unpack(data[offset:end]):
+        (
+            zid,
+            x,
+            y,
+            facing_x,
+            facing_y,
+            triggered,
+            has_dest,
+            dest_x,
+            dest_y,
+            idle_timer,
+            wander_angle,
+            wander_timer,
+            health,
+            attack_cooldown,
+            variant,
+        ) = values
+        zombies.append(
+            ZombieState(
+                id=strings[zid],
+                x=x,
+                y=y,
+                facing_x=facing_x,
+                facing_y=facing_y,
+                triggered=bool(triggered),
+                dest={"x": dest_x, "y": dest_y} if has_dest else None,
+                idle_timer=idle_timer,
+                wander_angle=wander_angle,
+                wander_timer=wander_timer,
+                health=health,
+                attack_cooldown_until=until(attack_cooldown),
+                variant=strings[variant],
+            )
+        )
+    offset = end
+    end = offset + n_containers * _CONTAINER.size
+    for cid, x, y, opened, item, kind in _CONTAINER.iter_unpack(data[offset:end]):
+        state.containers.append(
+            ContainerState(
+                id=strings[cid],
+                x=x,
+                y=y,
+                opened=bool(opened),
+                item=deref(item),
+                type=strings[kind],
+            )
+        )
+    offset = end
+    for _ in range(n_players):
+        (
+            pid,
+            x,
+            y,
+            facing_x,
+            facing_y,
+            speed,
+            health,
+            damage_cooldown,
+            weapon,
+            swing_timer,
+            fire_mutation_points,
+            phoenix_cooldown,
+            damage_buff_timer,
+            damage_buff_mult,
+            input_seq,
+            ability_flags,
+            fireball_level,
+            fire_orb_level,
+            phoenix_level,
+            n_items,
+        ) = _PLAYER.unpack_from(data, offset)
+        offset += _PLAYER.size
+        inventory = {}
+        for _ in range(n_items):
+            item, count = _ITEM.unpack_from(data, offset)
+            offset += _ITEM.size
+            inventory[strings[item]] = count
+        state.players[strings[pid]] = PlayerState(
+            x=x,
+            y=y,
+            facing_x=facing_x,
+            facing_y=facing_y,
+            speed=speed,
+            health=health,
+            damage_cooldown_until=until(damage_cooldown),
+            weapon=deref(weapon),
+            swing_until=until(swing_timer),
+            abilities=PlayerAbilities(
+                fireball=bool(ability_flags & _FIREBALL),
+                fireballLevel=fireball_level,
+                fireOrb=bool(ability_flags & _FIRE_ORB),
+                fireOrbLevel=fire_orb_level,
+                phoenixRevival=bool(ability_flags & _PHOENIX),
+                phoenixRevivalLevel=phoenix_level,
+            ),
+            fire_mutation_points=fire_mutation_points,
+            phoenix_cooldown_until=until(phoenix_cooldown),
+            damage_buff_until=until(damage_buff_timer),
+            damage_buff_mult=damage_buff_mult,
+            inventory=inventory,
+            input_seq=input_seq,
+        )
+    loot_timers: Dict[str, Dict[str, Any]] = {}
+    for _ in range(n_timers):
+        pid, kind, target, ticks = _LOOT.unpack_from(data, offset)
+        offset += _LOOT.size
+        if kind == _LOOT_CONTAINER:
+            loot_timers[strings[pid]] = {
+                "container": state.containers[target],
+                "ticks": ticks,
+            }
+        else:
+            loot_timers[strings[pid]] = {"shelf": walls[target], "ticks": ticks}
+
+    chunks = None
+    if flags & _CHUNKED:
+        home_x, home_y, generated, restored, evictions, n_loaded, n_evicted = (
+            _CHUNKS.unpack_from(data, offset)
+        )
+        offset += _CHUNKS.size
+        chunks = ChunkedWorld(width, height, seed, walls, state.containers)
+        chunks.home = (home_x, home_y)
+        chunks.generated = generated
+        chunks.restored = restored
+        chunks.evictions = evictions
+        for _ in range(n_loaded):
+            chunks.loaded.add(_CHUNK.unpack_from(data, offset))
+            offset += _CHUNK.size
+        for _ in range(n_evicted):
+            cx, cy, length = _BLOB.unpack_from(data, offset)
+            offset += _BLOB.size
+            chunks.keep((cx, cy), data[offset : offset + length])
+            offset += length
+        by_chunk: Dict[Tuple[int, int], List[WallState]] = defaultdict(list)
+        for wall in walls:
+            by_chunk[chunk_of(wall.x, wall.y)].append(wall)
+        for chunk in chunks.loaded:
+            chunks.grid.load_chunk(chunk, by_chunk.get(chunk, ()))
+
+    return SavedSession(
+        state=state,
+        seed=seed,
+        tick=tick,
+        rng_state=rng_state,
+        loot_timers=loot_timers,
+        chunks=chunks,
+        vectorized=bool(flags & _VECTORIZED),
+        threaded=bool(flags & _THREADED),
+    )
+
+
+# Game IDs accepted as file names; anything else is never looked up on disk
+_GAME_ID = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+class SessionStore:
+    """Saved sessions kept as one file per game ID in ``directory``."""
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, game_id: str) -> Optional[str]:
+        """Return the file of ``game_id``, or ``None`` for unsafe IDs."""
+
+        if not _GAME_ID.match(game_id):
+            return None
+        return os.path.join(self.directory, game_id + SAVE_SUFFIX)
+
+    def save(self, game_id: str, blob: bytes) -> None:
+        """Write ``blob`` atomically, replacing any earlier save."""
+
+        path = self.path(game_id)
+        if path is None:
+            raise ValueError(f"invalid game ID {game_id!r}")
+        self._write(path, blob)
+
+    @staticmethod
+    def _write(path: str, data: bytes) -> None:
+        partial = path + ".tmp"
+        with open(partial, "wb") as fh:
+            fh.write(data)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(partial, path)
+
+    def load(self, game_id: str) -> Optional[bytes]:
+        """Return the save of ``game_id`` or ``None`` if there is none."""
+
+        path = self.path(game_id)
+        if path is None:
+            return None
+        try:
+            with open(path, "rb") as fh:
+                return fh.read()
+        except FileNotFoundError:
+            return None
+
+    def save_index(self, name: str, game_ids: List[str]) -> None:
+        """Atomically write the list ``game_ids`` under ``name``."""
+
+        if not _GAME_ID.match(name):
+            raise ValueError(f"invalid index name {name!r}")
+        path = os.path.join(self.directory, name + INDEX_SUFFIX)
+        self._write(path, "\n".join(game_ids).encode())
+
+    def load_index(self, name: str) -> List[str]:
+        """Return the game IDs written by :meth:`save_index`, if any."""
+
+        if not _GAME_ID.match(name):
+            return []
+        try:
+            with open(os.path.join(self.directory, name + INDEX_SUFFIX)) as fh:
+                return fh.read().split()
+        except FileNotFoundError:
+            return []
+
+    def delete(self, game_id: str) -> None:
+        """Remove the save of ``game_id`` if there is one."""
+
+        path = self.path(game_id)
+        if path is not None:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def game_ids(self) -> List[str]:
+        """Return the IDs of every saved session."""
+
+        return sorted(
+            name[: -len(SAVE_SUFFIX)]
+            for name in os.listdir(self.directory)
+            if name.endswith(SAVE_SUFFIX)
+        )
+
+    def expire(
+        self,
+        ttl: float,
+        now: Optional[float] = None,
+        keep: Iterable[str] = (),
+    ) -> List[str]:
+        """Delete saves written more than ``ttl`` seconds ago.
+
+        Saves of the game IDs in ``keep``, such as sessions still in memory,
+        are never deleted.
+
+        Returns
+        -------
+        list[str]
+            The game IDs that were deleted.
+        """
+
+        now = time.time() if now is None else now
+        keep = set(keep)
+        expired = []
+        for game_id in self.game_ids():
+            path = self.path(game_id)
+            if path is None or game_id in keep:
+                continue
+            try:
+                if now - os.path.getmtime(path) > ttl:
+                    os.remove(path)
+                    expired.append(game_id)
+            except FileNotFoundError:
+                continue
+        return expired
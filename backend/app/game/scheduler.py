@@ -0,0 +1,328 @@
+"""Fixed timestep scheduling of game sessions on the asyncio event loop.
+
+Sessions normally step on the event loop itself. A ``threaded`` session
+steps, builds and encodes its state messages on a dedicated
+:class:`SessionThread` instead and only hands the encoded messages back to
+the loop for sending, so a heavy simulation delays socket I/O by at most
+the time the interpreter lock is held rather than a whole tick.
+:class:`LoopMonitor` measures that delay.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Any, Deque, Dict, Iterable, Tuple
+
+if TYPE_CHECKING:  # pragma: no cover - imported for type hints only
+    from .manager import GameManager, GameSession
+
+TICK_RATE = 60
+TICK_INTERVAL = 1 / TICK_RATE
+# Simulation steps a session may run back to back to catch up after a stall.
+# Any further backlog is dropped so a slow session cannot spiral.
+MAX_CATCH_UP_TICKS = 5
+# Upper bounds in milliseconds of the tick duration histogram buckets
+HISTOGRAM_BUCKETS_MS: Tuple[float, ...] = (0.5, 1, 2, 4, 8, 16, 32, 64)
+# Most recent tick durations kept for percentiles
+TICK_SAMPLES = 1000
+# Seconds between event loop lag probes
+LAG_PROBE_INTERVAL = 0.01
+# Most recent lag probes kept for percentiles
+LAG_SAMPLES = 1000
+
+
+def percentiles(samples: Iterable[float]) -> Dict[str, float]:
+    """Return the median, 95th and 99th percentile of ``samples``."""
+
+    values = sorted(samples)
+    result = {}
+    for name, fraction in (("p50_ms", 0.5), ("p95_ms", 0.95), ("p99_ms", 0.99)):
+        if values:
+            result[name] = values[min(len(values) - 1, int(fraction * len(values)))]
+        else:
+            result[name] = 0.0
+    return result
+
+
+class TickMetrics:
+    """Tick duration histogram and overrun counters for one session."""
+
+    def __init__(self, buckets_ms: Tuple[float, ...] = HISTOGRAM_BUCKETS_MS) -> None:
+        self.buckets_ms = buckets_ms
+        # One extra bucket collects durations above the largest bound
+        self.histogram = [0] * (len(buckets_ms) + 1)
+        self.ticks = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.recent_ms: Deque[float] = deque(maxlen=TICK_SAMPLES)
+        self.overruns = 0
+        self.skipped_ticks = 0
+
+    def record_tick(self, duration: float) -> None:
+        """Record one simulation step that took ``duration`` seconds."""
+
+        ms = duration * 1000
+        self.ticks += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        self.recent_ms.append(ms)
+        for idx, bound in enumerate(self.buckets_ms):
+            if ms <= bound:
+                self.histogram[idx] += 1
+                break
+        else:
+            self.histogram[-1] += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        labels = [f"<={bound}" for bound in self.buckets_ms]
+        labels.append(f">{self.buckets_ms[-1]}")
+        return {
+            "ticks": self.ticks,
+            "mean_ms": self.total_ms / self.ticks if self.ticks else 0.0,
+            "max_ms": self.max_ms,
+            **percentiles(self.recent_ms),
+            "overruns": self.overruns,
+            "skipped_ticks": self.skipped_ticks,
+            "histogram_ms": dict(zip(labels, self.histogram)),
+        }
+
+
+async def run_session(
+    session: "GameSession",
+    tick_interval: float = TICK_INTERVAL,
+    max_catch_up: int = MAX_CATCH_UP_TICKS,
+) -> None:
+    """Tick ``session`` at a fixed rate until cancelled.
+
+    Elapsed wall time is added to an accumulator and the simulation advances
+    in whole ``tick_interval`` steps, so the tick rate does not drift as the
+    per-tick work grows. The state is broadcast once after the steps of each
+    frame. A frame whose work exceeds ``tick_interval`` counts as an overrun;
+    when more than ``max_catch_up`` steps are owed the extra ones are skipped
+    and counted.
+    """
+
+    metrics = session.tick_metrics
+    loop = asyncio.get_running_loop()
+    previous = loop.time()
+    accumulator = tick_interval
+    while True:
+        frame_start = time.perf_counter()
+        steps = 0
+        while accumulator >= tick_interval and steps < max_catch_up:
+            start = time.perf_counter()
+            session.update_world()
+            metrics.record_tick(time.perf_counter() - start)
+            accumulator -= tick_interval
+            steps += 1
+        if accumulator >= tick_interval:
+            skipped = int(accumulator // tick_interval)
+            metrics.skipped_ticks += skipped
+            accumulator -= skipped * tick_interval
+        if steps:
+            await session.broadcast_state()
+        if time.perf_counter() - frame_start > tick_interval:
+            metrics.overruns += 1
+
+        await asyncio.sleep(max(0.0, tick_interval - accumulator))
+        now = loop.time()
+        accumulator += now - previous
+        previous = now
+
+
+class SessionThread(threading.Thread):
+    """Step one session at a fixed rate on its own thread.
+
+    The loop mirrors :func:`run_session`: steps, state messages and their
+    encoding run with ``session.lock`` held, then the encoded messages are
+    passed to the event loop, which only writes them to the sockets.
+    """
+
+    def __init__(
+        self,
+        session: "GameSession",
+        loop: asyncio.AbstractEventLoop,
+        tick_interval: float = TICK_INTERVAL,
+        max_catch_up: int = MAX_CATCH_UP_TICKS,
+    ) -> None:
+        super().__init__(name="session", daemon=True)
+        self.session = session
+        self.loop = loop
+        self.tick_interval = tick_interval
+        self.max_catch_up = max_catch_up
+        self.stopped = threading.Event()
+
+    def stop(self) -> None:
+        """Ask the thread to exit after its current frame."""
+
+        self.stopped.set()
+
+    def run(self) -> None:
+        session = self.session
+        metrics = session.tick_metrics
+        tick_interval = self.tick_interval
+        previous = time.perf_counter()
+        accumulator = tick_interval
+        while not self.stopped.is_set():
+            frame_start = time.perf_counter()
+            steps = 0
+            encoded = None
+            with session.lock:
+                while accumulator >= tick_interval and steps < self.max_catch_up:
+                    start = time.perf_counter()
+                    session.update_world()
+                    metrics.record_tick(time.perf_counter() - start)
+                    accumulator -= tick_interval
+                    steps += 1
+                if accumulator >= tick_interval:
+                    skipped = int(accumulator // tick_interval)
+                    metrics.skipped_ticks += skipped
+                    accumulator -= skipped * tick_interval
+                if steps:
+                    started = time.perf_counter()
+                    messages = session.state_messages()
+                    encoded = session.broadcaster.encode(session, messages)
+            if encoded:
+                try:
+                    self.loop.call_soon_threadsafe(
+                        session.broadcaster.deliver, session, encoded, started
+                    )
+                except RuntimeError:  # the event loop was closed
+                    return
+            if time.perf_counter() - frame_start > tick_interval:
+                metrics.overruns += 1
+
+            self.stopped.wait(max(0.0, tick_interval - accumulator))
+            now = time.perf_counter()
+            accumulator += now - previous
+            previous = now
+
+
+async def run_session_threaded(
+    session: "GameSession",
+    tick_interval: float = TICK_INTERVAL,
+    max_catch_up: int = MAX_CATCH_UP_TICKS,
+) -> None:
+    """Run ``session`` on a :class:`SessionThread` until cancelled.
+
+    Returns only once the thread has exited, so a new runner never steps
+    the session alongside it.
+    """
+
+    thread = SessionThread(
+        session, asyncio.get_running_loop(), tick_interval, max_catch_up
+    )
+    thread.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        thread.stop()
+        await asyncio.to_thread(thread.join)
+
+
+class LoopMonitor:
+    """Sample how late the event loop wakes a sleeping task.
+
+    The lag of a short sleep is the time any socket read or write would
+    have waited behind other work on the loop, such as simulation steps.
+    """
+
+    def __init__(
+        self, interval: float = LAG_PROBE_INTERVAL, samples: int = LAG_SAMPLES
+    ) -> None:
+        self.interval = interval
+        self.lags_ms: Deque[float] = deque(maxlen=samples)
+        self.max_ms = 0.0
+
+    def record(self, lag: float) -> None:
+        """Record one probe that woke ``lag`` seconds late."""
+
+        ms = max(0.0, lag * 1000)
+        self.lags_ms.append(ms)
+        self.max_ms = max(self.max_ms, ms)
+
+    async def run(self) -> None:
+        """Probe the running loop until cancelled."""
+
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.record(loop.time() - start - self.interval)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "samples": len(self.lags_ms),
+            **percentiles(self.lags_ms),
+            "max_ms": self.max_ms,
+        }
+
+
+class SessionScheduler:
+    """Run every session of a :class:`GameManager` as its own asyncio task.
+
+    A lightweight supervisor loop starts a task for each session with
+    connections and cancels the task once the session has none left or was
+    removed from the manager, so empty sessions do not tick. Threaded
+    sessions get a task that owns their :class:`SessionThread`.
+    """
+
+    def __init__(
+        self,
+        manager: "GameManager",
+        tick_interval: float = TICK_INTERVAL,
+        max_catch_up: int = MAX_CATCH_UP_TICKS,
+    ) -> None:
+        self.manager = manager
+        self.tick_interval = tick_interval
+        self.max_catch_up = max_catch_up
+        self.tasks: Dict[str, asyncio.Task] = {}
+        # Cancelled tasks that have not finished yet, such as a threaded
+        # runner waiting for its thread to exit
+        self.stopping: Dict[str, asyncio.Task] = {}
+
+    def sync_tasks(self) -> None:
+        """Start tasks for played sessions and stop tasks of the others.
+
+        A session whose previous task is still stopping gets its new task
+        on a later call, so two tasks never step one session.
+        """
+
+        for game_id, task in list(self.stopping.items()):
+            if task.done():
+                del self.stopping[game_id]
+        sessions = self.manager.get_all_sessions()
+        for game_id, session in sessions.items():
+            if (
+                session.connections
+                and game_id not in self.tasks
+                and game_id not in self.stopping
+            ):
+                runner = run_session_threaded if session.threaded else run_session
+                self.tasks[game_id] = asyncio.create_task(
+                    runner(session, self.tick_interval, self.max_catch_up)
+                )
+        for game_id in list(self.tasks):
+            session = sessions.get(game_id)
+            if session is None or not session.connections:
+                task = self.tasks.pop(game_id)
+                task.cancel()
+                self.stopping[game_id] = task
+
+    async def run(self) -> None:
+        """Supervise session tasks until cancelled."""
+
+        try:
+            while True:
+                self.sync_tasks()
+                await asyncio.sleep(self.tick_interval)
+        finally:
+            tasks = [*self.tasks.values(), *self.stopping.values()]
+            for task in tasks:
+                task.cancel()
+            self.tasks.clear()
+            self.stopping.clear()
+            await asyncio.gather(*tasks, return_exceptions=True)
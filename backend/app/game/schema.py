@@ -0,0 +1,218 @@
+"""Pydantic wire schema of the game state and fast converters.
+
+The simulation works on the slotted objects in :mod:`app.game.models`. The
+Pydantic models here document the same data as it appears on the wire and
+check that the converters stay in step with it. Outgoing state is built by the
+``*_to_dict`` helpers, which read attributes directly and avoid any per-field
+validation. Cooldowns are stored as deadline ticks and sent as the ticks
+remaining at the ``tick`` passed to the helpers.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel
+
+from .models import (
+    ContainerState,
+    DoorState,
+    GameState,
+    PlayerAbilities,
+    PlayerState,
+    WallState,
+    ZombieState,
+)
+from .timers import remaining
+
+
+class WallSchema(BaseModel):
+    id: str
+    x: float
+    y: float
+    size: int
+    material: str
+    hp: int
+    max_hp: int
+    damage_timer: int = 0
+    opened: bool = False
+    item: Optional[str] = None
+
+
+class ZombieSchema(BaseModel):
+    id: str
+    x: float
+    y: float
+    facing_x: float = 0.0
+    facing_y: float = 1.0
+    triggered: bool = False
+    dest: Optional[Dict[str, float]] = None
+    idle_timer: int = 0
+    wander_angle: float = 0.0
+    wander_timer: int = 0
+    health: int
+    attack_cooldown: int = 0
+    variant: str = "normal"
+
+
+class PlayerAbilitiesSchema(BaseModel):
+    fireball: bool = False
+    fireballLevel: int = 0
+    fireOrb: bool = False
+    fireOrbLevel: int = 0
+    phoenixRevival: bool = False
+    phoenixRevivalLevel: int = 0
+
+
+class PlayerSchema(BaseModel):
+    x: float
+    y: float
+    facing_x: float = 1.0
+    facing_y: float = 0.0
+    speed: float = 2.0
+    health: int
+    damage_cooldown: int = 0
+    weapon: Optional[str] = None
+    swing_timer: int = 0
+    abilities: PlayerAbilitiesSchema = PlayerAbilitiesSchema()
+    fire_mutation_points: int = 0
+    phoenix_cooldown: int = 0
+    damage_buff_timer: int = 0
+    damage_buff_mult: float = 1.0
+    inventory: Dict[str, int] = {}
+    input_seq: int = 0
+
+
+class ContainerSchema(BaseModel):
+    id: str
+    x: float
+    y: float
+    opened: bool = False
+    item: Optional[str] = None
+    type: str = "cardboard_box"
+
+
+class DoorSchema(BaseModel):
+    x: float
+    y: float
+
+
+class GameStateSchema(BaseModel):
+    players: Dict[str, PlayerSchema] = {}
+    zombies: List[ZombieSchema] = []
+    walls: List[WallSchema] = []
+    containers: List[ContainerSchema] = []
+    door: Optional[DoorSchema] = None
+    width: int = 2400
+    height: int = 1600
+    loot_progress: Dict[str, int] = {}
+
+
+def wall_to_dict(wall: WallState, tick: int) -> Dict[str, Any]:
+    return {
+        "id": wall.id,
+        "x": wall.x,
+        "y": wall.y,
+        "size": wall.size,
+        "material": wall.material,
+        "hp": wall.hp,
+        "max_hp": wall.max_hp,
+        "damage_timer": remaining(wall.damage_flash_until, tick),
+        "opened": wall.opened,
+        "item": wall.item,
+    }
+
+
+def zombie_to_dict(zombie: ZombieState, tick: int) -> Dict[str, Any]:
+    return {
+        "id": zombie.id,
+        "x": zombie.x,
+        "y": zombie.y,
+        "facing_x": zombie.facing_x,
+        "facing_y": zombie.facing_y,
+        "triggered": zombie.triggered,
+        # ``dest`` is replaced, never mutated, so sharing it is safe
+        "dest": zombie.dest,
+        "idle_timer": zombie.idle_timer,
+        "wander_angle": zombie.wander_angle,
+        "wander_timer": zombie.wander_timer,
+        "health": zombie.health,
+        "attack_cooldown": remaining(zombie.attack_cooldown_until, tick),
+        "variant": zombie.variant,
+    }
+
+
+def abilities_to_dict(abilities: PlayerAbilities) -> Dict[str, Any]:
+    return {
+        "fireball": abilities.fireball,
+        "fireballLevel": abilities.fireballLevel,
+        "fireOrb": abilities.fireOrb,
+        "fireOrbLevel": abilities.fireOrbLevel,
+        "phoenixRevival": abilities.phoenixRevival,
+        "phoenixRevivalLevel": abilities.phoenixRevivalLevel,
+    }
+
+
+def player_to_dict(player: PlayerState, tick: int) -> Dict[str, Any]:
+    return {
+        "x": player.x,
+        "y": player.y,
+        "facing_x": player.facing_x,
+        "facing_y": player.facing_y,
+        "speed": player.speed,
+        "health": player.health,
+        "damage_cooldown": remaining(player.damage_cooldown_until, tick),
+        "weapon": player.weapon,
+        "swing_timer": remaining(player.swing_until, tick),
+        "abilities": abilities_to_dict(player.abilities),
+        "fire_mutation_points": player.fire_mutation_points,
+        "phoenix_cooldown": remaining(player.phoenix_cooldown_until, tick),
+        "damage_buff_timer": remaining(player.damage_buff_until, tick),
+        "damage_buff_mult": player.damage_buff_mult,
+        "inventory": dict(player.inventory),
+        "input_seq": player.input_seq,
+    }
+
+
+def container_to_dict(container: ContainerState) -> Dict[str, Any]:
+    return {
+        "id": container.id,
+        "x": container.x,
+        "y": container.y,
+        "opened": container.opened,
+        "item": container.item,
+        "type": container.type,
+    }
+
+
+def door_to_dict(door: Optional[DoorState]) -> Optional[Dict[str, Any]]:
+    if door is None:
+        return None
+    return {"x": door.x, "y": door.y}
+
+
+def state_to_dict(state: GameState) -> Dict[str, Any]:
+    """Return the wire representation of ``state``.
+
+    The result matches ``GameStateSchema`` and shares no mutable containers
+    with the simulation, so it can be encoded after the next tick started.
+    """
+
+    tick = state.tick
+    return {
+        "players": {pid: player_to_dict(p, tick) for pid, p in state.players.items()},
+        "zombies": [zombie_to_dict(z, tick) for z in state.zombies],
+        "walls": [wall_to_dict(w, tick) for w in state.walls],
+        "containers": [container_to_dict(c) for c in state.containers],
+        "door": door_to_dict(state.door),
+        "width": state.width,
+        "height": state.height,
+        "loot_progress": loot_progress(state.loot_due, tick),
+    }
+
+
+def loot_progress(loot_due: Dict[str, int], tick: int) -> Dict[str, int]:
+    """Return the loot ticks each player has left at ``tick``."""
+
+    return {pid: remaining(due, tick) for pid, due in loot_due.items()}
+
@@ -0,0 +1,542 @@
+"""Run game sessions in worker processes behind one front process.
+
+In multi-process mode (``GAME_WORKERS=N``) the process serving HTTP and
+WebSocket traffic owns no sessions. A :class:`ShardRouter` starts ``N``
+worker processes, each running its own :class:`GameManager` and
+:class:`SessionScheduler` on its own event loop and core. Game IDs are
+placed on workers with a :class:`HashRing`, so every request for a game
+reaches the worker that owns it without a shared registry.
+
+The front and each worker talk over a duplex ``multiprocessing`` pipe. The
+front forwards raw client frames; the worker decodes them, runs the session
+and sends back encoded state messages, which the front writes to the real
+sockets. Inside a worker each client is represented by a
+:class:`RemoteSocket`, so sessions and broadcasting run unchanged.
+
+Messages from the front to a worker::
+
+    ("create", request_id, options)       -> reply {"gameId", "seed"}
+    ("join", request_id, conn_id, game_id, params)  -> reply player ID or None
+    ("message", conn_id, text, data)
+    ("resync", conn_id)
+    ("leave", conn_id)
+    ("metrics", request_id, game_id)      -> reply metrics or None
+    ("stop",)
+
+Messages from a worker to the front::
+
+    ("reply", request_id, payload)
+    ("state", conn_id, text_or_bytes)    state broadcast, may be coalesced
+    ("send", conn_id, text_or_bytes)     welcome or reply, always delivered
+    ("close", conn_id)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import bisect
+import hashlib
+import itertools
+import multiprocessing
+import threading
+from collections import deque
+from multiprocessing.connection import Connection
+from typing import Any, Deque, Dict, List, Mapping, Optional, Tuple
+from uuid import uuid4
+
+from .broadcast import encode_message
+from .connection import decode, dispatch, join
+from .journal import JournalFlusher, journal_dir
+from .lifecycle import Checkpointer, SessionReaper, session_store
+from .manager import GameManager, GameSession
+from .scheduler import SessionScheduler
+
+# Points each worker gets on the hash ring; more points spread games evenly
+RING_REPLICAS = 64
+# Seconds the front waits for a worker to answer a request
+REQUEST_TIMEOUT = 10.0
+# Seconds a worker gets to exit on shutdown before it is terminated
+STOP_TIMEOUT = 2.0
+
+# Router used by the API routes, set by the application lifespan when
+# multi-process mode is enabled
+router: "ShardRouter | None" = None
+
+
+def _hash(key: str) -> int:
+    digest = hashlib.blake2b(key.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+class HashRing:
+    """Consistent hash ring mapping keys to node names.
+
+    Every node owns ``replicas`` points on the ring and a key belongs to the
+    node owning the first point at or after the key's hash. Adding or
+    removing a node only moves the keys next to that node's points.
+    """
+
+    def __init__(self, nodes: Tuple[str, ...] = (), replicas: int = RING_REPLICAS):
+        self.replicas = replicas
+        self._points: List[int] = []
+        self._owners: Dict[int, str] = {}
+        for node in nodes:
+            self.add(node)
+
+    def __len__(self) -> int:
+        return len(set(self._owners.values()))
+
+    def add(self, node: str) -> None:
+        for idx in range(self.replicas):
+            point = _hash(f"{node}#{idx}")
+            if point not in self._owners:
+                bisect.insort(self._points, point)
+                self._owners[point] = node
+
+    def remove(self, node: str) -> None:
+        self._points = [p for p in self._points if self._owners[p] != node]
+        self._owners = {p: self._owners[p] for p in self._points}
+
+    def node_for(self, key: str) -> str:
+        """Return the node owning ``key``.
+
+        Raises
+        ------
+        LookupError
+            If the ring has no nodes.
+        """
+
+        if not self._points:
+            raise LookupError("hash ring is empty")
+        idx = bisect.bisect_left(self._points, _hash(key)) % len(self._points)
+        return self._owners[self._points[idx]]
+
+
+# ---------------------------------------------------------------------------
+# Worker process
+# ---------------------------------------------------------------------------
+
+
+class RemoteSocket:
+    """Stand-in for a client WebSocket inside a worker process.
+
+    Everything sent is forwarded to the front process, which writes it to
+    the real socket. Only the broadcaster writes text and bytes, so those
+    are forwarded as state messages the front may skip for a stalled
+    client.
+    """
+
+    def __init__(self, conn: Connection, conn_id: str) -> None:
+        self.conn = conn
+        self.conn_id = conn_id
+
+    async def send_text(self, text: str) -> None:
+        self.conn.send(("state", self.conn_id, text))
+
+    async def send_bytes(self, data: bytes) -> None:
+        self.conn.send(("state", self.conn_id, data))
+
+    async def send_json(self, message: Dict[str, Any]) -> None:
+        self.conn.send(("send", self.conn_id, encode_message(message)))
+
+    async def close(self) -> None:
+        self.conn.send(("close", self.conn_id))
+
+
+class ShardWorker:
+    """Sessions of one worker process and the handlers for front messages."""
+
+    def __init__(self, conn: Connection) -> None:
+        self.conn = conn
+        self.manager = GameManager()
+        self.manager.store = session_store()
+        self.manager.journal_dir = journal_dir()
+        # Session and player of every connection served by this worker
+        self.players: Dict[str, Tuple[GameSession, str]] = {}
+        self._stopped = asyncio.Event()
+
+    async def serve(self) -> None:
+        """Tick sessions and handle front messages until told to stop."""
+
+        # Each worker keeps its own checkpoint index; with the same number of
+        # workers the hash ring gives it the same games after a restart.
+        index = multiprocessing.current_process().name
+        self.manager.restore_checkpoint(index)
+        loop = asyncio.get_running_loop()
+        reader = threading.Thread(target=self._read, args=(loop,), daemon=True)
+        reader.start()
+        tasks = [
+            asyncio.create_task(SessionScheduler(self.manager).run()),
+            asyncio.create_task(self.manager.templates.run()),
+            asyncio.create_task(self.manager.loop_monitor.run()),
+            asyncio.create_task(SessionReaper(self.manager).run()),
+            asyncio.create_task(Checkpointer(self.manager, index=index).run()),
+            asyncio.create_task(JournalFlusher(self.manager).run()),
+        ]
+        try:
+            await self._stopped.wait()
+        finally:
+            for task in tasks:
+                task.cancel()
+            self.manager.checkpoint(index)
+            self.manager.close_journals()
+
+    def _read(self, loop: asyncio.AbstractEventLoop) -> None:
+        while True:
+            try:
+                message = self.conn.recv()
+            except (EOFError, OSError):
+                message = ("stop",)
+            loop.call_soon_threadsafe(self.handle, message)
+            if message[0] == "stop":
+                return
+
+    def handle(self, message: Tuple[Any, ...]) -> None:
+        """Apply one message from the front process."""
+
+        kind = message[0]
+        if kind == "message":
+            _, conn_id, text, data = message
+            self._input(conn_id, text, data)
+        elif kind == "resync":
+            entry = self.players.get(message[1])
+            if entry is not None:
+                entry[0].request_resync(entry[1])
+        elif kind == "leave":
+            entry = self.players.pop(message[1], None)
+            if entry is not None:
+                entry[0].remove_player(entry[1])
+        elif kind == "create":
+            _, request_id, options = message
+            self.conn.send(("reply", request_id, self._create(options)))
+        elif kind == "join":
+            _, request_id, conn_id, game_id, params = message
+            self.conn.send(("reply", request_id, self._join(conn_id, game_id, params)))
+        elif kind == "metrics":
+            _, request_id, game_id = message
+            self.conn.send(("reply", request_id, self._metrics(game_id)))
+        elif kind == "stop":
+            self._stopped.set()
+
+    def _create(self, options: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            game_id = self.manager.create_game_session(**options)
+        except (RuntimeError, ValueError) as exc:
+            return {"error": str(exc)}
+        return {"gameId": game_id, "seed": self.manager.get_session(game_id).seed}
+
+    def _join(
+        self, conn_id: str, game_id: str, params: Mapping[str, str]
+    ) -> Optional[str]:
+        session = self.manager.get_session(game_id)
+        if session is None:
+            return None
+        websocket = RemoteSocket(self.conn, conn_id)
+        player_id, welcome = join(session, websocket, params)
+        self.players[conn_id] = (session, player_id)
+        # Sent through the same pipe ahead of any state so it arrives first
+        self.conn.send(("send", conn_id, encode_message(welcome)))
+        return player_id
+
+    def _input(self, conn_id: str, text: Optional[str], data: Optional[bytes]) -> None:
+        entry = self.players.get(conn_id)
+        if entry is None:
+            return
+        session, player_id = entry
+        try:
+            decoded = decode(session, text, data)
+        except ValueError:
+            # Undecodable input ends the connection, as in ``game_ws``
+            self.players.pop(conn_id, None)
+            session.remove_player(player_id)
+            self.conn.send(("close", conn_id))
+            return
+        if decoded is None:
+            return
+        reply = dispatch(session, player_id, decoded)
+        if reply is not None:
+            self.conn.send(("send", conn_id, encode_message(reply)))
+
+    def _metrics(self, game_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        if game_id is not None:
+            session = self.manager.get_session(game_id, restore=False)
+            return session.get_metrics() if session else None
+        metrics = self.manager.get_metrics()
+        sessions = self.manager.get_all_sessions().values()
+        metrics["ticks"] = sum(s.tick_metrics.ticks for s in sessions)
+        metrics["connections"] = len(self.players)
+        return metrics
+
+
+def run_worker(conn: Connection) -> None:
+    """Entry point of a worker process."""
+
+    asyncio.run(ShardWorker(conn).serve())
+
+
+# ---------------------------------------------------------------------------
+# Front process
+# ---------------------------------------------------------------------------
+
+
+class WorkerHandle:
+    """The front process's view of one worker."""
+
+    def __init__(
+        self, name: str, process: multiprocessing.process.BaseProcess, conn: Connection
+    ) -> None:
+        self.name = name
+        self.process = process
+        self.conn = conn
+        # Client sockets of connections served by this worker
+        self.sockets: Dict[str, Any] = {}
+        # Task writing each connection's outbox, used to skip stalled clients
+        self.sending: Dict[str, asyncio.Task] = {}
+        # Frames waiting for the send in flight, per connection
+        self.outbox: Dict[str, Deque[str | bytes]] = {}
+        self.messages_forwarded = 0
+        self.messages_skipped = 0
+
+
+class ShardRouter:
+    """Front-process side of multi-process mode.
+
+    Starts the worker processes, places games on them by consistent hashing
+    and relays requests, client frames and state messages over their pipes.
+    Like the in-process :class:`~app.game.broadcast.Broadcaster`, a state
+    message for a client whose previous send is still in flight is skipped
+    and the worker is asked to resync that client. Welcome messages and
+    replies are queued behind the send in flight instead.
+    """
+
+    def __init__(self, workers: int) -> None:
+        if workers < 1:
+            raise ValueError("multi-process mode needs at least one worker")
+        self.count = workers
+        self.workers: Dict[str, WorkerHandle] = {}
+        self.ring = HashRing()
+        # Worker serving each client connection
+        self.connections: Dict[str, WorkerHandle] = {}
+        self._requests: Dict[int, asyncio.Future] = {}
+        self._request_ids = itertools.count()
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def start(self) -> None:
+        """Spawn the worker processes. Must run inside the event loop."""
+
+        self._loop = asyncio.get_running_loop()
+        context = multiprocessing.get_context("spawn")
+        for idx in range(self.count):
+            name = f"game-worker-{idx}"
+            parent, child = context.Pipe()
+            process = context.Process(
+                target=run_worker, args=(child,), name=name, daemon=True
+            )
+            process.start()
+            child.close()
+            handle = WorkerHandle(name, process, parent)
+            self.workers[name] = handle
+            self.ring.add(name)
+            threading.Thread(target=self._read, args=(handle,), daemon=True).start()
+
+    def stop(self) -> None:
+        """Ask every worker to exit and wait for it briefly."""
+
+        for handle in self.workers.values():
+            try:
+                handle.conn.send(("stop",))
+            except OSError:
+                pass
+        for handle in self.workers.values():
+            handle.process.join(STOP_TIMEOUT)
+            if handle.process.is_alive():
+                handle.process.terminate()
+            handle.conn.close()
+        for future in self._requests.values():
+            future.cancel()
+        self.workers.clear()
+        self.connections.clear()
+
+    def worker_for(self, game_id: str) -> WorkerHandle:
+        """Return the worker that owns ``game_id``."""
+
+        return self.workers[self.ring.node_for(game_id)]
+
+    def _read(self, handle: WorkerHandle) -> None:
+        while True:
+            try:
+                message = handle.conn.recv()
+            except (EOFError, OSError):
+                return
+            self._loop.call_soon_threadsafe(self._dispatch, handle, message)
+
+    def _dispatch(self, handle: WorkerHandle, message: Tuple[Any, ...]) -> None:
+        kind = message[0]
+        if kind in ("state", "send"):
+            _, conn_id, data = message
+            websocket = handle.sockets.get(conn_id)
+            if websocket is None:
+                return
+            task = handle.sending.get(conn_id)
+            busy = task is not None and not task.done()
+            if busy and kind == "state":
+                handle.messages_skipped += 1
+                self._post(handle, ("resync", conn_id))
+                return
+            handle.outbox.setdefault(conn_id, deque()).append(data)
+            if not busy:
+                handle.sending[conn_id] = asyncio.create_task(
+                    self._drain(handle, conn_id, websocket)
+                )
+            handle.messages_forwarded += 1
+        elif kind == "reply":
+            future = self._requests.pop(message[1], None)
+            if future is not None and not future.done():
+                future.set_result(message[2])
+        elif kind == "close":
+            conn_id = message[1]
+            websocket = handle.sockets.pop(conn_id, None)
+            handle.sending.pop(conn_id, None)
+            handle.outbox.pop(conn_id, None)
+            self.connections.pop(conn_id, None)
+            if websocket is not None:
+                asyncio.create_task(_close(websocket))
+
+    async def _drain(self, handle: WorkerHandle, conn_id: str, websocket: Any) -> None:
+        """Write the frames queued for ``conn_id`` in order."""
+
+        queue = handle.outbox.get(conn_id)
+        while queue:
+            await _send(websocket, queue.popleft())
+        if handle.outbox.get(conn_id) is queue:
+            del handle.outbox[conn_id]
+
+    def _post(self, handle: WorkerHandle, message: Tuple[Any, ...]) -> None:
+        try:
+            handle.conn.send(message)
+        except OSError:
+            pass
+
+    async def _request(self, handle: WorkerHandle, kind: str, *args: Any) -> Any:
+        request_id = next(self._request_ids)
+        future = self._loop.create_future()
+        self._requests[request_id] = future
+        try:
+            handle.conn.send((kind, request_id, *args))
+            return await asyncio.wait_for(future, REQUEST_TIMEOUT)
+        finally:
+            self._requests.pop(request_id, None)
+
+    async def create_game(self, **options: Any) -> Dict[str, Any]:
+        """Create a game on the worker its new ID hashes to.
+
+        Returns
+        -------
+        dict
+            ``{"gameId": ..., "seed": ...}``
+
+        Raises
+        ------
+        ValueError
+            If the worker rejected the options.
+        """
+
+        game_id = str(uuid4())
+        options["game_id"] = game_id
+        reply = await self._request(self.worker_for(game_id), "create", options)
+        if "error" in reply:
+            raise ValueError(reply["error"])
+        return reply
+
+    async def join(
+        self, game_id: str, websocket: Any, params: Mapping[str, str]
+    ) -> Optional[str]:
+        """Join ``websocket`` to ``game_id`` and return its connection ID.
+
+        The welcome message and state are sent to ``websocket`` as they
+        arrive from the worker. Returns ``None`` if the game does not exist.
+
+        Raises
+        ------
+        TimeoutError
+            If the worker did not answer within ``REQUEST_TIMEOUT``.
+        OSError
+            If the worker's pipe is closed.
+        """
+
+        handle = self.worker_for(game_id)
+        conn_id = str(uuid4())
+        handle.sockets[conn_id] = websocket
+        try:
+            player_id = await self._request(
+                handle, "join", conn_id, game_id, dict(params)
+            )
+        except BaseException:
+            # A late answer would leave a player nobody relays to
+            handle.sockets.pop(conn_id, None)
+            self._post(handle, ("leave", conn_id))
+            raise
+        if player_id is None:
+            handle.sockets.pop(conn_id, None)
+            return None
+        self.connections[conn_id] = handle
+        return conn_id
+
+    def forward(self, conn_id: str, text: Optional[str], data: Optional[bytes]) -> None:
+        """Pass a client frame to the worker serving ``conn_id``."""
+
+        handle = self.connections.get(conn_id)
+        if handle is not None:
+            self._post(handle, ("message", conn_id, text, data))
+
+    def leave(self, conn_id: str) -> None:
+        """Remove the player of a closed client connection."""
+
+        handle = self.connections.pop(conn_id, None)
+        if handle is None:
+            return
+        handle.sockets.pop(conn_id, None)
+        handle.sending.pop(conn_id, None)
+        handle.outbox.pop(conn_id, None)
+        self._post(handle, ("leave", conn_id))
+
+    async def game_metrics(self, game_id: str) -> Optional[Dict[str, Any]]:
+        """Return a session's metrics from its worker, or ``None``."""
+
+        return await self._request(self.worker_for(game_id), "metrics", game_id)
+
+    async def metrics(self) -> Dict[str, Any]:
+        """Return every worker's manager metrics and relay counters."""
+
+        handles = list(self.workers.values())
+        replies = await asyncio.gather(
+            *(self._request(handle, "metrics", None) for handle in handles)
+        )
+        return {
+            "workers": {
+                handle.name: {
+                    **reply,
+                    "forwarded": handle.messages_forwarded,
+                    "skipped": handle.messages_skipped,
+                }
+                for handle, reply in zip(handles, replies)
+            }
+        }
+
+
+async def _send(websocket: Any, data: str | bytes) -> None:
+    try:
+        if isinstance(data, bytes):
+            await websocket.send_bytes(data)
+        else:
+            await websocket.send_text(data)
+    except Exception:
+        # Ignore send errors; the receive loop notices closed sockets
+        pass
+
+
+async def _close(websocket: Any) -> None:
+    try:
+        await websocket.close()
+    except Exception:
+        pass
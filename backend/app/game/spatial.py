@@ -0,0 +1,143 @@
+"""Uniform grid spatial hash for proximity queries between entities."""
+
+from __future__ import annotations
+
+import math
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+from .models import SEGMENT_SIZE
+
+Cell = Tuple[int, int]
+
+
+class SpatialHash:
+    """Bucket entities by grid cell so nearby lookups avoid full scans.
+
+    Entities are any objects with ``x`` and ``y`` attributes. They are tracked
+    by identity so mutable models can be stored. Call :meth:`update` after an
+    entity moves; only entities that crossed into another cell touch the
+    buckets.
+    """
+
+    def __init__(self, cell_size: int = SEGMENT_SIZE) -> None:
+        self.cell_size = cell_size
+        self.buckets: Dict[Cell, Dict[int, Any]] = {}
+        self._cells: Dict[int, Cell] = {}
+
+    def __len__(self) -> int:
+        return len(self._cells)
+
+    def cell_of(self, x: float, y: float) -> Cell:
+        return int(x // self.cell_size), int(y // self.cell_size)
+
+    def update(self, entity: Any) -> None:
+        """Insert ``entity`` or move it to the bucket matching its position."""
+
+        key = id(entity)
+        cell = self.cell_of(entity.x, entity.y)
+        old = self._cells.get(key)
+        if old == cell:
+            return
+        if old is not None:
+            self._discard(old, key)
+        self._cells[key] = cell
+        self.buckets.setdefault(cell, {})[key] = entity
+
+    def remove(self, entity: Any) -> None:
+        key = id(entity)
+        cell = self._cells.pop(key, None)
+        if cell is not None:
+            self._discard(cell, key)
+
+    def _discard(self, cell: Cell, key: int) -> None:
+        bucket = self.buckets.get(cell)
+        if bucket is None:
+            return
+        bucket.pop(key, None)
+        if not bucket:
+            del self.buckets[cell]
+
+    def sync(self, entities: Iterable[Any]) -> None:
+        """Make the hash contain exactly ``entities`` at their positions."""
+
+        seen = set()
+        for entity in entities:
+            seen.add(id(entity))
+            self.update(entity)
+        if len(seen) != len(self._cells):
+            for key in [k for k in self._cells if k not in seen]:
+                self._discard(self._cells.pop(key), key)
+
+    def count(self, cell: Cell) -> int:
+        """Return how many entities occupy ``cell``."""
+
+        bucket = self.buckets.get(cell)
+        return len(bucket) if bucket else 0
+
+    def entities(self) -> Iterator[Any]:
+        for bucket in self.buckets.values():
+            yield from bucket.values()
+
+    def query_radius(self, x: float, y: float, radius: float) -> List[Any]:
+        """Return entities within ``radius`` of ``(x, y)``."""
+
+        cx0, cy0 = self.cell_of(x - radius, y - radius)
+        cx1, cy1 = self.cell_of(x + radius, y + radius)
+        found = []
+        buckets = self.buckets
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                bucket = buckets.get((cx, cy))
+                if not bucket:
+                    continue
+                for entity in bucket.values():
+                    if math.hypot(entity.x - x, entity.y - y) <= radius:
+                        found.append(entity)
+        return found
+
+    def nearest(self, x: float, y: float) -> Any | None:
+        """Return the entity closest to ``(x, y)`` or ``None`` if empty.
+
+        Rings of cells are searched outward from the query cell until no
+        closer entity can exist. Once a ring would contain more cells than
+        there are entities the remaining entities are compared directly.
+        """
+
+        if not self._cells:
+            return None
+        cx, cy = self.cell_of(x, y)
+        best = None
+        best_d2 = math.inf
+        ring = 0
+        while True:
+            if (2 * ring + 1) ** 2 > len(self._cells):
+                for entity in self.entities():
+                    d2 = (entity.x - x) ** 2 + (entity.y - y) ** 2
+                    if d2 < best_d2:
+                        best, best_d2 = entity, d2
+                return best
+            for cell in _ring_cells(cx, cy, ring):
+                bucket = self.buckets.get(cell)
+                if not bucket:
+                    continue
+                for entity in bucket.values():
+                    d2 = (entity.x - x) ** 2 + (entity.y - y) ** 2
+                    if d2 < best_d2:
+                        best, best_d2 = entity, d2
+            # Anything in the next ring is at least ``ring`` cells away.
+            if best is not None and best_d2 <= (ring * self.cell_size) ** 2:
+                return best
+            ring += 1
+
+
+def _ring_cells(cx: int, cy: int, ring: int) -> Iterator[Cell]:
+    if ring == 0:
+        yield cx, cy
+        return
+    for dx in range(-ring, ring + 1):
+        yield cx + dx, cy - ring
+        yield cx + dx, cy + ring
+    for dy in range(-ring + 1, ring):
+        yield cx - ring, cy + dy
+        yield cx + ring, cy + dy
+
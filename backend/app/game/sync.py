@@ -0,0 +1,206 @@
+"""Snapshot and delta encoding of the game state for network clients."""
+
+from __future__ import annotations
+
+from operator import attrgetter
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+from .models import GameState
+from .schema import (
+    container_to_dict,
+    door_to_dict,
+    loot_progress,
+    player_to_dict,
+    state_to_dict,
+    wall_to_dict,
+    zombie_to_dict,
+)
+
+# Entity collections sent as id keyed diffs. Players are keyed by the
+# ``players`` dict while every other entity carries its own ``id`` field.
+ENTITY_KEYS = ("players", "zombies", "walls", "containers")
+
+# Top level values replaced wholesale whenever they change.
+SCALAR_KEYS = ("door", "width", "height", "loot_progress")
+
+EntityFields = Dict[str, Any]
+
+# Wire converters returning a detached copy of an entity's fields at a tick
+ENTITY_CONVERTERS: Dict[str, Callable[[Any, int], EntityFields]] = {
+    "players": player_to_dict,
+    "zombies": zombie_to_dict,
+    "walls": wall_to_dict,
+    # Containers have no timers, so their converter takes no tick
+    "containers": lambda container, tick: container_to_dict(container),
+}
+
+
+# Attributes behind every wire field of entities that rarely change. An
+# entity whose attributes match those seen by the previous delta keeps its
+# previous fields instead of being converted and compared again.
+ENTITY_SIGNATURES: Dict[str, Callable[[Any], Tuple[Any, ...]]] = {
+    "walls": attrgetter(
+        "damage_flash_until",
+        "hp",
+        "opened",
+        "item",
+        "x",
+        "y",
+        "size",
+        "material",
+        "max_hp",
+    ),
+    "containers": attrgetter("opened", "item", "x", "y", "type"),
+}
+# Deadline attribute, first in the signature, whose remaining ticks the wire
+# carries. Entities are unchanged only while it lies in the past.
+ENTITY_DEADLINES = ("walls",)
+
+
+def _iter_entities(state: GameState, key: str) -> Iterable[Tuple[str, Any]]:
+    if key == "players":
+        return state.players.items()
+    return ((e.id, e) for e in getattr(state, key))
+
+
+def _scalar(key: str, state: GameState) -> Any:
+    if key == "door":
+        return door_to_dict(state.door)
+    if key == "loot_progress":
+        return loot_progress(state.loot_due, state.tick)
+    return getattr(state, key)
+
+
+def snapshot_message(state: GameState, tick: int) -> Dict[str, Any]:
+    """Return a full snapshot of ``state`` tagged with ``tick``."""
+
+    message = state_to_dict(state)
+    message["type"] = "snapshot"
+    message["tick"] = tick
+    return message
+
+
+class StateSync:
+    """Produce per-tick deltas of a session's state.
+
+    The tracker remembers the fields of every entity from the previous call
+    to :meth:`delta`. Each new delta lists only the entities whose fields
+    changed (with just the changed fields), entities that were added and the
+    ids of entities that were removed. Deltas carry the tick they describe and
+    the ``base`` tick they apply on top of so clients can detect gaps and ask
+    for a resync. Walls and containers are first compared by their
+    ``ENTITY_SIGNATURES``, so the hundreds of walls that never change cost a
+    tuple comparison each rather than a conversion. Given a
+    ``static_version`` they are not even looked at while nothing changed.
+    """
+
+    def __init__(self) -> None:
+        self.tick: int | None = None
+        self._entities: Dict[str, Dict[str, EntityFields]] = {
+            key: {} for key in ENTITY_KEYS
+        }
+        self._signatures: Dict[str, Dict[str, Tuple[Any, ...]]] = {
+            key: {} for key in ENTITY_SIGNATURES
+        }
+        # ``GameState.tick`` seen by the previous delta
+        self._state_tick: Optional[int] = None
+        # Layout of the walls and containers at their last scan, and the
+        # latest deadline among them, see ``static_version``
+        self._layouts: Dict[str, Any] = {}
+        self._deadlines: Dict[str, int] = {}
+        self._scalars: Dict[str, Any] = {}
+
+    def delta(
+        self,
+        state: GameState,
+        tick: int,
+        static_version: Optional[Hashable] = None,
+    ) -> Dict[str, Any]:
+        """Return the changes since the previous call and remember ``state``.
+
+        ``static_version`` is a value the caller changes whenever a wall or
+        container is added, removed or modified. While it and the lists stay
+        the same, and no wall deadline ran since the previous delta, walls
+        and containers are skipped without a scan. Without it every entity
+        is compared, which also catches direct changes to the models.
+        """
+
+        message: Dict[str, Any] = {"type": "delta", "tick": tick, "base": self.tick}
+        now = state.tick
+        # Deadlines up to here gave zero remaining ticks then and now
+        since = now if self._state_tick is None else min(now, self._state_tick)
+        for key in ENTITY_KEYS:
+            previous = self._entities[key]
+            current: Dict[str, EntityFields] = {}
+            upsert: Dict[str, EntityFields] = {}
+            convert = ENTITY_CONVERTERS[key]
+            signature = ENTITY_SIGNATURES.get(key)
+            if signature is not None:
+                entities = getattr(state, key)
+                layout = None
+                if static_version is not None:
+                    layout = (static_version, id(entities), len(entities))
+                    if (
+                        layout == self._layouts.get(key)
+                        and self._deadlines.get(key, 0) <= since
+                    ):
+                        continue
+                self._layouts[key] = layout
+                signatures = self._signatures[key]
+                current_signatures: Dict[str, Tuple[Any, ...]] = {}
+                deadline = key in ENTITY_DEADLINES
+                latest = 0
+            for entity_id, entity in _iter_entities(state, key):
+                if signature is not None:
+                    sig = current_signatures[entity_id] = signature(entity)
+                    if deadline and sig[0] > latest:
+                        latest = sig[0]
+                    if (
+                        sig == signatures.get(entity_id)
+                        and (not deadline or sig[0] <= since)
+                        and entity_id in previous
+                    ):
+                        current[entity_id] = previous[entity_id]
+                        continue
+                fields = convert(entity, now)
+                current[entity_id] = fields
+                old = previous.get(entity_id)
+                if old is None:
+                    upsert[entity_id] = fields
+                elif old != fields:
+                    upsert[entity_id] = {
+                        name: value
+                        for name, value in fields.items()
+                        if old.get(name) != value
+                    }
+            removed = [entity_id for entity_id in previous if entity_id not in current]
+            self._entities[key] = current
+            if signature is not None:
+                self._signatures[key] = current_signatures
+                self._deadlines[key] = latest
+            if upsert or removed:
+                message[key] = {"upsert": upsert, "remove": removed}
+
+        for key in SCALAR_KEYS:
+            value = _scalar(key, state)
+            if key not in self._scalars or self._scalars[key] != value:
+                self._scalars[key] = value
+                message[key] = value
+
+        self.tick = tick
+        self._state_tick = now
+        return message
+
+    def fields(self, key: str) -> Dict[str, EntityFields]:
+        """Return the fields of every ``key`` entity as of the last delta.
+
+        The field dictionaries are replaced, never mutated, on each delta so
+        callers may put them in outgoing messages.
+        """
+
+        return self._entities[key]
+
+    def scalars(self) -> Dict[str, Any]:
+        """Return the top level values as of the last delta."""
+
+        return dict(self._scalars)
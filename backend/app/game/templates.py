@@ -0,0 +1,148 @@
+"""Pool of pre-generated worlds so creating a session skips map generation."""
+
+from __future__ import annotations
+
+import asyncio
+import random
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, Iterable, List, Tuple
+
+from .grid import WallGrid
+from .models import (
+    WORLD_HEIGHT,
+    WORLD_WIDTH,
+    ContainerState,
+    DoorState,
+    WallState,
+    ZombieState,
+)
+from .world import generate_world
+
+Size = Tuple[int, int]
+
+# Unseeded templates kept ready for each world size
+TEMPLATES_PER_SIZE = 4
+# Seeded templates remembered for sessions that ask for the same seed again
+SEEDED_CACHE_SIZE = 32
+
+
+class WorldTemplate:
+    """A generated world that sessions clone instead of regenerating.
+
+    Templates are never modified after generation. Sessions share the wall
+    objects of their template and copy a wall only when it first changes;
+    zombies, containers, the door and the wall grid are copied on clone.
+    ``rng_state`` is the generator state right after generation so a cloned
+    session continues the same random sequence as a freshly generated one.
+    """
+
+    def __init__(self, width: int, height: int, seed: int) -> None:
+        rng = random.Random(seed)
+        walls, zombies, containers, door, grid = generate_world(width, height, rng)
+        self.width = width
+        self.height = height
+        self.seed = seed
+        self.walls: Tuple[WallState, ...] = tuple(walls)
+        self.zombies: Tuple[ZombieState, ...] = tuple(zombies)
+        self.containers: Tuple[ContainerState, ...] = tuple(containers)
+        self.door: DoorState = door
+        self.grid: WallGrid = grid
+        self.rng_state = rng.getstate()
+
+
+class TemplatePool:
+    """Hand out world templates, generating them ahead of time.
+
+    Requests without a seed take a ready template with a random seed from
+    the queue of their world size; :meth:`run` refills the queues in a worker
+    thread so generation stays off the event loop. Requests with a seed are
+    served from a small LRU cache of seeded templates, which are reused
+    because clones never modify them. A request that finds nothing ready
+    generates its template synchronously and counts as a miss.
+    """
+
+    def __init__(
+        self,
+        sizes: Iterable[Size] = ((WORLD_WIDTH, WORLD_HEIGHT),),
+        per_size: int = TEMPLATES_PER_SIZE,
+        seeded_cache_size: int = SEEDED_CACHE_SIZE,
+    ) -> None:
+        self.per_size = per_size
+        self.seeded_cache_size = seeded_cache_size
+        self.ready: Dict[Size, Deque[WorldTemplate]] = {
+            size: deque() for size in sizes
+        }
+        self.seeded: OrderedDict[Tuple[int, int, int], WorldTemplate] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._wanted = asyncio.Event()
+
+    def take(
+        self,
+        width: int = WORLD_WIDTH,
+        height: int = WORLD_HEIGHT,
+        seed: int | None = None,
+    ) -> WorldTemplate:
+        """Return a template for a new session of the given size and seed."""
+
+        if seed is None:
+            queue = self.ready.get((width, height))
+            if queue:
+                self.hits += 1
+                self._wanted.set()
+                return queue.popleft()
+            self.misses += 1
+            return WorldTemplate(width, height, random.getrandbits(32))
+
+        key = (width, height, seed)
+        template = self.seeded.get(key)
+        if template is not None:
+            self.hits += 1
+            self.seeded.move_to_end(key)
+            return template
+        self.misses += 1
+        template = WorldTemplate(width, height, seed)
+        self.seeded[key] = template
+        if len(self.seeded) > self.seeded_cache_size:
+            self.seeded.popitem(last=False)
+        return template
+
+    def _missing(self) -> List[Size]:
+        return [
+            size for size, queue in self.ready.items() if len(queue) < self.per_size
+        ]
+
+    def fill(self) -> int:
+        """Top up every queue synchronously and return how many were made."""
+
+        made = 0
+        for size in self._missing():
+            queue = self.ready[size]
+            while len(queue) < self.per_size:
+                queue.append(WorldTemplate(*size, random.getrandbits(32)))
+                made += 1
+        return made
+
+    async def run(self) -> None:
+        """Keep the queues topped up until cancelled."""
+
+        while True:
+            self._wanted.clear()
+            for size in self._missing():
+                while len(self.ready[size]) < self.per_size:
+                    template = await asyncio.to_thread(
+                        WorldTemplate, *size, random.getrandbits(32)
+                    )
+                    self.ready[size].append(template)
+            if not self._missing():
+                await self._wanted.wait()
+
+    def to_dict(self) -> Dict[str, Any]:
+        requests = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / requests if requests else 0.0,
+            "ready": {f"{w}x{h}": len(queue) for (w, h), queue in self.ready.items()},
+            "seeded": len(self.seeded),
+        }
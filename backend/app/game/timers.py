@@ -0,0 +1,152 @@
+"""Tick based deadlines and a hierarchical timer wheel.
+
+Cooldowns are not counted down every tick. Entities store the tick at which
+a cooldown ends and the remaining ticks are derived with :func:`remaining`
+when the entity is serialized, so an idle cooldown costs nothing.
+
+Work that must happen when a timer runs out, such as finishing a loot, is
+scheduled on a :class:`TimerWheel`. The wheel has ``WHEEL_LEVELS`` levels of
+``WHEEL_SIZE`` slots. Level 0 holds timers due within the current block of
+``WHEEL_SIZE`` ticks, one slot per tick; each higher level covers
+``WHEEL_SIZE`` blocks of the level below. Whenever the clock enters a new
+block, the matching slot of the level above is moved down. Advancing one
+tick therefore touches a single level 0 slot, plus a cascade once every
+``WHEEL_SIZE`` ticks, and the cost is proportional to the number of timers
+that expire rather than to the number that are pending. Runs of empty
+levels are skipped a whole block at a time. Timers further away than the
+top level can reach wait in an overflow list.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Callable, List, Tuple
+
+# Bits of the tick number indexing one wheel level
+WHEEL_BITS = 6
+WHEEL_SIZE = 1 << WHEEL_BITS
+WHEEL_MASK = WHEEL_SIZE - 1
+# 64 ** 4 ticks, about 77 hours at 60 ticks per second
+WHEEL_LEVELS = 4
+
+
+def remaining(deadline: int, tick: int) -> int:
+    """Return the ticks left until ``deadline`` as seen at ``tick``."""
+
+    return deadline - tick if deadline > tick else 0
+
+
+@dataclass(slots=True, eq=False)
+class Timer:
+    """A callback scheduled on a :class:`TimerWheel`."""
+
+    due: int
+    callback: Callable[..., Any]
+    args: Tuple[Any, ...] = ()
+    cancelled: bool = False
+
+
+class TimerWheel:
+    """Hierarchical timing wheel firing callbacks at given ticks."""
+
+    def __init__(self, now: int = 0) -> None:
+        # Last tick advanced to; timers due at or before it have fired
+        self.now = now
+        self._levels: List[List[List[Timer]]] = [
+            [[] for _ in range(WHEEL_SIZE)] for _ in range(WHEEL_LEVELS)
+        ]
+        self._overflow: List[Timer] = []
+        # Timers held by each level, including cancelled ones
+        self._counts = [0] * WHEEL_LEVELS
+        # Timers scheduled and neither fired nor cancelled
+        self.pending = 0
+        self.fired = 0
+
+    def __len__(self) -> int:
+        return self.pending
+
+    def schedule(self, due: int, callback: Callable[..., Any], *args: Any) -> Timer:
+        """Call ``callback(*args)`` when the wheel advances to tick ``due``.
+
+        A ``due`` tick that has already passed fires on the next advance.
+        """
+
+        timer = Timer(max(due, self.now + 1), callback, args)
+        self._insert(timer)
+        self.pending += 1
+        return timer
+
+    def cancel(self, timer: Timer) -> None:
+        """Stop ``timer`` from firing; cancelling twice is harmless."""
+
+        if not timer.cancelled:
+            timer.cancelled = True
+            self.pending -= 1
+
+    def _insert(self, timer: Timer) -> None:
+        due, now = timer.due, self.now
+        for level in range(WHEEL_LEVELS):
+            shift = WHEEL_BITS * (level + 1)
+            if due >> shift == now >> shift:
+                slot = (due >> (WHEEL_BITS * level)) & WHEEL_MASK
+                self._levels[level][slot].append(timer)
+                self._counts[level] += 1
+                return
+        self._overflow.append(timer)
+
+    def _cascade(self, timers: List[Timer]) -> None:
+        for timer in timers:
+            if not timer.cancelled:
+                self._insert(timer)
+
+    def advance(self, now: int) -> int:
+        """Fire every timer due up to tick ``now`` and return how many fired.
+
+        Timers due on the same tick fire in the order they were scheduled.
+        Callbacks may schedule and cancel timers.
+        """
+
+        fired = 0
+        while self.now < now:
+            if not self.pending:
+                self.now = now
+                break
+            if not self._counts[0]:
+                # Nothing fires before the block of the lowest non-empty
+                # level above starts and is cascaded down
+                level = 0
+                while level + 1 < WHEEL_LEVELS and not self._counts[level + 1]:
+                    level += 1
+                last = self.now | ((1 << (WHEEL_BITS * (level + 1))) - 1)
+                if last >= now:
+                    self.now = now
+                    break
+                self.now = last
+            tick = self.now = self.now + 1
+            if not tick & WHEEL_MASK:
+                for level in range(WHEEL_LEVELS - 1, 0, -1):
+                    if tick & ((1 << (WHEEL_BITS * level)) - 1):
+                        continue
+                    if level == WHEEL_LEVELS - 1 and not (
+                        tick & ((1 << (WHEEL_BITS * WHEEL_LEVELS)) - 1)
+                    ):
+                        overflow, self._overflow = self._overflow, []
+                        self._cascade(overflow)
+                    slot = (tick >> (WHEEL_BITS * level)) & WHEEL_MASK
+                    timers, self._levels[level][slot] = self._levels[level][slot], []
+                    self._counts[level] -= len(timers)
+                    self._cascade(timers)
+            bucket = self._levels[0]
+            slot = tick & WHEEL_MASK
+            while bucket[slot]:
+                timers, bucket[slot] = bucket[slot], []
+                self._counts[0] -= len(timers)
+                for timer in timers:
+                    if timer.cancelled:
+                        continue
+                    timer.cancelled = True
+                    self.pending -= 1
+                    fired += 1
+                    timer.callback(*timer.args)
+        self.fired += fired
+        return fired
@@ -0,0 +1,210 @@
+"""Optional NumPy kernel stepping every zombie with batched array operations.
+
+The scalar loop in :func:`app.game.world.update_zombies` remains the default.
+Sessions created with ``vectorized=True`` keep a struct-of-arrays copy of the
+zombie positions and facings and advance them here instead. Both paths use
+the same formulas in the same order so a session produces identical results
+with either kernel.
+"""
+
+from __future__ import annotations
+
+from typing import List
+
+try:  # NumPy is an optional dependency used only by this module
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised when NumPy is missing
+    np = None
+
+from .flowfield import DIRECTIONS, UNREACHABLE, FlowField
+from .grid import WallGrid
+from .models import SEGMENT_SIZE, PlayerState, ZombieState
+from .spatial import SpatialHash
+
+HAS_NUMPY = np is not None
+
+
+class ZombieArrays:
+    """Struct-of-arrays mirror of a zombie list.
+
+    ``ZombieState`` objects stay the source of truth for everything outside
+    the movement kernel. :meth:`load` copies their hot fields into arrays at
+    the start of a tick and :meth:`store` writes the results back so they are
+    ready for serialization.
+    """
+
+    def __init__(self) -> None:
+        if not HAS_NUMPY:
+            raise RuntimeError("NumPy is required for the vectorized zombie kernel")
+        self.x = np.zeros(0)
+        self.y = np.zeros(0)
+        self.facing_x = np.zeros(0)
+        self.facing_y = np.zeros(0)
+        self._dist_source: List[int] | None = None
+        self._dist = np.zeros(0, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.x)
+
+    def load(self, zombies: List[ZombieState]) -> None:
+        count = len(zombies)
+        self.x = np.fromiter((z.x for z in zombies), float, count)
+        self.y = np.fromiter((z.y for z in zombies), float, count)
+        self.facing_x = np.fromiter((z.facing_x for z in zombies), float, count)
+        self.facing_y = np.fromiter((z.facing_y for z in zombies), float, count)
+
+    def store(self, zombies: List[ZombieState]) -> None:
+        for z, x, y, fx, fy in zip(
+            zombies,
+            self.x.tolist(),
+            self.y.tolist(),
+            self.facing_x.tolist(),
+            self.facing_y.tolist(),
+        ):
+            z.x = x
+            z.y = y
+            z.facing_x = fx
+            z.facing_y = fy
+
+    def distances(self, flow_field: FlowField) -> "np.ndarray":
+        """Return the flow field distances as an array, cached per rebuild."""
+
+        if self._dist_source is not flow_field.dist:
+            self._dist = np.asarray(flow_field.dist, dtype=np.int64)
+            self._dist_source = flow_field.dist
+        return self._dist
+
+
+def _cell_index(gx, gy, grid_w: int, grid_h: int):
+    """Return flat cell indexes and a mask of which cells are on the grid."""
+
+    inside = (gx >= 0) & (gy >= 0) & (gx < grid_w) & (gy < grid_h)
+    return np.where(inside, gy * grid_w + gx, 0), inside
+
+
+def _collides(grid: WallGrid, x, y):
+    """Vectorized :meth:`WallGrid.collides`."""
+
+    hit = np.zeros(len(x), dtype=bool)
+    if not grid.cells:
+        return hit
+    walls = np.frombuffer(grid.cells, dtype=np.uint8)
+    gx = np.floor_divide(x, SEGMENT_SIZE).astype(np.int64)
+    gy = np.floor_divide(y, SEGMENT_SIZE).astype(np.int64)
+    on_x = x == gx * SEGMENT_SIZE
+    on_y = y == gy * SEGMENT_SIZE
+    for ox, oy, applies in (
+        (0, 0, None),
+        (-1, 0, on_x),
+        (0, -1, on_y),
+        (-1, -1, on_x & on_y),
+    ):
+        idx, inside = _cell_index(gx + ox, gy + oy, grid.grid_w, grid.grid_h)
+        blocked = inside & (walls[idx] > 0)
+        if applies is not None:
+            blocked &= applies
+        hit |= blocked
+    return hit
+
+
+def update_zombies_vectorized(
+    arrays: ZombieArrays,
+    zombies: List[ZombieState],
+    players: List[PlayerState],
+    width: int,
+    height: int,
+    flow_field: FlowField,
+    grid: WallGrid,
+    player_index: SpatialHash,
+    reach: float,
+) -> List[int]:
+    """Array version of :func:`app.game.world.update_zombies`.
+
+    The zombie objects are updated before returning.
+
+    Returns
+    -------
+    list[int]
+        Indexes of zombies that ended the step within ``reach`` of a player
+        and therefore need their attacks resolved. Other zombies cannot
+        attack this tick.
+    """
+
+    arrays.load(zombies)
+    near: List[int] = []
+    if len(arrays):
+        if players:
+            flow_field.update(players, grid)
+            player_index.sync(players)
+            _move(arrays, width, height, flow_field, grid, player_index)
+            px = np.fromiter((p.x for p in players), float, len(players))
+            py = np.fromiter((p.y for p in players), float, len(players))
+            dx = arrays.x[:, None] - px[None, :]
+            dy = arrays.y[:, None] - py[None, :]
+            # Slightly generous bound; the exact test happens per zombie.
+            in_reach = ((dx * dx + dy * dy) <= (reach + 1) ** 2).any(axis=1)
+            near = np.flatnonzero(in_reach).tolist()
+    arrays.store(zombies)
+    return near
+
+
+def _move(
+    arrays: ZombieArrays,
+    width: int,
+    height: int,
+    flow_field: FlowField,
+    grid: WallGrid,
+    player_index: SpatialHash,
+) -> None:
+    grid_w, grid_h = flow_field.grid_w, flow_field.grid_h
+    dist = arrays.distances(flow_field)
+    x, y = arrays.x, arrays.y
+    gx = np.floor_divide(x, SEGMENT_SIZE).astype(np.int64)
+    gy = np.floor_divide(y, SEGMENT_SIZE).astype(np.int64)
+    own, own_inside = _cell_index(gx, gy, grid_w, grid_h)
+    counts = np.bincount(own[own_inside], minlength=grid_w * grid_h)
+    here = np.where(own_inside, dist[own], UNREACHABLE)
+
+    # Pick the first neighbour, in ``DIRECTIONS`` order, that strictly
+    # improves on the best distance so far and is free of zombies. A
+    # neighbour is never the zombie's own cell so no self exclusion is needed.
+    best_dist = here + 1
+    best_x = np.full(len(x), -1, dtype=np.int64)
+    best_y = np.full(len(x), -1, dtype=np.int64)
+    for dx, dy in DIRECTIONS:
+        nx, ny = gx + dx, gy + dy
+        idx, inside = _cell_index(nx, ny, grid_w, grid_h)
+        nd = np.where(inside, dist[idx], UNREACHABLE)
+        ok = (
+            (here > 0)
+            & inside
+            & (nd != UNREACHABLE)
+            & (nd < best_dist)
+            & (counts[idx] == 0)
+        )
+        best_dist = np.where(ok, nd, best_dist)
+        best_x = np.where(ok, nx, best_x)
+        best_y = np.where(ok, ny, best_y)
+
+    has_step = best_x >= 0
+    target_x = best_x * SEGMENT_SIZE + SEGMENT_SIZE / 2
+    target_y = best_y * SEGMENT_SIZE + SEGMENT_SIZE / 2
+    for i in np.flatnonzero(~has_step).tolist():
+        target = player_index.nearest(x[i], y[i])
+        target_x[i] = target.x
+        target_y[i] = target.y
+
+    dx = target_x - x
+    dy = target_y - y
+    length = np.sqrt(dx * dx + dy * dy)
+    moving = length != 0
+    safe = np.where(moving, length, 1.0)
+    step_x = dx / safe
+    step_y = dy / safe
+    new_x = x + step_x * 1.0
+    new_y = y + step_y * 1.0
+    free = moving & ~_collides(grid, new_x, new_y)
+    arrays.x = np.where(free, np.clip(new_x, 0, width), x)
+    arrays.y = np.where(free, np.clip(new_y, 0, height), y)
+    arrays.facing_x = np.where(moving, step_x, arrays.facing_x)
+    arrays.facing_y = np.where(moving, step_y, arrays.facing_y)
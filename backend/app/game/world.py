@@ -6,8 +6,12 @@ import math
 import random
 from typing import List, Tuple
 
+from .flowfield import FlowField
+from .grid import CELL_MARGIN, CellCounts, WallGrid
+from .spatial import SpatialHash
 from .models import (
     CONTAINER_LOOT,
+    SEGMENT_SIZE,
     WALL_MATERIALS,
     ContainerState,
     DoorState,
@@ -16,9 +20,16 @@ from .models import (
     ZombieState,
 )
 
-SEGMENT_SIZE = 40
 FIRE_ZOMBIE_CHANCE = 0.2
 ZOMBIE_WAVE_SIZE = 5
+# Tries at scattering a wave zombie around the door before it is placed in
+# the nearest open cell instead
+ZOMBIE_SPAWN_ATTEMPTS = 20
+# Random edge cells tried for the spawn door before scanning the whole edge
+DOOR_ATTEMPTS = 20
+# Random source used by generation. Sessions pass their own seeded
+# ``random.Random``; the global ``random`` module offers the same methods.
+Rng = random.Random
 
 # Recipes used for server-authoritative crafting. Each entry maps the
 # resulting item id to the required ingredients and optional output
@@ -50,10 +61,28 @@ CRAFTING_RECIPES = {
 # ---------------------------------------------------------------------------
 
 
-def create_wall(gx: int, gy: int, material: str | None = None) -> WallState:
+def _rng(rng: Rng | None) -> Rng:
+    """Return ``rng`` or the global ``random`` module when not supplied."""
+
+    return random if rng is None else rng
+
+
+def _ensure_grid(
+    width: int, height: int, walls: List[WallState], grid: WallGrid | None
+) -> WallGrid:
+    """Return ``grid`` or build one from ``walls`` when not supplied."""
+
+    if grid is not None:
+        return grid
+    return WallGrid.from_walls(width, height, walls)
+
+
+def create_wall(
+    gx: int, gy: int, material: str | None = None, rng: Rng | None = None
+) -> WallState:
     """Create a ``WallState`` at the given grid coordinate."""
 
-    mat = material or random.choice(list(WALL_MATERIALS.keys()))
+    mat = material or _rng(rng).choice(list(WALL_MATERIALS.keys()))
     hp = WALL_MATERIALS[mat]["hp"]
     return WallState(
         x=gx * SEGMENT_SIZE,
@@ -65,9 +94,12 @@ def create_wall(gx: int, gy: int, material: str | None = None) -> WallState:
     )
 
 
-def generate_store_walls(width: int, height: int) -> List[WallState]:
+def generate_store_walls(
+    width: int, height: int, rng: Rng | None = None
+) -> List[WallState]:
     """Generate the hardware store style layout."""
 
+    rng = _rng(rng)
     walls: List[WallState] = []
     grid_w = width // SEGMENT_SIZE
     grid_h = height // SEGMENT_SIZE
@@ -80,14 +112,14 @@ def generate_store_walls(width: int, height: int) -> List[WallState]:
         gy1_c = clamp(gy1, 0, grid_h - 1)
         gy2_c = clamp(gy2, 0, grid_h - 1)
         for y in range(gy1_c, gy2_c + 1):
-            walls.append(create_wall(gx_c, y))
+            walls.append(create_wall(gx_c, y, rng=rng))
 
     def add_horizontal(gy: int, gx1: int, gx2: int) -> None:
         gy_c = clamp(gy, 0, grid_h - 1)
         gx1_c = clamp(gx1, 0, grid_w - 1)
         gx2_c = clamp(gx2, 0, grid_w - 1)
         for x in range(gx1_c, gx2_c + 1):
-            walls.append(create_wall(x, gy_c))
+            walls.append(create_wall(x, gy_c, rng=rng))
 
     def add_room(x: int, y: int, w: int, h: int) -> None:
         for gx in range(x, x + w):
@@ -95,7 +127,7 @@ def generate_store_walls(width: int, height: int) -> List[WallState]:
                 if gx == x + w // 2 and gy == y + h - 1:
                     continue
                 if gx in (x, x + w - 1) or gy in (y, y + h - 1):
-                    walls.append(create_wall(gx, gy))
+                    walls.append(create_wall(gx, gy, rng=rng))
 
     v_spacing = max(6, grid_w // 4)
     v_positions: List[int] = []
@@ -103,52 +135,61 @@ def generate_store_walls(width: int, height: int) -> List[WallState]:
         v_positions.append(gx)
         y = 2
         while y < grid_h - 4:
-            length = 4 + random.randint(0, 2)
+            length = 4 + rng.randint(0, 2)
             add_vertical(gx, y, min(y + length - 1, grid_h - 4))
-            y += length + 3 + random.randint(0, 1)
+            y += length + 3 + rng.randint(0, 1)
 
     h_spacing = max(8, grid_h // 5)
     for gy in range(4, grid_h - 3, h_spacing):
         x = 2
         while x < grid_w - 4:
-            length = 4 + random.randint(0, 2)
+            length = 4 + rng.randint(0, 2)
             add_horizontal(gy, x, min(x + length - 1, grid_w - 4))
-            x += length + 4 + random.randint(0, 2)
+            x += length + 4 + rng.randint(0, 2)
 
     for gx in v_positions:
-        if random.random() < 0.4:
-            y = 2 + random.randint(0, max(1, grid_h - 8))
+        if rng.random() < 0.4:
+            y = 2 + rng.randint(0, max(1, grid_h - 8))
             add_horizontal(y, gx - 1, gx + 1)
             add_horizontal(y + 1, gx - 1, gx + 1)
 
-    room_count = 1 + random.randint(0, 1)
+    room_count = 1 + rng.randint(0, 1)
     for _ in range(room_count):
-        rw = min(3 + random.randint(0, 2), grid_w - 2)
-        rh = min(3 + random.randint(0, 2), grid_h - 2)
+        rw = min(3 + rng.randint(0, 2), grid_w - 2)
+        rh = min(3 + rng.randint(0, 2), grid_h - 2)
         if rw < 3 or rh < 3:
             continue
-        start_x = 1 + random.randint(0, grid_w - rw - 1)
-        start_y = 1 + random.randint(0, grid_h - rh - 1)
+        start_x = 1 + rng.randint(0, grid_w - rw - 1)
+        start_y = 1 + rng.randint(0, grid_h - rh - 1)
         add_room(start_x, start_y, rw, rh)
 
     return walls
 
 
 def random_open_position(
-    width: int, height: int, walls: List[WallState]
+    width: int,
+    height: int,
+    walls: List[WallState],
+    grid: WallGrid | None = None,
+    rng: Rng | None = None,
 ) -> Tuple[float, float]:
-    """Return a random position not colliding with walls."""
+    """Return a random position not colliding with walls.
 
-    attempts = 0
-    while True:
-        x = random.random() * width
-        y = random.random() * height
-        colliding = any(
-            w.x <= x <= w.x + w.size and w.y <= y <= w.y + w.size for w in walls
-        )
-        if not colliding or attempts > 20:
-            return x, y
-        attempts += 1
+    A free cell is drawn from the grid's list of empty cells, so the cost
+    does not depend on how crowded the map is.
+
+    Raises
+    ------
+    ValueError
+        If every cell of the map contains a wall.
+    """
+
+    grid = _ensure_grid(width, height, walls, grid)
+    rng = _rng(rng)
+    cell = grid.random_free_cell(rng)
+    if cell is None:
+        raise ValueError("no open cell left on the map")
+    return grid.point_in_cell(*cell, rng)
 
 
 def create_container(x: float, y: float) -> ContainerState:
@@ -156,44 +197,98 @@ def create_container(x: float, y: float) -> ContainerState:
 
 
 def spawn_containers(
-    width: int, height: int, walls: List[WallState], count: int = 3
+    width: int,
+    height: int,
+    walls: List[WallState],
+    count: int = 3,
+    grid: WallGrid | None = None,
+    rng: Rng | None = None,
 ) -> List[ContainerState]:
+    grid = _ensure_grid(width, height, walls, grid)
     containers = []
     for _ in range(count):
-        px, py = random_open_position(width, height, walls)
+        px, py = random_open_position(width, height, walls, grid, rng)
         containers.append(create_container(px, py))
     return containers
 
 
-def create_spawn_door(width: int, height: int, walls: List[WallState]) -> DoorState:
-    door = None
-    inside = None
-    while True:
-        edge = random.randint(0, 3)
-        if edge == 0:
-            door = {"x": random.random() * width, "y": 0}
-            inside = {"x": door["x"], "y": SEGMENT_SIZE}
-        elif edge == 1:
-            door = {"x": random.random() * width, "y": height}
-            inside = {"x": door["x"], "y": height - SEGMENT_SIZE}
-        elif edge == 2:
-            door = {"x": 0, "y": random.random() * height}
-            inside = {"x": SEGMENT_SIZE, "y": door["y"]}
-        else:
-            door = {"x": width, "y": random.random() * height}
-            inside = {"x": width - SEGMENT_SIZE, "y": door["y"]}
-        colliding = any(
-            wall.x <= door["x"] <= wall.x + wall.size
-            and wall.y <= door["y"] <= wall.y + wall.size
-            for wall in walls
-        ) or any(
-            wall.x <= inside["x"] <= wall.x + wall.size
-            and wall.y <= inside["y"] <= wall.y + wall.size
-            for wall in walls
-        )
-        if not colliding:
+def _door_candidates(
+    width: int, height: int, grid: WallGrid
+) -> List[Tuple[int, int]]:
+    """Return ``(edge, index)`` pairs of the edge cells that can hold the door.
+
+    ``edge`` is 0 top, 1 bottom, 2 left and 3 right and ``index`` counts cells
+    along that edge.
+    """
+
+    return [
+        (edge, idx)
+        for edge in range(4)
+        for idx in range(grid.grid_w if edge < 2 else grid.grid_h)
+        if _door_fits(edge, idx, width, height, grid)
+    ]
+
+
+def _door_fits(edge: int, idx: int, width: int, height: int, grid: WallGrid) -> bool:
+    """Return ``True`` if the door can go in cell ``idx`` of ``edge``.
+
+    Neither the door point on the edge nor the point one segment inside the
+    map may touch a wall. Points are tested at the cell centre along the edge;
+    any point strictly inside the same cell gives the same answer.
+    """
+
+    door, inside = _door_points(edge, (idx + 0.5) * SEGMENT_SIZE, width, height)
+    return not grid.collides(*door) and not grid.collides(*inside)
+
+
+def _door_points(
+    edge: int, along: float, width: int, height: int
+) -> Tuple[Tuple[float, float], Tuple[float, float]]:
+    if edge == 0:
+        return (along, 0), (along, SEGMENT_SIZE)
+    if edge == 1:
+        return (along, height), (along, height - SEGMENT_SIZE)
+    if edge == 2:
+        return (0, along), (SEGMENT_SIZE, along)
+    return (width, along), (width - SEGMENT_SIZE, along)
+
+
+def create_spawn_door(
+    width: int,
+    height: int,
+    walls: List[WallState],
+    grid: WallGrid | None = None,
+    rng: Rng | None = None,
+) -> DoorState:
+    """Place the zombie spawn door on a random open stretch of the map edge.
+
+    A few random edge cells are tried first. If they are all blocked the
+    door is drawn from the full list of valid edge cells, so the cost is
+    bounded by the map perimeter.
+
+    Raises
+    ------
+    ValueError
+        If walls block every cell along the edges.
+    """
+
+    grid = _ensure_grid(width, height, walls, grid)
+    rng = _rng(rng)
+    for _ in range(DOOR_ATTEMPTS):
+        edge = rng.randint(0, 3)
+        cells = grid.grid_w if edge < 2 else grid.grid_h
+        idx = rng.randrange(cells) if cells else 0
+        if cells and _door_fits(edge, idx, width, height, grid):
             break
-    return DoorState(x=door["x"], y=door["y"])
+    else:
+        candidates = _door_candidates(width, height, grid)
+        if not candidates:
+            raise ValueError("no open edge cell for the spawn door")
+        edge, idx = rng.choice(candidates)
+    along = idx * SEGMENT_SIZE + CELL_MARGIN
+    along += rng.random() * (SEGMENT_SIZE - 2 * CELL_MARGIN)
+    (x, y), _ = _door_points(edge, along, width, height)
+    return DoorState(x=x, y=y)
 
 
 def create_zombie(x: float, y: float, variant: str = "normal") -> ZombieState:
@@ -207,27 +302,33 @@ def spawn_zombie_wave(
     height: int,
     variant: str = "normal",
     walls: List[WallState] | None = None,
+    grid: WallGrid | None = None,
+    rng: Rng | None = None,
 ) -> List[ZombieState]:
-    walls = walls or []
+    grid = _ensure_grid(width, height, walls or [], grid)
+    rng = _rng(rng)
     spawn_x = min(max(door.x, 1), width - 1)
     spawn_y = min(max(door.y, 1), height - 1)
     zombies: List[ZombieState] = []
     for _ in range(count):
-        attempts = 0
-        while True:
-            angle = random.random() * math.pi * 2
-            dist = random.random() * (SEGMENT_SIZE / 2)
+        for _ in range(ZOMBIE_SPAWN_ATTEMPTS):
+            angle = rng.random() * math.pi * 2
+            dist = rng.random() * (SEGMENT_SIZE / 2)
             pos_x = min(max(spawn_x + math.cos(angle) * dist, 1), width - 1)
             pos_y = min(max(spawn_y + math.sin(angle) * dist, 1), height - 1)
-            if not any(
-                w.x <= pos_x <= w.x + w.size and w.y <= pos_y <= w.y + w.size
-                for w in walls
-            ) and not any(math.hypot(z.x - pos_x, z.y - pos_y) < 10 for z in zombies):
-                zombies.append(create_zombie(pos_x, pos_y, variant))
+            if not grid.collides(pos_x, pos_y) and not any(
+                math.hypot(z.x - pos_x, z.y - pos_y) < 10 for z in zombies
+            ):
                 break
-            attempts += 1
-            if attempts > 20:
+        else:
+            # The door is crowded; fall back to the closest open cell.
+            cell = grid.nearest_free_cell(
+                int(spawn_x // SEGMENT_SIZE), int(spawn_y // SEGMENT_SIZE), rng
+            )
+            if cell is None:
                 break
+            pos_x, pos_y = grid.point_in_cell(*cell, rng)
+        zombies.append(create_zombie(pos_x, pos_y, variant))
     return zombies
 
 
@@ -237,23 +338,79 @@ def spawn_zombie_wave(
 
 
 def generate_world(
-    width: int, height: int
-) -> Tuple[List[WallState], List[ZombieState], List[ContainerState], DoorState]:
-    """Create walls, zombies, containers and a spawn door."""
+    width: int, height: int, rng: Rng | None = None
+) -> Tuple[
+    List[WallState], List[ZombieState], List[ContainerState], DoorState, WallGrid
+]:
+    """Create walls, zombies, containers, a spawn door and the wall grid.
+
+    Every random choice is drawn from ``rng`` so a ``random.Random`` seeded
+    with the same value always produces the same world.
+    """
 
-    walls = generate_store_walls(width, height)
-    door = create_spawn_door(width, height, walls)
-    zombies = spawn_zombie_wave(ZOMBIE_WAVE_SIZE, door, width, height, "normal", walls)
-    containers = spawn_containers(width, height, walls)
-    return walls, zombies, containers, door
+    walls = generate_store_walls(width, height, rng)
+    grid = WallGrid.from_walls(width, height, walls)
+    door = create_spawn_door(width, height, walls, grid, rng)
+    zombies = spawn_zombie_wave(
+        ZOMBIE_WAVE_SIZE, door, width, height, "normal", walls, grid, rng
+    )
+    containers = spawn_containers(width, height, walls, grid=grid, rng=rng)
+    return walls, zombies, containers, door, grid
 
 
 def spawn_player(
-    width: int, height: int, walls: List[WallState]
+    width: int,
+    height: int,
+    walls: List[WallState],
+    grid: WallGrid | None = None,
+    rng: Rng | None = None,
 ) -> Tuple[float, float]:
     """Return a random open position for a new player."""
 
-    return random_open_position(width, height, walls)
+    return random_open_position(width, height, walls, grid, rng)
+
+
+def move_player(
+    x: float,
+    y: float,
+    dx: float,
+    dy: float,
+    width: int,
+    height: int,
+    grid: WallGrid,
+) -> Tuple[float, float]:
+    """Return the position after one player move of ``(dx, dy)`` from ``(x, y)``.
+
+    This is the server's authoritative movement step. Each axis is resolved
+    separately, x first, so a player sliding along a wall keeps the free
+    component of the move. A component is rejected when it would leave the
+    map or enter a wall. The function has no side effects, so clients and
+    tools can replay unacknowledged inputs with exactly the server's result.
+
+    Parameters
+    ----------
+    x, y:
+        Current position.
+    dx, dy:
+        Requested displacement.
+    width, height:
+        World size in pixels.
+    grid:
+        Wall occupancy used for collision tests.
+
+    Returns
+    -------
+    tuple[float, float]
+        The resolved position.
+    """
+
+    new_x = x + dx
+    if 0 <= new_x <= width and not grid.collides(new_x, y):
+        x = new_x
+    new_y = y + dy
+    if 0 <= new_y <= height and not grid.collides(x, new_y):
+        y = new_y
+    return x, y
 
 
 def find_path(
@@ -263,6 +420,7 @@ def find_path(
     width: int,
     height: int,
     dynamic_blocks: List[Tuple[int, int]] | None = None,
+    grid: WallGrid | None = None,
 ) -> List[Tuple[int, int]]:
     """Return a grid path from ``start`` to ``goal`` avoiding walls.
 
@@ -280,6 +438,8 @@ def find_path(
         World height in pixels.
     dynamic_blocks : list[tuple[int, int]] | None, optional
         Additional temporary obstacles such as other zombies.
+    grid : WallGrid | None, optional
+        Prebuilt occupancy grid for ``walls``. Built on demand when omitted.
 
     Returns
     -------
@@ -295,9 +455,8 @@ def find_path(
     gx = int(goal.x // SEGMENT_SIZE)
     gy = int(goal.y // SEGMENT_SIZE)
 
-    blocked = {(int(w.x // SEGMENT_SIZE), int(w.y // SEGMENT_SIZE)) for w in walls}
-    if dynamic_blocks:
-        blocked.update(dynamic_blocks)
+    grid = _ensure_grid(width, height, walls, grid)
+    blocked = set(dynamic_blocks) if dynamic_blocks else set()
 
     queue: List[Tuple[int, int]] = [(sx, sy)]
     came_from: dict[Tuple[int, int], Tuple[int, int] | None] = {(sx, sy): None}
@@ -311,7 +470,7 @@ def find_path(
             nx, ny = cx + dx, cy + dy
             if nx < 0 or ny < 0 or nx >= grid_w or ny >= grid_h:
                 continue
-            if (nx, ny) in blocked or (nx, ny) in came_from:
+            if grid.blocked(nx, ny) or (nx, ny) in blocked or (nx, ny) in came_from:
                 continue
             came_from[(nx, ny)] = (cx, cy)
             queue.append((nx, ny))
@@ -333,41 +492,60 @@ def update_zombies(
     walls: List[WallState],
     width: int,
     height: int,
+    flow_field: FlowField | None = None,
+    grid: WallGrid | None = None,
+    player_index: SpatialHash | None = None,
+    zombie_cells: CellCounts | None = None,
 ) -> None:
-    """Move zombies toward the nearest player using basic pathfinding."""
+    """Move zombies toward the nearest player using a shared flow field.
+
+    ``flow_field``, ``grid``, ``player_index`` and ``zombie_cells`` are
+    normally owned by the session so the distance map, wall occupancy, player
+    buckets and zombie counts can be reused across ticks. When omitted
+    temporary ones are built. Zombie cell counts are filled once at the start
+    of the tick, so every zombie avoids the cells other zombies occupied
+    before anyone moved and avoiding them costs O(1) per zombie. Using the
+    start-of-tick occupancy also lets :mod:`app.game.vectorized` step all
+    zombies at once with identical results.
+    """
 
     if not players:
         return
 
-    for idx, z in enumerate(zombies):
-        target = min(players, key=lambda p: (p.x - z.x) ** 2 + (p.y - z.y) ** 2)
-        dynamic_blocks = {
-            (int(o.x // SEGMENT_SIZE), int(o.y // SEGMENT_SIZE))
-            for i, o in enumerate(zombies)
-            if i != idx
-        }
-        path = find_path(z, target, walls, width, height, list(dynamic_blocks))
-        if len(path) >= 2:
-            nx, ny = path[1]
+    grid = _ensure_grid(width, height, walls, grid)
+    if flow_field is None:
+        flow_field = FlowField(width, height)
+    flow_field.update(players, grid)
+    if player_index is None:
+        player_index = SpatialHash()
+    player_index.sync(players)
+    if zombie_cells is None:
+        zombie_cells = CellCounts(width, height)
+    zombie_cells.fill(zombies)
+
+    for z in zombies:
+        cell = (int(z.x // SEGMENT_SIZE), int(z.y // SEGMENT_SIZE))
+        step_cell = flow_field.next_step(cell[0], cell[1], zombie_cells.others(cell))
+        if step_cell is not None:
+            nx, ny = step_cell
             target_x = nx * SEGMENT_SIZE + SEGMENT_SIZE / 2
             target_y = ny * SEGMENT_SIZE + SEGMENT_SIZE / 2
         else:
+            target = player_index.nearest(z.x, z.y)
             target_x = target.x
             target_y = target.y
 
         dx = target_x - z.x
         dy = target_y - z.y
-        dist = math.hypot(dx, dy)
+        # Same formula as the vectorized kernel; math.hypot rounds differently.
+        dist = math.sqrt(dx * dx + dy * dy)
         if dist == 0:
             continue
 
         step = 1.0
         new_x = z.x + (dx / dist) * step
         new_y = z.y + (dy / dist) * step
-        colliding = any(
-            w.x <= new_x <= w.x + w.size and w.y <= new_y <= w.y + w.size for w in walls
-        )
-        if not colliding:
+        if not grid.collides(new_x, new_y):
             z.x = max(0, min(width, new_x))
             z.y = max(0, min(height, new_y))
         z.facing_x = dx / dist
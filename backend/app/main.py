@@ -1,23 +1,58 @@
 """FastAPI application with a background game loop."""
 
 import asyncio
+import os
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from .api import routes_health, websocket_routes, routes_game
+from .game import sharding
+from .game.journal import JournalFlusher, journal_dir
+from .game.lifecycle import Checkpointer, SessionReaper, session_store
 from .game.manager import manager
+from .game.scheduler import SessionScheduler
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Start background tasks when the application starts."""
-
-    task = asyncio.create_task(game_loop())
+    """Start background tasks when the application starts.
+
+    Setting ``GAME_WORKERS`` to a positive number runs sessions in that many
+    worker processes instead, see :mod:`app.game.sharding`. If
+    ``GAME_SESSION_DIR`` is set, sessions are saved there when idle,
+    periodically and on shutdown, and those running at shutdown are restored
+    on startup, see :mod:`app.game.lifecycle`. Setting ``GAME_JOURNAL_DIR``
+    journals the inputs of new sessions there, see :mod:`app.game.journal`.
+    """
+
+    workers = int(os.environ.get("GAME_WORKERS", "0"))
+    tasks = [asyncio.create_task(manager.loop_monitor.run())]
+    if workers > 0:
+        sharding.router = sharding.ShardRouter(workers)
+        sharding.router.start()
+    else:
+        manager.store = session_store()
+        manager.journal_dir = journal_dir()
+        manager.restore_checkpoint()
+        tasks += [
+            asyncio.create_task(game_loop()),
+            asyncio.create_task(manager.templates.run()),
+            asyncio.create_task(SessionReaper(manager).run()),
+            asyncio.create_task(Checkpointer(manager).run()),
+            asyncio.create_task(JournalFlusher(manager).run()),
+        ]
     try:
         yield
     finally:
-        task.cancel()
+        for task in tasks:
+            task.cancel()
+        if workers <= 0:
+            manager.checkpoint()
+            manager.close_journals()
+        if sharding.router is not None:
+            sharding.router.stop()
+            sharding.router = None
 
 
 app = FastAPI(lifespan=lifespan)
@@ -38,19 +73,13 @@ app.add_middleware(
 
 
 async def game_loop() -> None:
-    """Continuously broadcast the authoritative game state to all clients."""
-
-    while True:
-        for session in manager.get_all_sessions().values():
-            session.update_world()
-            state = session.get_game_state().dict()
-            for websocket in list(session.get_connections().values()):
-                try:
-                    await websocket.send_json(state)
-                except Exception:
-                    # Ignore send errors; connection cleanup happens elsewhere
-                    pass
-        await asyncio.sleep(1 / 60)
+    """Tick every session at a fixed rate and broadcast its state.
+
+    Each session runs as its own task so a heavy session cannot delay the
+    others' tick schedule.
+    """
+
+    await SessionScheduler(manager).run()
 
 
 app.include_router(routes_health.router)
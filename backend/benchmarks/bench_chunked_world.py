@@ -0,0 +1,67 @@
+"""Measure memory and tick time of a chunked world as a player explores it.
+
+Run from the ``backend`` directory::
+
+    python benchmarks/bench_chunked_world.py
+
+A single player walks in a straight line across a 40960x40960 chunked world.
+Every few hundred ticks the script prints the loaded and evicted chunk counts, the
+Python heap traced since the session was created and the mean tick time.
+Memory tracks the chunks around the player rather than the map size.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.game.manager import GameSession
+from app.game.models import PlayerState
+
+STEP = 8
+REPORT_EVERY = 300
+TICKS = 3000
+
+
+def walk(trace: bool):
+    """Yield ``(tick, chunk stats, heap MB, tick ms)`` every report window."""
+
+    if trace:
+        tracemalloc.start()
+    session = GameSession(seed=1, chunked=True)
+    player = PlayerState(x=session.state.door.x, y=session.state.door.y)
+    session.state.players["p"] = player
+    start = time.perf_counter()
+    for tick in range(1, TICKS + 1):
+        player.x = min(player.x + STEP, session.state.width - 1)
+        session.update_world()
+        if tick % REPORT_EVERY == 0:
+            tick_ms = (time.perf_counter() - start) / REPORT_EVERY * 1000
+            heap = tracemalloc.get_traced_memory()[0] / 1e6 if trace else 0.0
+            yield tick, session.chunks.to_dict(), heap, tick_ms
+            start = time.perf_counter()
+    if trace:
+        tracemalloc.stop()
+
+
+def main() -> None:
+    # Tracing slows Python down, so time and memory come from separate runs
+    # of the same seeded walk.
+    timings = [tick_ms for *_, tick_ms in walk(trace=False)]
+    print(
+        f"{'tick':>6} {'loaded':>7} {'evicted':>8} {'blob KB':>8}"
+        f" {'heap MB':>8} {'tick ms':>8}"
+    )
+    for (tick, chunks, heap, _), tick_ms in zip(walk(trace=True), timings):
+        print(
+            f"{tick:>6} {chunks['loaded']:>7} {chunks['evicted']:>8}"
+            f" {chunks['evicted_bytes'] / 1024:>8.1f} {heap:>8.2f} {tick_ms:>8.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
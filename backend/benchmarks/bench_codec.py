@@ -0,0 +1,93 @@
+"""Compare JSON and MessagePack encodings of per-tick state messages.
+
+Run from the ``backend`` directory::
+
+    python benchmarks/bench_codec.py
+
+A session with a zombie horde and a few players is stepped for a number of
+ticks. For the full state and for deltas the script reports the mean encoded
+bytes per tick and the encode time per tick of the default JSON path
+(``state_to_dict`` plus pydantic's JSON encoder), the previous
+``json.dumps`` path and the binary codec from ``app.game.codec``.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.game.broadcast import encode_message
+from app.game.codec import HAS_MSGPACK, BinaryCodec
+from app.game.manager import GameSession
+from app.game.models import PlayerState, ZombieState
+from app.game.schema import state_to_dict
+from app.game.world import random_open_position
+
+PLAYERS = 4
+ZOMBIES = 300
+TICKS = 60
+
+
+def build_session() -> GameSession:
+    rng = random.Random(1)
+    session = GameSession(seed=1)
+    width, height = session.state.width, session.state.height
+    grid = session.wall_grid
+    walls = session.state.walls
+    for idx in range(PLAYERS):
+        x, y = random_open_position(width, height, walls, grid, rng)
+        session.state.players[f"p{idx}"] = PlayerState(x=x, y=y)
+    session.state.zombies = [
+        ZombieState(x=x, y=y)
+        for x, y in (
+            random_open_position(width, height, walls, grid, rng)
+            for _ in range(ZOMBIES)
+        )
+    ]
+    return session
+
+
+def record(delta: bool) -> list:
+    """Return the messages of ``TICKS`` consecutive ticks."""
+
+    session = build_session()
+    session.sync.delta(session.state, session.tick)
+    messages = []
+    for _ in range(TICKS):
+        session.update_world()
+        if delta:
+            messages.append(session.sync.delta(session.state, session.tick))
+        else:
+            messages.append(state_to_dict(session.state))
+    return messages
+
+
+def measure(messages: list, encode) -> tuple[float, float]:
+    start = time.perf_counter()
+    sizes = [len(encode(message)) for message in messages]
+    elapsed = time.perf_counter() - start
+    return sum(sizes) / len(sizes), elapsed / len(messages) * 1000
+
+
+def main() -> None:
+    codecs = [("pydantic json", encode_message), ("json.dumps", json.dumps)]
+    if HAS_MSGPACK:
+        codecs.append(("msgpack", BinaryCodec().encode))
+    else:
+        print("msgpack is not installed; skipping the binary codec")
+    print(f"{PLAYERS} players, {ZOMBIES} zombies, {TICKS} ticks")
+    print(f"{'message':>8} {'encoding':>14} {'bytes/tick':>11} {'encode ms':>10}")
+    for label, delta in (("full", False), ("delta", True)):
+        messages = record(delta)
+        for name, encode in codecs:
+            size, ms = measure(messages, encode)
+            print(f"{label:>8} {name:>14} {size:>11.0f} {ms:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
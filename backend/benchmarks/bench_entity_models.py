@@ -0,0 +1,113 @@
+"""Compare slotted state objects with the Pydantic wire schema.
+
+Run from the ``backend`` directory::
+
+    python benchmarks/bench_entity_models.py
+
+The first table reports the memory held by one instance of each entity type
+as a slotted simulation object and as its Pydantic schema model. The second
+times the hot per-tick operations on a horde of zombies: moving every zombie
+(attribute writes) and converting the horde to wire dictionaries. The last
+line times a full ``GameSession.update_world`` tick.
+"""
+
+from __future__ import annotations
+
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.game.manager import GameSession
+from app.game.models import PlayerState, ZombieState
+from app.game.schema import (
+    PlayerSchema,
+    WallSchema,
+    ZombieSchema,
+    player_to_dict,
+    wall_to_dict,
+    zombie_to_dict,
+)
+from app.game.world import create_wall, random_open_position
+
+INSTANCES = 2000
+ZOMBIES = 500
+PLAYERS = 4
+TICKS = 100
+
+
+def bytes_per_instance(factory) -> float:
+    tracemalloc.start()
+    objects = [factory() for _ in range(INSTANCES)]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objects
+    return current / INSTANCES
+
+
+def time_ms(func, repeat: int = TICKS) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def move_all(zombies) -> None:
+    for z in zombies:
+        z.x += 0.5
+        z.y -= 0.5
+        z.facing_x = 0.6
+        z.facing_y = 0.8
+
+
+def main() -> None:
+    random.seed(1)
+    entities = (
+        ("zombie", lambda: ZombieState(x=1.0, y=2.0), zombie_to_dict, ZombieSchema),
+        ("wall", lambda: create_wall(1, 1, "wood"), wall_to_dict, WallSchema),
+        ("player", lambda: PlayerState(x=1.0, y=2.0), player_to_dict, PlayerSchema),
+    )
+    print(f"{'entity':>8} {'slotted B':>10} {'schema B':>10}")
+    for name, factory, to_dict, schema in entities:
+        sample = to_dict(factory(), 0)
+        slotted = bytes_per_instance(factory)
+        model = bytes_per_instance(lambda: schema.model_validate(sample))
+        print(f"{name:>8} {slotted:>10.0f} {model:>10.0f}")
+
+    zombies = [ZombieState(x=100.0, y=100.0) for _ in range(ZOMBIES)]
+    schemas = [ZombieSchema.model_validate(zombie_to_dict(z, 0)) for z in zombies]
+    print()
+    print(f"{ZOMBIES} zombies    {'slotted ms':>10} {'schema ms':>10}")
+    print(
+        f"{'move':>12} {time_ms(lambda: move_all(zombies)):>10.3f}"
+        f" {time_ms(lambda: move_all(schemas)):>10.3f}"
+    )
+    print(
+        f"{'to wire':>12}"
+        f" {time_ms(lambda: [zombie_to_dict(z, 0) for z in zombies]):>10.3f}"
+        f" {time_ms(lambda: [z.model_dump() for z in schemas]):>10.3f}"
+    )
+
+    session = GameSession()
+    width, height = session.state.width, session.state.height
+    grid = session.wall_grid
+    walls = session.state.walls
+    for idx in range(PLAYERS):
+        x, y = random_open_position(width, height, walls, grid)
+        session.state.players[f"p{idx}"] = PlayerState(x=x, y=y)
+    session.state.zombies = [
+        ZombieState(x=x, y=y)
+        for x, y in (
+            random_open_position(width, height, walls, grid) for _ in range(ZOMBIES)
+        )
+    ]
+    session.update_world()
+    print()
+    print(f"update_world with {ZOMBIES} zombies: {time_ms(session.update_world):.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Compare finding a loot target by scanning with the interactables index.
+
+Run from the ``backend`` directory::
+
+    python benchmarks/bench_interactables.py
+
+For maps of growing size, times ``QUERIES`` shelf lookups made the way
+``start_looting`` used to, walking every wall until one is in range, and
+container lookups walking the container list for an id, against
+:class:`app.game.interactables.InteractableIndex`, which checks only the
+cells around the player and finds containers by id in a dict. Query points
+are placed next to random shelves, as a player pressing the loot key is.
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.game.interactables import wall_distance
+from app.game.manager import INTERACT_RANGE, GameSession
+from app.game.templates import WorldTemplate
+
+SIZES = ((2400, 1600), (4800, 3200), (9600, 6400), (19200, 12800))
+QUERIES = 2_000
+
+
+def scan_shelf(walls, x: float, y: float):
+    for w in walls:
+        if not w.opened and wall_distance(x, y, w) <= INTERACT_RANGE:
+            return w
+    return None
+
+
+def scan_container(containers, cid: str):
+    for c in containers:
+        if c.id == cid:
+            return c
+    return None
+
+
+def main() -> None:
+    rng = random.Random(1)
+    print(
+        f"{'map':>10} {'walls':>7} {'scan us':>9} {'index us':>9} "
+        f"{'id scan us':>11} {'id dict us':>11}"
+    )
+    for width, height in SIZES:
+        session = GameSession(template=WorldTemplate(width, height, 1))
+        state = session.state
+        index = session.index_interactables()
+        points = []
+        for wall in rng.choices(state.walls, k=QUERIES):
+            angle = rng.uniform(0, 2 * math.pi)
+            reach = wall.size / 2 + rng.uniform(0, INTERACT_RANGE)
+            points.append(
+                (
+                    wall.x + wall.size / 2 + reach * math.cos(angle),
+                    wall.y + wall.size / 2 + reach * math.sin(angle),
+                )
+            )
+        ids = [c.id for c in rng.choices(state.containers, k=QUERIES)]
+
+        start = time.perf_counter()
+        for x, y in points:
+            scan_shelf(state.walls, x, y)
+        scanned = (time.perf_counter() - start) / QUERIES * 1e6
+        start = time.perf_counter()
+        for x, y in points:
+            index.nearest(x, y, INTERACT_RANGE)
+        indexed = (time.perf_counter() - start) / QUERIES * 1e6
+        start = time.perf_counter()
+        for cid in ids:
+            scan_container(state.containers, cid)
+        id_scanned = (time.perf_counter() - start) / QUERIES * 1e6
+        start = time.perf_counter()
+        for cid in ids:
+            index.container(cid)
+        id_indexed = (time.perf_counter() - start) / QUERIES * 1e6
+        print(
+            f"{width}x{height:<5} {len(state.walls):>7} {scanned:>9.2f} "
+            f"{indexed:>9.2f} {id_scanned:>11.2f} {id_indexed:>11.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
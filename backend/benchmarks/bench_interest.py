@@ -0,0 +1,92 @@
+"""Compare state message size and build time across sync protocols.
+
+Run from the ``backend`` directory::
+
+    python benchmarks/bench_interest.py
+
+A session with a large zombie horde and several players spread over the map
+is stepped for a number of ticks while every player uses one sync protocol.
+For each protocol the script reports the mean encoded bytes one client
+receives per tick and the time spent building and encoding all messages of a
+tick. ``aoi`` rows use the view radius shown in the first column.
+"""
+
+from __future__ import annotations
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.game.broadcast import encode_message
+from app.game.interest import View
+from app.game.manager import SYNC_AOI, SYNC_DELTA, SYNC_FULL, GameSession
+from app.game.models import PlayerState, ZombieState
+from app.game.world import random_open_position
+
+PLAYERS = 8
+ZOMBIES = 500
+TICKS = 60
+VIEW_RADII = (400, 800)
+
+
+def build_session(sync: str, radius: float | None = None) -> GameSession:
+    rng = random.Random(1)
+    session = GameSession(seed=1)
+    width, height = session.state.width, session.state.height
+    grid = session.wall_grid
+    walls = session.state.walls
+    for idx in range(PLAYERS):
+        pid = f"p{idx}"
+        x, y = random_open_position(width, height, walls, grid, rng)
+        session.state.players[pid] = PlayerState(x=x, y=y)
+        session.connections[pid] = None
+        session.sync_modes[pid] = sync
+        session.needs_snapshot.add(pid)
+        if sync == SYNC_AOI:
+            session.views[pid] = View(radius)
+    session.state.zombies = [
+        ZombieState(x=x, y=y)
+        for x, y in (
+            random_open_position(width, height, walls, grid, rng)
+            for _ in range(ZOMBIES)
+        )
+    ]
+    return session
+
+
+def run(sync: str, radius: float | None = None) -> tuple[float, float]:
+    session = build_session(sync, radius)
+    session.state_messages()
+    total_bytes = 0
+    elapsed = 0.0
+    for _ in range(TICKS):
+        session.update_world()
+        start = time.perf_counter()
+        messages = session.state_messages()
+        encoded = {}
+        for message in messages.values():
+            text = encoded.get(id(message))
+            if text is None:
+                text = encode_message(message)
+                encoded[id(message)] = text
+            total_bytes += len(text)
+        elapsed += time.perf_counter() - start
+    return total_bytes / TICKS / PLAYERS, elapsed / TICKS * 1000
+
+
+def main() -> None:
+    print(f"{PLAYERS} players, {ZOMBIES} zombies, {TICKS} ticks")
+    print(f"{'protocol':>12} {'B/client/tick':>14} {'build ms':>9}")
+    rows = [(SYNC_FULL, None), (SYNC_DELTA, None)]
+    rows += [(SYNC_AOI, radius) for radius in VIEW_RADII]
+    for sync, radius in rows:
+        size, ms = run(sync, radius)
+        label = sync if radius is None else f"{sync} {radius}"
+        print(f"{label:>12} {size:>14.0f} {ms:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
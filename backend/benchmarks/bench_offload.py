@@ -0,0 +1,94 @@
+"""Compare event loop lag with sessions simulated inline and on threads.
+
+Run from the ``backend`` directory::
+
+    python benchmarks/bench_offload.py
+
+For each mode the script runs a few sessions with a large horde and one
+delta client each, probes the event loop with a :class:`LoopMonitor` and
+reports the lag percentiles next to the ticks completed per second. Inline
+sessions hold the loop for whole simulation steps; threaded sessions only
+for interpreter lock switches and the final socket writes.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.game.manager import SYNC_DELTA, GameManager
+from app.game.models import ZombieState
+from app.game.scheduler import LoopMonitor, SessionScheduler
+from app.game.world import random_open_position
+
+SESSIONS = 2
+ZOMBIES = 300
+WARMUP = 1.0
+DURATION = 5.0
+
+
+class NullSocket:
+    """Client socket that discards everything sent to it."""
+
+    async def send_text(self, text: str) -> None:
+        pass
+
+    async def send_bytes(self, data: bytes) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+
+def build(threaded: bool) -> GameManager:
+    game = GameManager()
+    for idx in range(SESSIONS):
+        session = game.get_session(
+            game.create_game_session(seed=idx, threaded=threaded)
+        )
+        state = session.state
+        for _ in range(ZOMBIES - len(state.zombies)):
+            x, y = random_open_position(
+                state.width, state.height, state.walls, session.wall_grid
+            )
+            state.zombies.append(ZombieState(x=x, y=y))
+        session.add_player(NullSocket(), SYNC_DELTA)
+    return game
+
+
+async def run(threaded: bool) -> tuple[dict, float]:
+    game = build(threaded)
+    scheduler = asyncio.create_task(SessionScheduler(game).run())
+    await asyncio.sleep(WARMUP)
+    monitor = LoopMonitor()
+    probe = asyncio.create_task(monitor.run())
+    sessions = list(game.get_all_sessions().values())
+    before = sum(s.tick_metrics.ticks for s in sessions)
+    start = time.perf_counter()
+    await asyncio.sleep(DURATION)
+    ticks = sum(s.tick_metrics.ticks for s in sessions) - before
+    rate = ticks / (time.perf_counter() - start)
+    probe.cancel()
+    scheduler.cancel()
+    await asyncio.sleep(0.1)
+    return monitor.to_dict(), rate
+
+
+def main() -> None:
+    print(f"cores: {os.cpu_count()}, sessions: {SESSIONS}, zombies: {ZOMBIES}")
+    print(f"{'mode':>8} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} {'ticks/s':>8}")
+    for threaded in (False, True):
+        lag, rate = asyncio.run(run(threaded))
+        mode = "threaded" if threaded else "inline"
+        print(
+            f"{mode:>8} {lag['p50_ms']:>8.2f} {lag['p99_ms']:>8.2f}"
+            f" {lag['max_ms']:>8.2f} {rate:>8.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Measure saving and restoring a whole game session.
+
+Run from the ``backend`` directory::
+
+    python benchmarks/bench_persistence.py
+
+Builds a session with ``ENTITIES`` walls, zombies, containers and players,
+then times :meth:`GameSession.save`, :meth:`GameSession.load` and an atomic
+write of the save through :class:`SessionStore`. Pickling the same state
+with zlib is shown for comparison.
+"""
+
+from __future__ import annotations
+
+import os
+import pickle
+import sys
+import tempfile
+import time
+import zlib
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.game.manager import GameSession
+from app.game.models import PlayerState, ZombieState
+from app.game.persistence import SessionStore
+from app.game.world import random_open_position
+
+ENTITIES = 1000
+PLAYERS = 8
+RUNS = 50
+
+
+def build() -> GameSession:
+    session = GameSession(seed=1)
+    state = session.state
+    for idx in range(PLAYERS):
+        x, y = random_open_position(
+            state.width, state.height, state.walls, session.wall_grid
+        )
+        player = PlayerState(x=x, y=y)
+        player.inventory = {"nails": idx + 1, "medkit": 1, "wood_planks": 3}
+        state.players[f"player-{idx}"] = player
+    count = len(state.walls) + len(state.containers) + len(state.players)
+    for _ in range(ENTITIES - count - len(state.zombies)):
+        x, y = random_open_position(
+            state.width, state.height, state.walls, session.wall_grid
+        )
+        state.zombies.append(ZombieState(x=x, y=y, triggered=True))
+    for _ in range(10):
+        session.update_world()
+    return session
+
+
+def timed(func, runs: int = RUNS) -> float:
+    start = time.perf_counter()
+    for _ in range(runs):
+        func()
+    return (time.perf_counter() - start) / runs * 1000
+
+
+def main() -> None:
+    session = build()
+    state = session.state
+    print(
+        f"walls: {len(state.walls)}, zombies: {len(state.zombies)}, "
+        f"containers: {len(state.containers)}, players: {len(state.players)}"
+    )
+    blob = session.save()
+    pickled = zlib.compress(pickle.dumps(state, pickle.HIGHEST_PROTOCOL))
+    print(f"{'':>10} {'ms':>8} {'bytes':>8}")
+    print(f"{'save':>10} {timed(session.save):>8.2f} {len(blob):>8}")
+    print(f"{'load':>10} {timed(lambda: GameSession.load(blob)):>8.2f}")
+    with tempfile.TemporaryDirectory() as directory:
+        store = SessionStore(directory)
+        write = timed(lambda: store.save("bench", blob), runs=10)
+        print(f"{'write':>10} {write:>8.2f}")
+
+    def pickle_save() -> None:
+        zlib.compress(pickle.dumps(state, pickle.HIGHEST_PROTOCOL))
+
+    def pickle_load() -> None:
+        pickle.loads(zlib.decompress(pickled))
+
+    print(f"{'pickle':>10} {timed(pickle_save):>8.2f} {len(pickled):>8}")
+    print(f"{'unpickle':>10} {timed(pickle_load):>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Measure simulation throughput of multi-process mode by worker count.
+
+Run from the ``backend`` directory::
+
+    python benchmarks/bench_sharding.py
+
+For each worker count the script starts a :class:`ShardRouter`, creates
+more sessions than one process can tick at 60 Hz, joins one delta client per
+session and counts the ticks all workers complete over a fixed interval.
+Throughput grows with the worker count until the machine runs out of cores;
+the ``cores`` line shows how many this machine has.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.game.scheduler import TICK_RATE
+from app.game.sharding import ShardRouter
+
+WORKER_COUNTS = (1, 2, 4)
+SESSIONS = 120
+WARMUP = 2.0
+DURATION = 5.0
+
+
+class NullSocket:
+    """Client socket that discards everything sent to it."""
+
+    def __init__(self) -> None:
+        self.received = 0
+
+    async def send_text(self, text: str) -> None:
+        self.received += len(text)
+
+    async def send_bytes(self, data: bytes) -> None:
+        self.received += len(data)
+
+    async def close(self) -> None:
+        pass
+
+
+async def total_ticks(router: ShardRouter) -> int:
+    metrics = await router.metrics()
+    return sum(worker["ticks"] for worker in metrics["workers"].values())
+
+
+async def run(workers: int) -> float:
+    router = ShardRouter(workers)
+    router.start()
+    try:
+        for idx in range(SESSIONS):
+            game = await router.create_game(seed=idx)
+            await router.join(game["gameId"], NullSocket(), {"sync": "delta"})
+        await asyncio.sleep(WARMUP)
+        before = await total_ticks(router)
+        start = time.perf_counter()
+        await asyncio.sleep(DURATION)
+        ticks = await total_ticks(router) - before
+        return ticks / (time.perf_counter() - start)
+    finally:
+        router.stop()
+
+
+def main() -> None:
+    print(f"cores: {os.cpu_count()}, sessions: {SESSIONS}")
+    print(f"{'workers':>7} {'ticks/s':>9} {'of target':>10}")
+    target = SESSIONS * TICK_RATE
+    for workers in WORKER_COUNTS:
+        rate = asyncio.run(run(workers))
+        print(f"{workers:>7} {rate:>9.0f} {rate / target:>10.0%}")
+
+
+if __name__ == "__main__":
+    main()
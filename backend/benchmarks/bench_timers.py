@@ -0,0 +1,64 @@
+"""Compare per-tick countdowns with deadlines and a timer wheel.
+
+Run from the ``backend`` directory::
+
+    python benchmarks/bench_timers.py
+
+For ``ENTITIES`` entities with a cooldown each, times one tick of counting
+every cooldown down, as the simulation used to, against advancing a
+:class:`TimerWheel` holding one timer per entity with deadlines spread
+over ``SPREAD`` ticks. The wheel only touches the timers that expire.
+"""
+
+from __future__ import annotations
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.game.models import ZombieState
+from app.game.timers import TimerWheel
+
+ENTITIES = (1_000, 10_000, 100_000)
+SPREAD = 600
+TICKS = 600
+
+
+def countdown(zombies) -> None:
+    for zombie in zombies:
+        if zombie.wander_timer > 0:
+            zombie.wander_timer -= 1
+
+
+def main() -> None:
+    rng = random.Random(1)
+    print(f"{'entities':>10} {'countdown ms':>14} {'wheel ms':>10}")
+    for count in ENTITIES:
+        zombies = [
+            ZombieState(x=0.0, y=0.0, wander_timer=rng.randrange(SPREAD))
+            for _ in range(count)
+        ]
+        start = time.perf_counter()
+        for _ in range(TICKS):
+            countdown(zombies)
+        counted = (time.perf_counter() - start) / TICKS * 1000
+
+        wheel = TimerWheel()
+
+        def expire(zombie) -> None:
+            wheel.schedule(wheel.now + SPREAD, expire, zombie)
+
+        for zombie in zombies:
+            wheel.schedule(rng.randrange(1, SPREAD), expire, zombie)
+        start = time.perf_counter()
+        for tick in range(1, TICKS + 1):
+            wheel.advance(tick)
+        wheeled = (time.perf_counter() - start) / TICKS * 1000
+        print(f"{count:>10} {counted:>14.3f} {wheeled:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
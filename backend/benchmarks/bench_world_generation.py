@@ -0,0 +1,47 @@
+"""Benchmark ``generate_world`` across map sizes.
+
+Run from the ``backend`` directory::
+
+    python benchmarks/bench_world_generation.py
+
+For each size the script reports the mean time of one ``generate_world``
+call, the number of walls generated, and the mean time of one
+``random_open_position`` draw on the resulting map.
+"""
+
+from __future__ import annotations
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.game.world import generate_world, random_open_position
+
+SIZES = ((800, 600), (1600, 1200), (2400, 1600), (4800, 3200), (9600, 6400))
+RUNS = 10
+DRAWS = 10000
+
+
+def main() -> None:
+    print(f"{'size':>10} {'generate ms':>12} {'walls':>7} {'draw us':>8}")
+    for width, height in SIZES:
+        start = time.perf_counter()
+        for seed in range(RUNS):
+            walls, _, _, _, grid = generate_world(width, height, random.Random(seed))
+        generate_ms = (time.perf_counter() - start) / RUNS * 1000
+
+        rng = random.Random(0)
+        start = time.perf_counter()
+        for _ in range(DRAWS):
+            random_open_position(width, height, walls, grid, rng)
+        draw_us = (time.perf_counter() - start) / DRAWS * 1e6
+        print(
+            f"{width}x{height:<5} {generate_ms:>12.2f} {len(walls):>7} {draw_us:>8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
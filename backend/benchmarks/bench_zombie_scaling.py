@@ -0,0 +1,115 @@
+"""Benchmark zombie update cost as the horde grows.
+
+Run from the ``backend`` directory::
+
+    python benchmarks/bench_zombie_scaling.py
+
+For each zombie count the script reports the mean time of one
+``update_zombies`` call and the time per zombie. The ``legacy blocks`` column
+times only the previous approach of building a set of every other zombie's
+cell for each zombie, which grows quadratically. When NumPy is installed the
+``vector ms`` column times the batched kernel from ``app.game.vectorized``.
+"""
+
+from __future__ import annotations
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.game.flowfield import FlowField
+from app.game.grid import CellCounts, WallGrid
+from app.game.models import SEGMENT_SIZE, PlayerState, ZombieState
+from app.game.spatial import SpatialHash
+from app.game.vectorized import HAS_NUMPY, ZombieArrays, update_zombies_vectorized
+from app.game.world import generate_store_walls, random_open_position, update_zombies
+
+WIDTH = 2400
+HEIGHT = 1600
+ZOMBIE_COUNTS = (10, 30, 100, 300, 1000)
+TICKS = 30
+
+
+def legacy_dynamic_blocks(zombies):
+    """The O(Z^2) construction formerly done inside ``update_zombies``."""
+
+    for idx in range(len(zombies)):
+        blocks = {
+            (int(o.x // SEGMENT_SIZE), int(o.y // SEGMENT_SIZE))
+            for i, o in enumerate(zombies)
+            if i != idx
+        }
+        list(blocks)
+
+
+def build_scene(count: int):
+    rng_state = random.getstate()
+    random.seed(count)
+    walls = generate_store_walls(WIDTH, HEIGHT)
+    grid = WallGrid.from_walls(WIDTH, HEIGHT, walls)
+    players = []
+    for _ in range(4):
+        x, y = random_open_position(WIDTH, HEIGHT, walls, grid)
+        players.append(PlayerState(x=x, y=y))
+    zombies = []
+    for _ in range(count):
+        x, y = random_open_position(WIDTH, HEIGHT, walls, grid)
+        zombies.append(ZombieState(x=x, y=y))
+    random.setstate(rng_state)
+    return walls, grid, players, zombies
+
+
+def bench_vectorized(count: int) -> float:
+    walls, grid, players, zombies = build_scene(count)
+    field = FlowField(WIDTH, HEIGHT)
+    player_index = SpatialHash()
+    arrays = ZombieArrays()
+    args = (arrays, zombies, players, WIDTH, HEIGHT, field, grid, player_index, 16)
+    update_zombies_vectorized(*args)
+
+    start = time.perf_counter()
+    for _ in range(TICKS):
+        update_zombies_vectorized(*args)
+    return (time.perf_counter() - start) / TICKS * 1000
+
+
+def bench(count: int) -> tuple[float, float]:
+    walls, grid, players, zombies = build_scene(count)
+    field = FlowField(WIDTH, HEIGHT)
+    player_index = SpatialHash()
+    zombie_cells = CellCounts(WIDTH, HEIGHT)
+    args = (zombies, players, walls, WIDTH, HEIGHT, field, grid)
+    update_zombies(*args, player_index, zombie_cells)
+
+    start = time.perf_counter()
+    for _ in range(TICKS):
+        update_zombies(*args, player_index, zombie_cells)
+    update_ms = (time.perf_counter() - start) / TICKS * 1000
+
+    legacy_ticks = max(1, TICKS // max(1, count // 100))
+    start = time.perf_counter()
+    for _ in range(legacy_ticks):
+        legacy_dynamic_blocks(zombies)
+    legacy_ms = (time.perf_counter() - start) / legacy_ticks * 1000
+    return update_ms, legacy_ms
+
+
+def main() -> None:
+    print(
+        f"{'zombies':>8} {'tick ms':>10} {'us/zombie':>10} "
+        f"{'legacy blocks ms':>18} {'vector ms':>10}"
+    )
+    for count in ZOMBIE_COUNTS:
+        update_ms, legacy_ms = bench(count)
+        vector = f"{bench_vectorized(count):>10.3f}" if HAS_NUMPY else f"{'n/a':>10}"
+        print(
+            f"{count:>8} {update_ms:>10.3f} {update_ms * 1000 / count:>10.2f} "
+            f"{legacy_ms:>18.3f} {vector}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,425 @@
+"""Load test the game server with simulated WebSocket clients.
+
+Run from the ``backend`` directory::
+
+    python benchmarks/load_test.py --sessions 4 --bots 8 --duration 30
+
+Unless ``--url`` points at a running server, the script starts one with
+uvicorn in a child process on a free local port, so everything runs offline
+on one machine. It creates ``--sessions`` games over HTTP and connects
+``--bots`` clients to each. Every bot wanders around sending moves with
+facing and sequence numbers, now and then stops to loot the nearest shelf
+and tries to craft items, while counting the state messages it receives.
+
+After ``--duration`` seconds the report shows tick duration and broadcast
+latency percentiles from the session metrics, the server's event loop lag,
+bytes and messages received per client per second, and the CPU share and
+peak memory of the server processes read from ``/proc``. Each ``--max-*``
+option sets a limit and the script exits with status 1 when one is
+exceeded, so it can gate regressions. ``--json`` prints the report as JSON.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+import websockets
+
+BACKEND = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, BACKEND)
+
+from app.game.scheduler import percentiles
+from app.game.world import CRAFTING_RECIPES
+
+# Inputs each bot sends per second
+INPUT_RATE = 30
+# Pixels a bot asks to move per input
+BOT_SPEED = 3.0
+# Mean seconds between a bot's looting attempts and between craft attempts
+LOOT_INTERVAL = 4.0
+CRAFT_INTERVAL = 6.0
+# Seconds a bot stands still looting before it moves on
+LOOT_DURATION = 1.5
+# Seconds to wait for a started server to answer
+STARTUP_TIMEOUT = 20.0
+# Seconds between samples of the server's memory
+SAMPLE_INTERVAL = 0.5
+
+
+class Bot:
+    """One simulated player that wanders, loots shelves and crafts."""
+
+    def __init__(self, url: str, rng: random.Random) -> None:
+        self.url = url
+        self.rng = rng
+        self.connected = False
+        self.bytes = 0
+        self.messages = 0
+        self.inputs = 0
+        # Milliseconds between consecutive state messages
+        self.gaps_ms: List[float] = []
+        self.error: Optional[str] = None
+
+    async def run(self, stop: asyncio.Event) -> None:
+        """Play until ``stop`` is set, recording any connection error."""
+
+        try:
+            async with websockets.connect(self.url, max_size=None) as ws:
+                await ws.recv()  # welcome
+                self.connected = True
+                receiver = asyncio.create_task(self._receive(ws))
+                try:
+                    await self._play(ws, stop)
+                finally:
+                    receiver.cancel()
+        except (OSError, websockets.WebSocketException) as exc:
+            self.error = repr(exc)
+
+    async def _receive(self, ws: Any) -> None:
+        last = None
+        async for frame in ws:
+            now = time.perf_counter()
+            self.bytes += len(frame)
+            self.messages += 1
+            if last is not None:
+                self.gaps_ms.append((now - last) * 1000)
+            last = now
+
+    async def _play(self, ws: Any, stop: asyncio.Event) -> None:
+        rng = self.rng
+        loop = asyncio.get_running_loop()
+        angle = rng.uniform(0, 2 * math.pi)
+        seq = 0
+        next_loot = loop.time() + rng.expovariate(1 / LOOT_INTERVAL)
+        next_craft = loop.time() + rng.expovariate(1 / CRAFT_INTERVAL)
+        looting_until: Optional[float] = None
+        while not stop.is_set():
+            now = loop.time()
+            if looting_until is not None:
+                if now >= looting_until:
+                    looting_until = None
+                    await self._send(ws, {"action": "cancel_looting"})
+            elif now >= next_loot:
+                looting_until = now + LOOT_DURATION
+                next_loot = now + rng.expovariate(1 / LOOT_INTERVAL)
+                await self._send(ws, {"action": "start_looting"})
+            else:
+                angle += rng.uniform(-0.3, 0.3)
+                seq += 1
+                await self._send(
+                    ws,
+                    {
+                        "action": "move",
+                        "moveX": math.cos(angle) * BOT_SPEED,
+                        "moveY": math.sin(angle) * BOT_SPEED,
+                        "facingX": math.cos(angle),
+                        "facingY": math.sin(angle),
+                        "seq": seq,
+                    },
+                )
+            if now >= next_craft:
+                next_craft = now + rng.expovariate(1 / CRAFT_INTERVAL)
+                item_id = rng.choice(list(CRAFTING_RECIPES))
+                await self._send(ws, {"type": "craft_item", "itemId": item_id})
+            await asyncio.sleep(1 / INPUT_RATE)
+
+    async def _send(self, ws: Any, message: Dict[str, Any]) -> None:
+        await ws.send(json.dumps(message))
+        self.inputs += 1
+
+
+class ProcessSampler:
+    """CPU time and memory of a process and its children from ``/proc``."""
+
+    def __init__(self, pid: int) -> None:
+        self.pid = pid
+        self.clock_ticks = os.sysconf("SC_CLK_TCK")
+        self.peak_rss_kb = 0
+
+    def pids(self) -> List[int]:
+        """Return the process ID and those of all its descendants."""
+
+        found = [self.pid]
+        for pid in found:
+            try:
+                tasks = os.listdir(f"/proc/{pid}/task")
+            except OSError:
+                continue
+            for tid in tasks:
+                try:
+                    with open(f"/proc/{pid}/task/{tid}/children") as fh:
+                        found.extend(int(child) for child in fh.read().split())
+                except OSError:
+                    pass
+        return found
+
+    def cpu_seconds(self) -> float:
+        """Return the user and system CPU time used so far."""
+
+        total = 0
+        for pid in self.pids():
+            try:
+                with open(f"/proc/{pid}/stat") as fh:
+                    fields = fh.read().rsplit(")", 1)[1].split()
+            except OSError:
+                continue
+            total += int(fields[11]) + int(fields[12])
+        return total / self.clock_ticks
+
+    def sample(self) -> int:
+        """Record the current resident memory in kilobytes and return it."""
+
+        rss = 0
+        for pid in self.pids():
+            try:
+                with open(f"/proc/{pid}/status") as fh:
+                    for line in fh:
+                        if line.startswith("VmRSS:"):
+                            rss += int(line.split()[1])
+                            break
+            except OSError:
+                continue
+        self.peak_rss_kb = max(self.peak_rss_kb, rss)
+        return rss
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port: int, workers: int) -> subprocess.Popen:
+    """Start the application with uvicorn on ``port`` in a child process."""
+
+    env = dict(os.environ, GAME_WORKERS=str(workers))
+    command = [
+        sys.executable,
+        "-m",
+        "uvicorn",
+        "app.main:app",
+        "--host",
+        "127.0.0.1",
+        "--port",
+        str(port),
+        "--log-level",
+        "warning",
+    ]
+    return subprocess.Popen(
+        command, cwd=BACKEND, env=env, stdout=subprocess.DEVNULL
+    )
+
+
+async def wait_until_up(client: httpx.AsyncClient) -> None:
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while True:
+        try:
+            if (await client.get("/health")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        if time.monotonic() > deadline:
+            raise RuntimeError("server did not start in time")
+        await asyncio.sleep(0.1)
+
+
+def merge(values: List[Dict[str, float]], key: str) -> float:
+    """Return the largest ``key`` of several percentile summaries."""
+
+    return max((value[key] for value in values), default=0.0)
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    process = None
+    url = args.url
+    if url is None:
+        port = free_port()
+        process = start_server(port, args.workers)
+        url = f"http://127.0.0.1:{port}"
+    sampler = ProcessSampler(process.pid if process else args.pid or 0)
+    rng = random.Random(args.seed)
+    try:
+        async with httpx.AsyncClient(base_url=url, timeout=30) as client:
+            await wait_until_up(client)
+            options = {"sync": args.sync, "encoding": args.encoding}
+            query = "&".join(f"{key}={value}" for key, value in options.items())
+            ws_base = url.replace("http", "ws", 1)
+            games: List[str] = []
+            bots: List[Bot] = []
+            for idx in range(args.sessions):
+                body = {"seed": args.seed + idx, "threaded": args.threaded}
+                game_id = (await client.post("/api/games", json=body)).json()[
+                    "gameId"
+                ]
+                games.append(game_id)
+                for _ in range(args.bots):
+                    bot_url = f"{ws_base}/ws/game/{game_id}?{query}"
+                    bots.append(Bot(bot_url, random.Random(rng.random())))
+
+            stop = asyncio.Event()
+            tasks = [asyncio.create_task(bot.run(stop)) for bot in bots]
+            await asyncio.sleep(args.warmup)
+            for bot in bots:
+                bot.gaps_ms.clear()
+            received = [(bot.bytes, bot.messages, bot.inputs) for bot in bots]
+            cpu_before = sampler.cpu_seconds()
+            start = time.perf_counter()
+            while time.perf_counter() - start < args.duration:
+                sampler.sample()
+                await asyncio.sleep(SAMPLE_INTERVAL)
+            elapsed = time.perf_counter() - start
+            cpu = sampler.cpu_seconds() - cpu_before
+            metrics = [
+                (await client.get(f"/api/games/{game_id}/metrics")).json()
+                for game_id in games
+            ]
+            server = (await client.get("/api/metrics")).json()
+            stop.set()
+            await asyncio.gather(*tasks)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    timing = [session["timing"] for session in metrics]
+    latency = [session["broadcast"]["latency"] for session in metrics]
+    loops = [server["loop"]]
+    loops += [worker["loop"] for worker in server.get("workers", {}).values()]
+    connected = [bot for bot in bots if bot.connected]
+    clients = max(1, len(connected))
+    totals = [
+        (bot.bytes - before[0], bot.messages - before[1], bot.inputs - before[2])
+        for bot, before in zip(bots, received)
+    ]
+    gaps = [gap for bot in bots for gap in bot.gaps_ms]
+    ticks = sum(session["tick"] for session in metrics)
+    return {
+        "sessions": args.sessions,
+        "clients": len(connected),
+        "errors": sorted({bot.error for bot in bots if bot.error}),
+        "duration_s": elapsed,
+        "tick": {
+            **{key: merge(timing, key) for key in ("p50_ms", "p95_ms", "p99_ms")},
+            "max_ms": merge(timing, "max_ms"),
+            "overruns": sum(t["overruns"] for t in timing),
+            "skipped_ticks": sum(t["skipped_ticks"] for t in timing),
+            "ticks": ticks,
+        },
+        "broadcast": {
+            **{key: merge(latency, key) for key in ("p50_ms", "p95_ms", "p99_ms")},
+            "skipped": sum(s["broadcast"]["skipped"] for s in metrics),
+        },
+        "loop": {key: merge(loops, key) for key in ("p50_ms", "p99_ms", "max_ms")},
+        "client": {
+            "bytes_per_s": sum(t[0] for t in totals) / elapsed / clients,
+            "messages_per_s": sum(t[1] for t in totals) / elapsed / clients,
+            "inputs_per_s": sum(t[2] for t in totals) / elapsed / clients,
+            "message_gap": percentiles(gaps),
+        },
+        "server": {
+            "cpu_percent": cpu / elapsed * 100 if sampler.pid else None,
+            "peak_rss_mb": sampler.peak_rss_kb / 1024 if sampler.pid else None,
+        },
+    }
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    tick, broadcast = report["tick"], report["broadcast"]
+    loop, client, server = report["loop"], report["client"], report["server"]
+    print(f"sessions: {report['sessions']}, clients: {report['clients']}")
+    for error in report["errors"]:
+        print(f"bot error: {error}")
+    print(
+        f"tick ms        p50 {tick['p50_ms']:.2f}  p95 {tick['p95_ms']:.2f}"
+        f"  p99 {tick['p99_ms']:.2f}  max {tick['max_ms']:.2f}"
+        f"  overruns {tick['overruns']}  skipped {tick['skipped_ticks']}"
+    )
+    print(
+        f"broadcast ms   p50 {broadcast['p50_ms']:.2f}"
+        f"  p95 {broadcast['p95_ms']:.2f}  p99 {broadcast['p99_ms']:.2f}"
+        f"  skipped sends {broadcast['skipped']}"
+    )
+    print(
+        f"loop lag ms    p50 {loop['p50_ms']:.2f}  p99 {loop['p99_ms']:.2f}"
+        f"  max {loop['max_ms']:.2f}"
+    )
+    gap = client["message_gap"]
+    print(
+        f"per client     {client['bytes_per_s'] / 1024:.1f} KB/s"
+        f"  {client['messages_per_s']:.1f} msg/s"
+        f"  {client['inputs_per_s']:.1f} inputs/s"
+        f"  gap p50 {gap['p50_ms']:.1f} p99 {gap['p99_ms']:.1f} ms"
+    )
+    if server["cpu_percent"] is not None:
+        print(
+            f"server         CPU {server['cpu_percent']:.0f}%"
+            f"  peak RSS {server['peak_rss_mb']:.0f} MB"
+        )
+
+
+def check_limits(report: Dict[str, Any], args: argparse.Namespace) -> List[str]:
+    """Return a line for each ``--max-*`` limit the report exceeds."""
+
+    checks = (
+        ("tick p99 ms", args.max_tick_p99, report["tick"]["p99_ms"]),
+        ("broadcast p99 ms", args.max_broadcast_p99, report["broadcast"]["p99_ms"]),
+        ("loop lag p99 ms", args.max_loop_p99, report["loop"]["p99_ms"]),
+        ("server CPU %", args.max_cpu, report["server"]["cpu_percent"]),
+    )
+    failures = [
+        f"{name} {value:.2f} exceeds {limit}"
+        for name, limit, value in checks
+        if limit is not None and value is not None and value > limit
+    ]
+    if report["errors"]:
+        failures.append(f"{len(report['errors'])} kinds of bot errors")
+    return failures
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=4)
+    parser.add_argument("--bots", type=int, default=8, help="clients per session")
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--warmup", type=float, default=3.0)
+    parser.add_argument("--sync", default="delta", choices=("full", "delta", "aoi"))
+    parser.add_argument("--encoding", default="json", choices=("json", "msgpack"))
+    parser.add_argument("--threaded", action="store_true")
+    parser.add_argument("--workers", type=int, default=0, help="GAME_WORKERS")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--url", help="test a running server instead")
+    parser.add_argument("--pid", type=int, help="server PID to sample with --url")
+    parser.add_argument("--json", action="store_true", help="print JSON")
+    parser.add_argument("--max-tick-p99", type=float)
+    parser.add_argument("--max-broadcast-p99", type=float)
+    parser.add_argument("--max-loop-p99", type=float)
+    parser.add_argument("--max-cpu", type=float)
+    return parser.parse_args(argv)
+
+
+def main() -> None:
+    args = parse_args()
+    report = asyncio.run(run(args))
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+    failures = check_limits(report, args)
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
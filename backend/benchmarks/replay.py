@@ -0,0 +1,102 @@
+"""Replay a session journal headlessly, as fast as possible.
+
+Run from the ``backend`` directory::
+
+    python benchmarks/replay.py /path/to/<game-id>.journal
+
+Journals are written by servers started with ``GAME_JOURNAL_DIR`` set, for
+example under ``benchmarks/load_test.py``. The session is re-created from
+the journal's seed and every recorded join, leave and input is applied at
+its original tick; see :mod:`app.game.journal`. The run reports how much
+faster than real time the journal replays, step time percentiles and the
+final state digest. The exit code is 1 if a digest recorded in the journal
+does not match the replay, or if ``--expect`` is given and the final digest
+differs, so the script doubles as a regression check. ``--profile`` runs
+the replay under :mod:`cProfile` and prints the hottest functions.
+"""
+
+from __future__ import annotations
+
+import argparse
+import cProfile
+import json
+import os
+import pstats
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import app.game.manager  # noqa: F401  loaded here so profiles skip imports
+from app.game.journal import replay, state_digest
+from app.game.scheduler import TICK_RATE, percentiles
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("journal", help="journal file to replay")
+    parser.add_argument("--until", type=int, help="stop at this tick")
+    parser.add_argument("--expect", help="final state digest to compare with")
+    parser.add_argument(
+        "--profile", type=int, metavar="N", nargs="?", const=25,
+        help="profile the replay and print the N hottest functions",
+    )
+    parser.add_argument("--json", action="store_true", help="print JSON")
+    args = parser.parse_args()
+
+    profiler = cProfile.Profile() if args.profile else None
+    if profiler is not None:
+        profiler.enable()
+    result = replay(args.journal, until=args.until)
+    if profiler is not None:
+        profiler.disable()
+
+    digest = state_digest(result.session)
+    simulated = result.ticks / TICK_RATE
+    report = {
+        "ticks": result.ticks,
+        "seconds": result.seconds,
+        "ticks_per_second": result.ticks / result.seconds if result.seconds else 0.0,
+        "speedup": simulated / result.seconds if result.seconds else 0.0,
+        "tick": percentiles(result.tick_ms),
+        "players": len(result.session.state.players),
+        "zombies": len(result.session.state.zombies),
+        "digest": digest,
+        "mismatches": [
+            {"tick": tick, "recorded": recorded, "replayed": replayed}
+            for tick, recorded, replayed in result.mismatches
+        ],
+    }
+    failed = bool(result.mismatches) or (
+        args.expect is not None and args.expect != digest
+    )
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(
+            f"replayed {report['ticks']} ticks ({simulated:.1f} s of play) "
+            f"in {report['seconds']:.2f} s, {report['speedup']:.1f}x real time"
+        )
+        tick = report["tick"]
+        print(
+            f"step p50 {tick['p50_ms']:.3f} ms, p95 {tick['p95_ms']:.3f} ms, "
+            f"p99 {tick['p99_ms']:.3f} ms"
+        )
+        print(f"{report['players']} players, {report['zombies']} zombies")
+        print(f"digest {digest}")
+        for mismatch in report["mismatches"]:
+            print(
+                f"DIVERGED at tick {mismatch['tick']}: recorded "
+                f"{mismatch['recorded']}, replayed {mismatch['replayed']}"
+            )
+        if args.expect is not None and args.expect != digest:
+            print(f"DIVERGED: expected digest {args.expect}")
+    if profiler is not None:
+        pstats.Stats(profiler, stream=sys.stderr).sort_stats(
+            "cumulative"
+        ).print_stats(args.profile)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
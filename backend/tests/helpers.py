@@ -0,0 +1,46 @@
+"""Stand-ins and helpers shared by several test modules."""
+
+import asyncio
+import json
+
+
+class FakeSocket:
+    """Stand-in for a WebSocket that records the frames sent to it.
+
+    ``delay`` makes every text send take that many seconds, like a slow
+    client.
+    """
+
+    def __init__(self, delay: float = 0.0) -> None:
+        self.delay = delay
+        self.sent = []
+        self.closed = False
+
+    @property
+    def messages(self):
+        """Frames sent so far, with text frames decoded from JSON."""
+
+        return [json.loads(m) if isinstance(m, str) else m for m in self.sent]
+
+    async def send_text(self, text: str) -> None:
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.sent.append(text)
+
+    async def send_bytes(self, data: bytes) -> None:
+        self.sent.append(data)
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+def world_layout(session):
+    """Return the wall, zombie, container and door positions of a session."""
+
+    state = session.state
+    return (
+        [(w.x, w.y, w.material) for w in state.walls],
+        [(z.x, z.y) for z in state.zombies],
+        [(c.x, c.y) for c in state.containers],
+        (state.door.x, state.door.y),
+    )
@@ -0,0 +1,62 @@
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.game.broadcast import Broadcaster
+from app.game.manager import SYNC_DELTA, GameSession
+from tests.helpers import FakeSocket
+
+
+def test_state_encoded_once_per_tick(monkeypatch):
+    import app.game.broadcast as broadcast
+
+    calls = []
+    original = broadcast.encode_message
+
+    def counting_encode(message):
+        calls.append(message)
+        return original(message)
+
+    monkeypatch.setattr(broadcast, "encode_message", counting_encode)
+    session = GameSession()
+    sockets = {f"p{i}": FakeSocket() for i in range(5)}
+    session.connections = dict(sockets)
+    asyncio.run(Broadcaster().broadcast(session))
+    assert len(calls) == 1
+    assert all(len(ws.sent) == 1 for ws in sockets.values())
+    assert len({ws.sent[0] for ws in sockets.values()}) == 1
+
+
+def test_slow_client_does_not_stall_tick():
+    session = GameSession()
+    fast, slow = FakeSocket(), FakeSocket(delay=1.0)
+    session.connections = {"fast": fast, "slow": slow}
+    session.sync_modes = {"slow": SYNC_DELTA}
+    broadcaster = Broadcaster(send_timeout=0.01, max_skipped_ticks=3)
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        for _ in range(4):
+            await broadcaster.broadcast(session)
+        return loop.time() - start
+
+    elapsed = asyncio.run(run())
+    assert elapsed < 0.5
+    assert len(fast.sent) == 4
+    assert broadcaster.messages_skipped == 3
+    assert broadcaster.connections_dropped == 1
+    assert "slow" not in session.connections
+
+
+def test_send_latency_percentiles():
+    session = GameSession()
+    sockets = {f"p{i}": FakeSocket() for i in range(3)}
+    session.connections = {**sockets, "slow": FakeSocket(delay=0.02)}
+    broadcaster = Broadcaster(send_timeout=0.1)
+    asyncio.run(broadcaster.broadcast(session))
+    latency = broadcaster.latency()
+    assert len(broadcaster.latency_ms) == 4
+    assert latency["p50_ms"] < 20 <= latency["p99_ms"]
@@ -0,0 +1,195 @@
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.game.chunks import (
+    CHUNK_CELLS,
+    CHUNK_SIZE,
+    EVICT_INTERVAL,
+    EVICT_RADIUS,
+    ChunkGrid,
+    ChunkedWorld,
+    chunk_of,
+    pack_chunk,
+    unpack_chunk,
+)
+from app.game.grid import WallGrid
+from app.game.manager import GameSession, manager
+from app.game.models import ContainerState, PlayerState
+from app.game.persistence import unpack_session
+from app.game.world import create_wall, find_path
+
+
+def _fields(entity):
+    return {
+        name: getattr(entity, name)
+        for name in entity.__dataclass_fields__
+        if name not in ("id", "damage_timer")
+    }
+
+
+def test_pack_round_trip():
+    origin = (CHUNK_SIZE * 2, CHUNK_SIZE)
+    wall = create_wall(origin[0] // 40 + 3, origin[1] // 40 + 15, "steel")
+    wall.hp = 7
+    wall.opened = True
+    wall.item = "nails"
+    box = ContainerState(x=origin[0] + 12.5, y=origin[1] + 600.25, opened=True)
+    box.item = "medkit"
+    walls, containers = unpack_chunk(origin, pack_chunk(origin, [wall], [box]))
+    assert [_fields(w) for w in walls] == [_fields(wall)]
+    assert [_fields(c) for c in containers] == [_fields(box)]
+
+
+def test_chunks_are_deterministic_and_unloaded_cells_block():
+    first = ChunkedWorld(CHUNK_SIZE * 4, CHUNK_SIZE * 4, 11, [], [])
+    second = ChunkedWorld(CHUNK_SIZE * 4, CHUNK_SIZE * 4, 11, [], [])
+    first.load((1, 2))
+    second.load((1, 2))
+    assert [_fields(w) for w in first.walls] == [_fields(w) for w in second.walls]
+    assert all(chunk_of(w.x, w.y) == (1, 2) for w in first.walls)
+    assert first.grid.blocked(0, 0)
+    assert first.grid.collides(10, 10)
+
+
+def test_chunk_grid_matches_flat_grid_across_borders():
+    world = ChunkedWorld(CHUNK_SIZE * 3, CHUNK_SIZE * 3, 4, [], [])
+    world.ensure_loaded([(1, 1)], 1)
+    flat = WallGrid.from_walls(world.width, world.height, world.walls)
+    for gx in range(world.grid.grid_w):
+        for gy in range(world.grid.grid_h):
+            assert world.grid.blocked(gx, gy) == flat.blocked(gx, gy)
+
+    start = PlayerState(x=20, y=20)
+    goal = PlayerState(x=world.width - 20, y=world.height - 20)
+    path = find_path(start, goal, [], world.width, world.height, grid=world.grid)
+    assert path == find_path(start, goal, [], world.width, world.height, grid=flat)
+    assert path
+
+
+def test_chunk_grid_tracks_wall_changes():
+    grid = ChunkGrid(CHUNK_SIZE * 2, CHUNK_SIZE)
+    grid.load_chunk((1, 0), [])
+    wall = create_wall(17, 3)
+    grid.add(wall)
+    assert grid.blocked(17, 3)
+    grid.remove(wall)
+    assert not grid.blocked(17, 3)
+    assert grid.blocked(3, 3)
+
+
+def test_chunk_grid_supports_inherited_queries():
+    wall = create_wall(17, 3)
+    grid = ChunkGrid.from_walls(CHUNK_SIZE * 2, CHUNK_SIZE, [])
+    grid.load_chunk((1, 0), [wall])
+    free = grid._free_cells()
+    assert len(free) == grid.free_count() == CHUNK_CELLS * CHUNK_CELLS - 1
+    assert all(not grid.blocked(i % grid.grid_w, i // grid.grid_w) for i in free)
+    rng = random.Random(1)
+    assert grid.nearest_free_cell(17, 3, rng) != (17, 3)
+    assert grid.nearest_free_cell(2, 2, rng)[0] >= CHUNK_CELLS
+    copied = grid.copy()
+    copied.remove(wall)
+    assert grid.blocked(17, 3) and not copied.blocked(17, 3)
+    with pytest.raises(TypeError):
+        grid.cells
+
+    with pytest.raises(ValueError):
+        GameSession(chunked=True, vectorized=True)
+    saved = unpack_session(GameSession(seed=5, chunked=True).save())
+    with pytest.raises(ValueError):
+        GameSession(vectorized=True, saved=saved)
+
+
+def test_session_loads_evicts_and_restores_chunks():
+    session = GameSession(seed=5, chunked=True)
+    world = session.chunks
+    assert session.state.width == world.width
+    assert chunk_of(session.state.door.x, session.state.door.y) == world.home
+    player = PlayerState(x=session.state.door.x, y=session.state.door.y)
+    session.state.players["p"] = player
+    # Keep the starting zombies from holding chunks open.
+    session.state.zombies = []
+
+    def run():
+        for _ in range(EVICT_INTERVAL):
+            session.update_world()
+
+    player.x += CHUNK_SIZE * 10
+    run()
+    away = chunk_of(player.x, player.y)
+    assert away in world.loaded
+    opened = next(c for c in session.state.containers if chunk_of(c.x, c.y) == away)
+    opened.opened = True
+
+    player.y += CHUNK_SIZE * 10
+    run()
+    assert away in world.evicted
+    assert world.evictions > 0
+    assert len(world.loaded) <= 18
+    assert all(chunk_of(w.x, w.y) in world.loaded for w in session.state.walls)
+    assert opened not in session.state.containers
+
+    player.y -= CHUNK_SIZE * 10
+    run()
+    assert world.restored > 0
+    restored = [
+        c for c in session.state.containers if (c.x, c.y) == (opened.x, opened.y)
+    ]
+    assert restored and restored[0].opened
+
+
+def test_unchanged_chunks_are_regenerated_and_blobs_are_capped():
+    world = ChunkedWorld(CHUNK_SIZE * 12, CHUNK_SIZE * 12, 3, [], [])
+    world.start(random.Random(1))
+    chunks = [(cx, 0) for cx in range(8)]
+    world.ensure_loaded(chunks, 0)
+    for container in world.containers:
+        if chunk_of(container.x, container.y) in chunks[2:]:
+            container.opened = True
+    # Room for the blobs of the last three chunks
+    world.evicted_limit = sum(
+        len(
+            pack_chunk(
+                world.origin(chunk),
+                [w for w in world.walls if chunk_of(w.x, w.y) == chunk],
+                [c for c in world.containers if chunk_of(c.x, c.y) == chunk],
+            )
+        )
+        for chunk in chunks[5:]
+    )
+    far = (world.home[0] * CHUNK_SIZE, (world.home[1] + EVICT_RADIUS) * CHUNK_SIZE)
+    player = PlayerState(x=far[0], y=far[1] + CHUNK_SIZE / 2)
+    world.evict_idle([player], [])
+
+    # Untouched chunks leave no blob; only the last changed ones fit
+    assert chunks[0] not in world.evicted and chunks[1] not in world.evicted
+    assert list(world.evicted) == chunks[5:] and world.dropped == 3
+    assert world.evicted_bytes == world.evicted_limit
+
+    generated = world.generated
+    world.load(chunks[0])
+    world.load(chunks[2])
+    assert world.generated == generated + 2 and world.restored == 0
+    world.load(chunks[-1])
+    assert world.restored == 1
+    assert all(c.opened for c in world.containers if chunk_of(c.x, c.y) == chunks[-1])
+
+
+def test_create_chunked_game_endpoint():
+    with TestClient(app) as client:
+        data = client.post("/api/games", json={"chunked": True, "seed": 9}).json()
+        session = manager.get_session(data["gameId"])
+        assert session.chunks is not None
+        assert session.seed == 9
+        response = client.post(
+            "/api/games", json={"chunked": True, "vectorized": True}
+        )
+        assert response.status_code == 400
+        metrics = client.get(f"/api/games/{data['gameId']}/metrics").json()
+        assert metrics["chunks"]["loaded"] == len(session.chunks.loaded)
@@ -0,0 +1,134 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+msgpack = pytest.importorskip("msgpack")
+
+from fastapi.testclient import TestClient
+from app.main import app
+from app.game.broadcast import encode_message
+from app.game.codec import SCHEMA, BinaryCodec, Handles
+from app.game.manager import HANDLE_SWEEP_TICKS, GameSession, manager
+from app.game.models import PlayerState
+from app.game.schema import state_to_dict
+from app.game.sync import StateSync
+
+
+def _unpack(data: bytes):
+    return msgpack.unpackb(data, strict_map_key=False)
+
+
+def test_full_state_uses_handles_and_field_order():
+    session = GameSession()
+    session.state.players = {"p": PlayerState(x=10.1, y=20, inventory={"wood": 2})}
+    session.state.loot_due = {"p": 5}
+    codec = BinaryCodec()
+    message = _unpack(codec.encode(state_to_dict(session.state)))
+
+    player = message["players"][0]
+    assert player[0] == codec.handles.handle("p")
+    fields = dict(zip(SCHEMA["players"], player[1:]))
+    assert fields["x"] == pytest.approx(10.1, abs=1e-5)
+    assert fields["inventory"] == {"wood": 2}
+    assert fields["abilities"] == [False, 0, False, 0, False, 0]
+    zombie = session.state.zombies[0]
+    assert message["zombies"][0][0] == codec.handles.handle(zombie.id)
+    assert message["loot_progress"] == {codec.handles.handle("p"): 5}
+    assert message["door"] == [
+        pytest.approx(session.state.door.x),
+        pytest.approx(session.state.door.y),
+    ]
+
+
+def test_delta_fields_are_keyed_by_index():
+    session = GameSession()
+    session.state.players = {"p": PlayerState(x=10, y=10)}
+    sync = StateSync()
+    codec = BinaryCodec()
+    codec.encode(sync.delta(session.state, 1))
+    session.state.players["p"].x = 12
+    removed = session.state.zombies.pop()
+    message = _unpack(codec.encode(sync.delta(session.state, 2)))
+
+    handle = codec.handles.handle("p")
+    x_index = SCHEMA["players"].index("x")
+    assert message["players"]["upsert"] == {handle: {x_index: 12.0}}
+    assert message["zombies"]["remove"] == [codec.handles.handle(removed.id)]
+    assert message["base"] == 1
+
+
+def test_binary_state_is_smaller_than_json():
+    session = GameSession()
+    session.state.players = {"p": PlayerState(x=10, y=10)}
+    data = state_to_dict(session.state)
+    assert len(BinaryCodec().encode(data)) * 2 < len(encode_message(data))
+
+
+def test_binary_inputs_map_handles_to_ids():
+    codec = BinaryCodec()
+    handle = codec.handles.handle("crate-1")
+    data = msgpack.packb({"action": "start_looting", "containerId": handle})
+    assert codec.decode_input(data) == {
+        "action": "start_looting",
+        "containerId": "crate-1",
+    }
+
+
+def test_released_handles_are_reused_after_acknowledgement():
+    handles = Handles()
+    a, b, c = (handles.handle(name) for name in "abc")
+    assert handles.release({"c"}, tick=5) == 2
+    # Quarantined handles keep resolving until the removal is acknowledged
+    assert handles.handle("a") == a and handles.release({"c"}, tick=6) == 1
+    assert handles.reclaim(5) == 1 and handles.entity_id(b) is None
+    assert handles.entity_id(a) == "a" and handles.handle("d") == b
+    assert handles.reclaim(6) == 1 and handles.handle("e") == a
+    assert handles.handle("f") == 3 and len(handles) == 4
+
+
+def test_session_reuses_handles_of_removed_entities():
+    session = GameSession()
+    session.state.players = {"p": PlayerState(x=10, y=10)}
+    session.set_encoding("p", "msgpack")
+    codec = session.codec
+    codec.encode(state_to_dict(session.state))
+    removed = session.state.zombies.pop()
+    handle = codec.handles.handle(removed.id)
+    for _ in range(HANDLE_SWEEP_TICKS * 2):
+        session.update_world()
+    assert codec.handles.entity_id(handle) == removed.id
+
+    session.acknowledge("p", session.tick + 1)
+    session.acknowledge("p", "late")
+    assert session.acked_ticks["p"] == 0
+    session.acknowledge("p", HANDLE_SWEEP_TICKS)
+    for _ in range(HANDLE_SWEEP_TICKS):
+        session.update_world()
+    assert codec.handles.entity_id(handle) is None
+    assert codec.handles.handle("new-zombie") == handle
+
+
+def test_msgpack_negotiated_by_query_parameter():
+    with TestClient(app) as client:
+        game_id = manager.create_game_session()
+        url = f"/ws/game/{game_id}?encoding=msgpack"
+        with client.websocket_connect(url) as ws:
+            welcome = ws.receive_json()
+            assert welcome["encoding"] == "msgpack"
+            assert welcome["schema"]["zombies"][0] == "x"
+            state = _unpack(ws.receive_bytes())
+            handles = [player[0] for player in state["players"]]
+            assert welcome["playerHandle"] in handles
+
+            ws.send_bytes(msgpack.packb({"action": "move", "moveX": 1, "moveY": 0}))
+            ws.send_json({"type": "hello", "encoding": "json"})
+            for _ in range(20):
+                message = ws.receive()
+                if message.get("text") and '"hello"' in message["text"]:
+                    break
+            else:
+                raise AssertionError("no hello reply")
+            assert "players" in ws.receive_json()
@@ -14,8 +14,8 @@ def test_zombie_damage_player():
     session.update_world()
     player = session.state.players["p"]
     assert player.health == PLAYER_MAX_HEALTH - 1
-    assert player.damage_cooldown > 0
-    assert session.state.zombies[0].attack_cooldown > 0
+    assert player.damage_cooldown_until > session.tick
+    assert session.state.zombies[0].attack_cooldown_until > session.tick
 
 
 def test_input_ignored_after_death():
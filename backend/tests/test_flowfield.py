@@ -0,0 +1,92 @@
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.game.flowfield import FlowField
+from app.game.grid import WallGrid
+from app.game.world import (
+    SEGMENT_SIZE,
+    create_wall,
+    find_path,
+    generate_store_walls,
+    update_zombies,
+)
+from app.game.models import PlayerState, ZombieState
+
+
+def test_flow_field_step_matches_find_path():
+    start = ZombieState(x=0, y=0)
+    goal = PlayerState(x=SEGMENT_SIZE * 2 + 10, y=10)
+    walls = [create_wall(1, 0)]
+    width, height = SEGMENT_SIZE * 3, SEGMENT_SIZE * 2
+    path = find_path(start, goal, walls, width, height)
+
+    field = FlowField(width, height)
+    field.update([goal], WallGrid.from_walls(width, height, walls))
+    assert field.distance(0, 0) == len(path) - 1
+    assert field.next_step(0, 0) == path[1]
+
+
+def test_flow_field_distances_match_bfs_on_generated_map():
+    random.seed(3)
+    width, height = 2400, 1600
+    walls = generate_store_walls(width, height)
+    blocked = {(int(w.x // SEGMENT_SIZE), int(w.y // SEGMENT_SIZE)) for w in walls}
+    player = PlayerState(x=20, y=20)
+    field = FlowField(width, height)
+    field.update([player], WallGrid.from_walls(width, height, walls))
+    for _ in range(30):
+        gx = random.randrange(width // SEGMENT_SIZE)
+        gy = random.randrange(height // SEGMENT_SIZE)
+        if (gx, gy) in blocked:
+            continue
+        start = ZombieState(x=gx * SEGMENT_SIZE + 5, y=gy * SEGMENT_SIZE + 5)
+        path = find_path(start, player, walls, width, height)
+        assert field.distance(gx, gy) == (len(path) - 1 if path else -1)
+
+
+def test_flow_field_only_rebuilds_on_cell_change():
+    grid = WallGrid.from_walls(
+        SEGMENT_SIZE * 3, SEGMENT_SIZE * 2, [create_wall(1, 0)]
+    )
+    field = FlowField(SEGMENT_SIZE * 3, SEGMENT_SIZE * 2)
+    player = PlayerState(x=5, y=5)
+    assert field.update([player], grid)
+    player.x = 30
+    assert not field.update([player], grid)
+    player.x = SEGMENT_SIZE + 5
+    player.y = SEGMENT_SIZE + 5
+    assert field.update([player], grid)
+    grid.remove(create_wall(1, 0))
+    assert field.update([player], grid)
+    assert field.rebuilds == 3
+
+
+def test_zombie_walks_around_wall_with_flow_field():
+    walls = [create_wall(1, 0)]
+    zombie = ZombieState(x=SEGMENT_SIZE / 2, y=SEGMENT_SIZE / 2)
+    player = PlayerState(x=SEGMENT_SIZE * 2 + 20, y=SEGMENT_SIZE / 2)
+    field = FlowField(SEGMENT_SIZE * 3, SEGMENT_SIZE * 2)
+    update_zombies(
+        [zombie], [player], walls, SEGMENT_SIZE * 3, SEGMENT_SIZE * 2, field
+    )
+    # The direct route is blocked so the first step heads down a row.
+    assert zombie.facing_y > 0
+
+
+def test_zombie_chases_the_player_nearest_by_path():
+    # A wall column separates the zombie from the player closest in a
+    # straight line, so the other player is fewer steps away.
+    walls = [create_wall(2, gy) for gy in range(4)]
+    width, height = SEGMENT_SIZE * 5, SEGMENT_SIZE * 6
+    zombie = ZombieState(x=SEGMENT_SIZE * 1.5, y=SEGMENT_SIZE * 1.5)
+    behind_wall = PlayerState(x=SEGMENT_SIZE * 3.5, y=SEGMENT_SIZE * 1.5)
+    around_corner = PlayerState(x=SEGMENT_SIZE * 1.5, y=SEGMENT_SIZE * 4.5)
+    field = FlowField(width, height)
+    update_zombies(
+        [zombie], [behind_wall, around_corner], walls, width, height, field
+    )
+    assert field.distance(1, 1) == 3
+    assert (zombie.facing_x, zombie.facing_y) == (0, 1)
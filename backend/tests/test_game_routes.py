@@ -15,3 +15,16 @@ def test_create_game_endpoint():
         data = response.json()
         assert "gameId" in data
         assert manager.get_session(data["gameId"]) is not None
+
+
+def test_create_game_with_seed():
+    with TestClient(app) as client:
+        response = client.post("/api/games", json={"seed": 42})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["seed"] == 42
+        assert manager.get_session(data["gameId"]).seed == 42
+
+        data = client.post("/api/games").json()
+        assert isinstance(data["seed"], int)
+        assert manager.get_session(data["gameId"]).seed == data["seed"]
@@ -0,0 +1,131 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.game.grid import WallGrid
+from app.game.inputs import MAX_MOVE_STEP, InputQueue, TokenBucket, move_vector
+from app.game.manager import GameSession
+from app.game.models import PlayerState
+from app.game.world import create_wall, move_player
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_facing_is_merged_but_moves_are_kept_apart():
+    queue = InputQueue()
+    queue.push({"action": "move", "moveX": 1, "moveY": 0, "facingX": 1, "facingY": 0})
+    queue.push({"action": "move", "direction": "down"})
+    queue.push({"facingX": 0, "facingY": -1})
+    assert queue.drain() == [
+        {"action": "move", "moveX": 1, "moveY": 0, "facingX": 1, "facingY": 0},
+        {"action": "move", "direction": "down", "facingX": 0, "facingY": -1},
+    ]
+    assert queue.merged == 1
+    assert len(queue) == 0
+
+
+def test_move_steps_are_capped():
+    assert move_vector({"moveX": 50, "moveY": -9}) == (MAX_MOVE_STEP, -MAX_MOVE_STEP)
+    assert move_vector({"moveX": float("nan"), "moveY": 1}) == (0.0, 1.0)
+
+
+def test_other_actions_keep_their_order():
+    queue = InputQueue()
+    queue.push({"action": "move", "moveX": 1, "moveY": 0})
+    queue.push({"action": "start_looting"})
+    queue.push({"action": "move", "moveX": 1, "moveY": 0})
+    queue.push({"type": "craft_item", "itemId": "hammer"})
+    assert [d.get("action", d.get("type")) for d in queue.drain()] == [
+        "move",
+        "start_looting",
+        "move",
+        "craft_item",
+    ]
+    assert queue.merged == 0
+
+
+def test_moves_do_not_starve_one_off_actions():
+    clock = FakeClock()
+    queue = InputQueue(clock=clock)
+    # A 144 Hz client streaming moves for two seconds, drained every tick
+    for frame in range(288):
+        clock.now = frame / 144
+        queue.push({"action": "move", "moveX": 1, "moveY": 0})
+        if frame % 3 == 2:
+            queue.drain()
+    assert queue.dropped == 0
+    assert queue.push({"action": "start_looting"})
+    assert queue.push({"type": "craft_item", "itemId": "hammer"})
+
+
+def test_token_bucket_limits_rate_and_refills():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=10, burst=2, clock=clock)
+    assert bucket.take() and bucket.take()
+    assert not bucket.take()
+    clock.now = 0.1
+    assert bucket.take()
+    assert not bucket.take()
+
+
+def test_flooding_is_dropped_and_counted():
+    clock = FakeClock()
+    queue = InputQueue(rate=60, burst=5, limit=3, clock=clock, action_burst=2)
+    for _ in range(10):
+        queue.push({"action": "move", "moveX": 1, "moveY": 0})
+    assert queue.received == 10
+    # Five exceed the burst, two more find the queue full
+    assert queue.dropped == 7
+    assert len(queue) == 3
+
+    for _ in range(5):
+        queue.push({"action": "start_looting"})
+    assert len(queue) == 5
+    assert queue.dropped == 10
+
+
+def test_session_applies_inputs_once_per_tick():
+    session = GameSession()
+    session.state.players["p"] = PlayerState(x=100, y=100)
+    session.state.zombies = []
+    session.state.walls = []
+    session.inputs["p"] = InputQueue()
+    for _ in range(20):
+        session.queue_input("p", {"action": "move", "moveX": 0.5, "moveY": 0})
+    session.queue_input("p", {"facingX": 0, "facingY": 1})
+    assert session.state.players["p"].x == 100
+
+    session.update_world()
+    assert session.state.players["p"].x == 110
+    assert session.state.players["p"].facing_y == 1
+    assert not session.inputs["p"].pending
+    metrics = session.get_metrics()["inputs"]
+    assert metrics == {"received": 21, "dropped": 0, "merged": 1}
+    assert not session.queue_input("ghost", {"action": "move"})
+
+
+def test_queued_moves_cannot_pass_through_walls():
+    session = GameSession()
+    wall = create_wall(5, 2, "wood")
+    session.state.walls = [wall]
+    session.state.zombies = []
+    player = PlayerState(x=190, y=100)
+    session.state.players["p"] = player
+    session.inputs["p"] = InputQueue()
+    for _ in range(30):
+        session.queue_input("p", {"action": "move", "direction": "right"})
+    session.update_world()
+
+    x, y = 190, 100
+    grid = WallGrid.from_walls(session.state.width, session.state.height, [wall])
+    for _ in range(30):
+        x, y = move_player(x, y, 2.0, 0.0, grid.width, grid.height, grid)
+    assert (player.x, player.y) == (x, y)
+    assert player.x < wall.x
@@ -0,0 +1,100 @@
+import math
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.game.interactables import wall_distance
+from app.game.manager import INTERACT_RANGE, GameSession
+from app.game.models import PlayerState
+from app.game.templates import WorldTemplate
+
+
+def _scan(state, x, y, radius):
+    """Nearest unopened target found the slow way, for comparison."""
+
+    found = [
+        ((wall_distance(x, y, w), 0, w.x, w.y), w)
+        for w in state.walls
+        if not w.opened
+    ]
+    found += [
+        ((math.hypot(c.x - x, c.y - y), 1, c.x, c.y), c)
+        for c in state.containers
+        if not c.opened
+    ]
+    found = [(key, t) for key, t in found if key[0] <= radius]
+    return min(found, key=lambda item: item[0])[1] if found else None
+
+
+def test_nearest_matches_a_full_scan():
+    session = GameSession(seed=9)
+    state = session.state
+    rng = random.Random(4)
+    for wall in rng.sample(state.walls, len(state.walls) // 3):
+        wall.opened = True
+    state.containers[0].opened = True
+    index = session.index_interactables()
+    assert index.container(state.containers[1].id) is state.containers[1]
+    assert index.container("missing") is None
+
+    targets = state.walls + state.containers
+    points = [(rng.uniform(0, state.width), rng.uniform(0, state.height))]
+    for target in rng.sample(targets, 200):
+        dx, dy = rng.uniform(-30, 70), rng.uniform(-30, 70)
+        points.append((target.x + dx, target.y + dy))
+    hits = 0
+    for x, y in points:
+        expected = _scan(state, x, y, INTERACT_RANGE)
+        assert index.nearest(x, y, INTERACT_RANGE) is expected
+        hits += expected is not None
+    assert hits > 50
+
+
+def test_index_follows_wall_copies_and_removals():
+    template = WorldTemplate(2400, 1600, 5)
+    session = GameSession(template=template)
+    shelf = session.state.walls[0]
+    x, y = shelf.x + shelf.size + 1, shelf.y + shelf.size / 2
+    session.state.players["p"] = PlayerState(x=x, y=y)
+    session.update_player_state("p", {"action": "start_looting"})
+    assert session.loot_timers["p"]["shelf"] is shelf
+
+    # Looting copies the template wall; the index must hand out the copy
+    session.start_looting("p", shelf, ticks=1)
+    session.update_world()
+    own = session.state.walls[0]
+    assert own is not shelf and own.opened and not shelf.opened
+    index = session.index_interactables()
+    indexed = {id(w) for w in index.shelves.entities()}
+    assert id(shelf) not in indexed and id(own) in indexed
+    nearest = index.nearest(x, y, INTERACT_RANGE)
+    assert nearest is not shelf and nearest is not own
+
+    wall = session.state.walls[1]
+    edge = (wall.x + wall.size / 2, wall.y + wall.size / 2)
+    assert session.index_interactables().nearest(*edge, 0) is wall
+    session.remove_wall(wall)
+    assert session.index_interactables().nearest(*edge, 0) is not wall
+
+
+def test_containers_of_loaded_chunks_are_found_by_id():
+    session = GameSession(seed=5, chunked=True)
+    index = session.index_interactables()
+    before = set(index.containers)
+    player = PlayerState(x=session.state.door.x, y=session.state.door.y)
+    session.state.players["p"] = player
+    player.x += 3000
+    session.update_world()
+    state = session.state
+    assert set(session.index_interactables().containers) == {
+        c.id for c in state.containers
+    } != before
+
+    container = state.containers[-1]
+    player.x, player.y = container.x, container.y
+    session.update_player_state(
+        "p", {"action": "start_looting", "containerId": container.id}
+    )
+    assert session.loot_timers["p"]["container"] is container
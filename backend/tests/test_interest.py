@@ -0,0 +1,116 @@
+import math
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from fastapi.testclient import TestClient
+from app.main import app
+from app.game.interest import MAX_VIEW_RADIUS, View, clamp_view_radius
+from app.game.manager import SYNC_AOI, GameSession, manager
+from app.game.models import PlayerState, ZombieState
+
+
+def _session() -> GameSession:
+    session = GameSession()
+    session.state.players = {"p": PlayerState(x=1000, y=800)}
+    session.state.zombies = [
+        ZombieState(id="near", x=1100, y=800),
+        ZombieState(id="far", x=1000 + 850, y=800),
+    ]
+    session.connections = {"p": object()}
+    session.sync_modes = {"p": SYNC_AOI}
+    session.views = {"p": View(radius=800, hysteresis=100)}
+    session.needs_snapshot = {"p"}
+    return session
+
+
+def _zombie(session: GameSession, zombie_id: str) -> ZombieState:
+    return next(z for z in session.state.zombies if z.id == zombie_id)
+
+
+def test_snapshot_only_contains_entities_in_view():
+    session = _session()
+    message = session.state_messages()["p"]
+    assert message["type"] == "snapshot"
+    assert [z["id"] for z in message["zombies"]] == ["near"]
+    assert list(message["players"]) == ["p"]
+    walls = message["walls"]
+    assert all(math.hypot(w["x"] - 1000, w["y"] - 800) <= 800 for w in walls)
+    assert len(message["walls"]) < len(session.state.walls)
+    assert message["width"] == session.state.width
+
+
+def test_entities_spawn_and_despawn_with_hysteresis():
+    session = _session()
+    session.state_messages()
+    session.tick += 1
+
+    _zombie(session, "far").x = 1000 + 790
+    _zombie(session, "near").y = 810
+    message = session.state_messages()["p"]
+    assert message["type"] == "delta"
+    assert set(message["zombies"]["spawn"]) == {"far"}
+    assert message["zombies"]["spawn"]["far"]["x"] == 1790
+    assert message["zombies"]["upsert"] == {"near": {"y": 810.0}}
+    assert message["zombies"]["despawn"] == []
+
+    # Inside the hysteresis band the zombie stays in view.
+    session.tick += 1
+    _zombie(session, "far").x = 1000 + 880
+    message = session.state_messages()["p"]
+    assert message["zombies"]["upsert"] == {"far": {"x": 1880.0}}
+    assert message["zombies"]["despawn"] == []
+
+    session.tick += 1
+    _zombie(session, "far").x = 1000 + 950
+    message = session.state_messages()["p"]
+    assert message["zombies"]["despawn"] == ["far"]
+    assert message["zombies"]["upsert"] == {}
+
+    # Changes to entities out of view are not sent at all.
+    session.tick += 1
+    _zombie(session, "far").y = 900
+    message = session.state_messages()["p"]
+    assert "zombies" not in message
+
+
+def test_removed_entities_despawn():
+    session = _session()
+    session.state_messages()
+    session.tick += 1
+    session.state.zombies = [z for z in session.state.zombies if z.id != "near"]
+    message = session.state_messages()["p"]
+    assert message["zombies"]["despawn"] == ["near"]
+    assert message["base"] == session.tick - 1
+
+
+def test_resync_sends_filtered_snapshot():
+    session = _session()
+    session.state_messages()
+    session.request_resync("p")
+    session.tick += 1
+    message = session.state_messages()["p"]
+    assert message["type"] == "snapshot"
+    assert [z["id"] for z in message["zombies"]] == ["near"]
+
+
+def test_view_radius_is_clamped():
+    assert clamp_view_radius(10**9) == MAX_VIEW_RADIUS
+
+
+def test_aoi_protocol_over_websocket():
+    with TestClient(app) as client:
+        game_id = manager.create_game_session()
+        url = f"/ws/game/{game_id}?sync=aoi&view=300"
+        with client.websocket_connect(url) as ws:
+            welcome = ws.receive_json()
+            session = manager.get_session(game_id)
+            assert session.views[welcome["playerId"]].radius == 300
+            snapshot = ws.receive_json()
+            assert snapshot["type"] == "snapshot"
+            assert welcome["playerId"] in snapshot["players"]
+            assert len(snapshot["walls"]) < len(session.state.walls)
+            delta = ws.receive_json()
+            assert delta["type"] == "delta"
+            assert delta["base"] == snapshot["tick"]
@@ -0,0 +1,103 @@
+import gzip
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pytest
+
+from app.game.journal import JournalFlusher, read_journal, replay, state_digest
+from app.game.manager import SYNC_DELTA, GameManager
+from app.game.persistence import SessionStore
+from tests.helpers import FakeSocket
+
+
+def _play(game: GameManager, game_id: str, ticks: int) -> None:
+    session = game.get_session(game_id)
+    first = session.add_player(FakeSocket())
+    for tick in range(ticks):
+        if tick == 10:
+            second = session.add_player(FakeSocket(), sync=SYNC_DELTA)
+        if tick % 3 == 0:
+            session.queue_input(
+                first, {"action": "move", "moveX": 1, "moveY": 0, "seq": tick}
+            )
+        if tick == 20:
+            session.queue_input(second, {"action": "start_looting"})
+            session.queue_input(first, {"type": "craft_item", "itemId": "hammer"})
+        if tick == 40:
+            session.remove_player(second)
+        session.update_world()
+
+
+def test_replay_reproduces_session(tmp_path):
+    game = GameManager()
+    game.journal_dir = str(tmp_path)
+    game_id = game.create_game_session(seed=21)
+    _play(game, game_id, 60)
+    session = game.get_session(game_id)
+    assert JournalFlusher(game).flush() > 0
+    assert not session.journal.pending
+    game.close_journals()
+
+    path = session.journal.path
+    header, records = read_journal(path)
+    assert header["seed"] == session.seed
+    kinds = [record[0] for record in records]
+    assert kinds.count("j") == 2 and kinds.count("l") == 1
+    assert kinds[-1] == "c"
+
+    result = replay(path)
+    assert result.mismatches == []
+    assert result.session.tick == session.tick
+    assert state_digest(result.session) == state_digest(session)
+    assert result.session.state.players == session.state.players
+
+    partial = replay(path, until=30)
+    assert partial.session.tick == 30
+
+
+def test_journal_continues_after_hibernation(tmp_path):
+    game = GameManager()
+    game.store = SessionStore(str(tmp_path / "saves"))
+    game.journal_dir = str(tmp_path)
+    game_id = game.create_game_session(seed=22)
+    session = game.get_session(game_id)
+    player_id = session.add_player(FakeSocket())
+    for _ in range(10):
+        session.queue_input(player_id, {"action": "move", "moveX": 0, "moveY": 1})
+        session.update_world()
+    session.remove_player(player_id)
+    assert game.hibernate(game_id)
+
+    session = game.get_session(game_id)
+    player_id = session.add_player(FakeSocket())
+    for _ in range(10):
+        session.queue_input(player_id, {"action": "move", "moveX": -1, "moveY": 0})
+        session.update_world()
+    game.close_journals()
+
+    result = replay(session.journal.path)
+    assert result.mismatches == []
+    assert state_digest(result.session) == state_digest(session)
+
+
+def test_replay_detects_divergence_and_torn_tail(tmp_path):
+    game = GameManager()
+    game.journal_dir = str(tmp_path)
+    game_id = game.create_game_session(seed=23)
+    _play(game, game_id, 30)
+    session = game.get_session(game_id)
+    session.state.zombies.pop()
+    game.close_journals()
+    path = session.journal.path
+    assert [tick for tick, _, _ in replay(path).mismatches] == [30]
+
+    with open(path, "ab") as fh:
+        fh.write(gzip.compress(b'["l",31,"x"]\n')[:15])
+    assert replay(path).session.tick == 30
+
+    with open(path, "wb") as fh:
+        fh.write(b"not a journal")
+    with pytest.raises(ValueError):
+        read_journal(path)
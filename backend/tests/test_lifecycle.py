@@ -0,0 +1,245 @@
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+from app.game.chunks import CHUNK_SIZE, EVICT_INTERVAL
+from app.game.connection import join
+from app.game.lifecycle import Checkpointer, SessionReaper
+from app.game.manager import GameManager, GameSession, manager
+from app.game.models import PlayerState
+from app.game.persistence import CHECKPOINT_INDEX, SessionStore, pack_session
+from app.game.schema import state_to_dict
+from tests.helpers import FakeSocket
+
+
+def _busy_session() -> GameSession:
+    session = GameSession(seed=11)
+    shelf = session.state.walls[0]
+    player = PlayerState(x=shelf.x, y=shelf.y, weapon="baseball_bat")
+    player.inventory = {"nails": 2, "medkit": 1}
+    player.abilities.fireOrb = True
+    player.abilities.fireOrbLevel = 2
+    session.state.players["p"] = player
+    session.start_looting("p", shelf, ticks=50)
+    container = session.state.containers[0]
+    session.state.players["q"] = PlayerState(x=container.x, y=container.y)
+    session.start_looting("q", container, ticks=60)
+    session.state.zombies[0].dest = {"x": 10.0, "y": 20.0}
+    for _ in range(5):
+        session.update_world()
+    return session
+
+
+def test_saved_session_continues_identically():
+    session = _busy_session()
+    restored = GameSession.load(session.save())
+    assert state_to_dict(restored.state) == state_to_dict(session.state)
+    assert restored.tick == session.tick
+    assert restored.loot_timers["q"]["container"] is restored.state.containers[0]
+    assert restored.rng.getstate() == session.rng.getstate()
+
+    for _ in range(30):
+        session.update_world()
+        restored.update_world()
+    assert state_to_dict(restored.state) == state_to_dict(session.state)
+
+
+def test_chunked_session_round_trip():
+    session = GameSession(seed=4, chunked=True)
+    door = session.state.door
+    player = PlayerState(x=door.x + CHUNK_SIZE * 10, y=door.y)
+    session.state.players["p"] = player
+    session.state.zombies = session.state.zombies[:3]
+    for _ in range(EVICT_INTERVAL):
+        session.update_world()
+    # Only changed chunks keep a blob once evicted
+    for container in session.state.containers:
+        container.opened = True
+    player.y += CHUNK_SIZE * 10
+    for _ in range(EVICT_INTERVAL):
+        session.update_world()
+    assert session.chunks.evicted
+    restored = GameSession.load(session.save())
+    assert state_to_dict(restored.state) == state_to_dict(session.state)
+    assert restored.chunks.to_dict() == session.chunks.to_dict()
+    assert restored.wall_grid.chunks == session.wall_grid.chunks
+
+
+def test_rejects_foreign_blobs():
+    blob = pack_session(GameSession(seed=1))
+    with pytest.raises(ValueError):
+        GameSession.load(b"nope" + blob[4:])
+    with pytest.raises(ValueError, match="version"):
+        GameSession.load(blob[:4] + b"\x09\x00" + blob[6:])
+
+
+def test_idle_sessions_hibernate_and_restore(tmp_path):
+    game = GameManager()
+    game.store = SessionStore(str(tmp_path))
+    idle = game.create_game_session(seed=2)
+    played = game.create_game_session(seed=3)
+    player_id = game.get_session(played).add_player(FakeSocket())
+    before = state_to_dict(game.get_session(idle).state)
+
+    reaper = SessionReaper(game, hibernate_after=60, ttl=3600)
+    reaper.reap(now=time.monotonic() + 30)
+    assert set(game.game_sessions) == {idle, played}
+    reaper.reap(now=time.monotonic() + 61)
+    assert set(game.game_sessions) == {played}
+    assert os.listdir(tmp_path) == [f"{idle}.session"]
+
+    session = game.get_session(idle)
+    assert state_to_dict(session.state) == before
+    assert game.get_metrics()["lifecycle"]["restored"] == 1
+    # The save of a session in memory is never expired.
+    assert game.store.expire(3600, time.time() + 7200, keep=[idle]) == []
+
+    game.get_session(played).remove_player(player_id)
+    reaper.reap(now=time.monotonic() + 61)
+    assert game.game_sessions == {}
+    assert len(game.store.expire(3600, now=time.time() + 7200)) == 2
+    assert game.get_session(idle) is None
+    assert game.get_session("../etc/passwd") is None
+
+
+def test_checkpoint_and_restore(tmp_path):
+    first = GameManager()
+    first.store = SessionStore(str(tmp_path))
+    busy = first.create_game_session(seed=5)
+    quiet = first.create_game_session(seed=6)
+    first.get_session(busy).update_world()
+    assert first.checkpoint() == 2
+    assert first.checkpoint() == 0
+    first.get_session(busy).update_world()
+    assert first.checkpoint() == 1
+
+    second = GameManager()
+    second.store = SessionStore(str(tmp_path))
+    assert second.restore_checkpoint() == 2
+    for game_id in (busy, quiet):
+        restored = second.game_sessions[game_id]
+        original = first.get_session(game_id)
+        assert restored.tick == original.tick
+        assert state_to_dict(restored.state) == state_to_dict(original.state)
+
+
+def test_joining_a_restored_session_leaves_one_player(tmp_path):
+    first = GameManager()
+    first.store = SessionStore(str(tmp_path))
+    game_id = first.create_game_session(seed=7)
+    first.get_session(game_id).add_player(FakeSocket())
+    first.checkpoint()
+
+    second = GameManager()
+    second.store = SessionStore(str(tmp_path))
+    assert second.restore_checkpoint() == 1
+    session = second.get_session(game_id)
+    assert session.state.players == {}
+    player_id, _ = join(session, FakeSocket(), {})
+    assert list(session.state.players) == [player_id]
+
+
+def test_truncated_saves_are_skipped_on_restore(tmp_path):
+    first = GameManager()
+    first.store = SessionStore(str(tmp_path))
+    good = first.create_game_session(seed=5)
+    bad = first.create_game_session(seed=6)
+    assert first.checkpoint() == 2
+    path = first.store.path(bad)
+    with open(path, "rb") as fh:
+        blob = fh.read()
+    for cut in (len(blob) // 2, len(blob) - 3, 40):
+        with pytest.raises(ValueError):
+            GameSession.load(blob[:cut])
+    with open(path, "wb") as fh:
+        fh.write(blob[: len(blob) // 2])
+
+    second = GameManager()
+    second.store = SessionStore(str(tmp_path))
+    assert second.restore_checkpoint() == 1
+    assert set(second.game_sessions) == {good}
+    assert second.get_metrics()["lifecycle"]["dropped"] == 1
+    assert not os.path.exists(path)
+
+
+def test_hibernated_sessions_load_off_the_loop_and_skip_bad_saves(tmp_path):
+    game = GameManager()
+    game.store = SessionStore(str(tmp_path))
+    good = game.create_game_session(seed=5)
+    bad = game.create_game_session(seed=6)
+    assert game.hibernate(good) and game.hibernate(bad)
+    path = game.store.path(bad)
+    with open(path, "rb") as fh:
+        blob = fh.read()
+    with open(path, "wb") as fh:
+        fh.write(blob[:40])
+
+    # Reading metrics does not restore a session
+    assert game.get_session(good, restore=False) is None
+    assert game.game_sessions == {}
+
+    async def load():
+        return await asyncio.gather(
+            game.load_session(good), game.load_session(good), game.load_session(bad)
+        )
+
+    first, second, missing = asyncio.run(load())
+    assert first is second is game.game_sessions[good]
+    assert missing is None and not os.path.exists(path)
+    assert game.get_metrics()["lifecycle"]["restored"] == 1
+
+
+def test_saves_are_written_by_the_worker_thread_call(tmp_path):
+    game = GameManager()
+    game.store = SessionStore(str(tmp_path))
+    kept = game.create_game_session(seed=2)
+    idle = game.create_game_session(seed=3)
+    before = state_to_dict(game.get_session(idle).state)
+    assert game.checkpoint(write=False) == 2
+    assert game.hibernate(idle, write=False)
+    assert os.listdir(tmp_path) == []
+    # A session hibernated but not written yet is restored from memory
+    assert state_to_dict(game.get_session(idle).state) == before
+    assert game.hibernate(idle, write=False)
+
+    checkpointer = Checkpointer(game, interval=0)
+
+    async def one_pass() -> None:
+        task = asyncio.create_task(checkpointer.run())
+        while game.unsaved:
+            await asyncio.sleep(0.01)
+        task.cancel()
+
+    asyncio.run(asyncio.wait_for(one_pass(), 5))
+    assert sorted(game.store.game_ids()) == sorted([kept, idle])
+    assert game.store.load_index(CHECKPOINT_INDEX) == [kept]
+
+
+def test_sessions_survive_application_restart(monkeypatch, tmp_path):
+    monkeypatch.setenv("GAME_SESSION_DIR", str(tmp_path))
+    with TestClient(app) as client:
+        game_id = client.post("/api/games", json={"seed": 9}).json()["gameId"]
+        with client.websocket_connect(f"/ws/game/{game_id}") as ws:
+            ws.receive_json()
+            ws.receive_json()
+    tick = manager.get_session(game_id).tick
+    assert tick > 0
+    manager.game_sessions.pop(game_id)
+
+    with TestClient(app):
+        assert manager.game_sessions[game_id].tick == tick
+
+    # Without a session directory nothing is saved or restored
+    monkeypatch.delenv("GAME_SESSION_DIR")
+    manager.game_sessions.pop(game_id)
+    with TestClient(app):
+        assert manager.store is None
+        assert game_id not in manager.game_sessions
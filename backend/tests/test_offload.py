@@ -0,0 +1,110 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from fastapi.testclient import TestClient
+from app.main import app
+from app.game.manager import SYNC_DELTA, GameManager
+from app.game.scheduler import LoopMonitor, SessionScheduler, run_session_threaded
+from tests.helpers import FakeSocket
+
+
+def test_loop_monitor_percentiles():
+    monitor = LoopMonitor()
+    for ms in range(1, 101):
+        monitor.record(ms / 1000)
+    monitor.record(-0.001)
+    data = monitor.to_dict()
+    assert data["samples"] == 101
+    assert data["p50_ms"] == 50
+    assert data["p99_ms"] == 99
+    assert data["max_ms"] == 100
+
+
+def test_threaded_session_keeps_event_loop_responsive():
+    game = GameManager()
+    session = game.get_session(game.create_game_session(threaded=True))
+    original = session.update_world
+
+    def slow_update():
+        original()
+        time.sleep(0.02)
+
+    session.update_world = slow_update
+    socket = FakeSocket()
+    player_id = session.add_player(socket, SYNC_DELTA)
+    monitor = LoopMonitor(interval=0.005)
+
+    async def run():
+        task = asyncio.create_task(run_session_threaded(session, 0.01))
+        probe = asyncio.create_task(monitor.run())
+        await asyncio.sleep(0.3)
+        session.queue_input(player_id, {"action": "move", "moveX": 1, "seq": 4})
+        await asyncio.sleep(0.2)
+        task.cancel()
+        probe.cancel()
+        await asyncio.sleep(0.05)
+
+    asyncio.run(run())
+    assert session.tick_metrics.ticks > 5
+    assert socket.messages[0]["type"] == "snapshot"
+    assert socket.messages[-1]["type"] == "delta"
+    assert session.state.players[player_id].input_seq == 4
+    # The 20 ms steps run off the loop, which keeps waking on time.
+    assert monitor.to_dict()["p50_ms"] < 10
+
+    ticks = session.tick_metrics.ticks
+    time.sleep(0.05)
+    assert session.tick_metrics.ticks == ticks
+
+
+def test_restarted_threaded_session_never_runs_two_threads():
+    game = GameManager()
+    game_id = game.create_game_session(threaded=True)
+    session = game.get_session(game_id)
+    player_id = session.add_player(FakeSocket())
+    scheduler = SessionScheduler(game, tick_interval=0.005)
+
+    def session_threads():
+        return [t for t in threading.enumerate() if t.name == "session"]
+
+    async def run():
+        scheduler.sync_tasks()
+        await asyncio.sleep(0.05)
+        # Leaving and rejoining between two passes restarts the runner
+        socket = session.connections.pop(player_id)
+        scheduler.sync_tasks()
+        session.connections[player_id] = socket
+        scheduler.sync_tasks()
+        assert game_id in scheduler.stopping and game_id not in scheduler.tasks
+        for _ in range(50):
+            await asyncio.sleep(0.01)
+            scheduler.sync_tasks()
+            assert len(session_threads()) <= 1
+            if game_id in scheduler.tasks:
+                break
+        assert game_id in scheduler.tasks
+        await asyncio.sleep(0.05)
+        assert len(session_threads()) == 1
+        task = scheduler.tasks[game_id]
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        assert session_threads() == []
+
+    asyncio.run(run())
+
+
+def test_threaded_game_over_http_and_websocket():
+    with TestClient(app) as client:
+        response = client.post("/api/games", json={"threaded": True})
+        game_id = response.json()["gameId"]
+        with client.websocket_connect(f"/ws/game/{game_id}") as ws:
+            welcome = ws.receive_json()
+            state = ws.receive_json()
+            assert welcome["playerId"] in state["players"]
+        loop = client.get("/api/metrics").json()["loop"]
+        assert set(loop) == {"samples", "p50_ms", "p95_ms", "p99_ms", "max_ms"}
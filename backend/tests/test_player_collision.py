@@ -12,13 +12,13 @@ def test_player_movement_blocked_by_wall():
     session.state.width = SEGMENT_SIZE * 3
     session.state.height = SEGMENT_SIZE * 2
     session.state.walls = [create_wall(1, 0)]
-    session.state.players = {"p": PlayerState(x=SEGMENT_SIZE - 10, y=SEGMENT_SIZE / 2)}
+    session.state.players = {"p": PlayerState(x=SEGMENT_SIZE - 1, y=SEGMENT_SIZE / 2)}
 
     session.update_player_state(
         "p", {"action": "move", "moveX": 20, "moveY": 0}
     )
     player = session.state.players["p"]
-    assert player.x == SEGMENT_SIZE - 10
+    assert player.x == SEGMENT_SIZE - 1
 
 
 def test_player_movement_blocked_by_bounds():
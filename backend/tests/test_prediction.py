@@ -0,0 +1,89 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.game.grid import WallGrid
+from app.game.inputs import InputQueue
+from app.game.manager import GameSession
+from app.game.models import PlayerState
+from app.game.world import create_wall, move_player
+
+
+def test_move_player_resolves_axes_separately():
+    wall = create_wall(2, 2, "wood")
+    grid = WallGrid.from_walls(400, 400, [wall])
+    # Moving diagonally into the wall keeps the free vertical component.
+    assert move_player(75, 100, 10, 5, 400, 400, grid) == (75, 105)
+    assert move_player(50, 50, 10, 5, 400, 400, grid) == (60, 55)
+    assert move_player(5, 5, -10, -10, 400, 400, grid) == (5, 5)
+
+
+def test_applied_sequence_is_acked_in_player_state():
+    session = GameSession()
+    session.state.players["p"] = PlayerState(x=100, y=100)
+    session.inputs["p"] = InputQueue()
+    session.sync.delta(session.state, 0)
+    session.queue_input("p", {"action": "move", "moveX": 1, "moveY": 0, "seq": 7})
+    session.queue_input("p", {"action": "move", "moveX": 1, "moveY": 0, "seq": 8})
+    session.queue_input("p", {"action": "start_looting", "seq": 9})
+    assert session.state.players["p"].input_seq == 0
+
+    session.update_world()
+    assert session.state.players["p"].input_seq == 9
+    delta = session.sync.delta(session.state, 1)
+    assert delta["players"]["upsert"]["p"]["input_seq"] == 9
+
+    # Stale or missing sequence numbers never move the ack backwards.
+    session.queue_input("p", {"action": "move", "moveX": 1, "moveY": 0, "seq": 3})
+    session.queue_input("p", {"action": "cancel_looting"})
+    session.update_world()
+    assert session.state.players["p"].input_seq == 9
+
+
+def test_client_replay_matches_server():
+    session = GameSession(seed=3)
+    session.state.zombies = []
+    wall = session.state.walls[0]
+    player = PlayerState(x=wall.x - 5, y=wall.y + 5)
+    session.state.players["p"] = player
+    session.inputs["p"] = InputQueue()
+    moves = [(2, 1), (2, 0), (-2, 2), (2, 2)]
+
+    x, y = player.x, player.y
+    grid = session.wall_grid
+    width, height = session.state.width, session.state.height
+    for seq, (dx, dy) in enumerate(moves, start=1):
+        x, y = move_player(x, y, dx, dy, width, height, grid)
+        move = {"action": "move", "moveX": dx, "moveY": dy, "seq": seq}
+        session.queue_input("p", move)
+        session.update_world()
+        assert player.input_seq == seq
+        assert (player.x, player.y) == (x, y)
+
+
+def test_moves_queued_within_one_tick_replay_identically():
+    session = GameSession(seed=3)
+    session.state.zombies = []
+    wall = create_wall(5, 2, "wood")
+    session.state.walls = [wall]
+    player = PlayerState(x=wall.x - 5, y=wall.y - 3)
+    session.state.players["p"] = player
+    session.inputs["p"] = InputQueue()
+    moves = [(2, 2), (2, 2), (2, 0), (0, 2), (2, 1), (-1, 2)]
+    for seq, (dx, dy) in enumerate(moves, start=1):
+        move = {"action": "move", "moveX": dx, "moveY": dy, "seq": seq}
+        session.queue_input("p", move)
+    start = (player.x, player.y)
+    session.update_world()
+
+    grid = session.wall_grid
+    width, height = session.state.width, session.state.height
+    x, y = start
+    for dx, dy in moves:
+        x, y = move_player(x, y, dx, dy, width, height, grid)
+    assert player.input_seq == len(moves)
+    assert (player.x, player.y) == (x, y)
+    # A single summed step would have ended somewhere else
+    total = tuple(map(sum, zip(*moves)))
+    assert move_player(*start, *total, width, height, grid) != (x, y)
@@ -0,0 +1,88 @@
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from fastapi.testclient import TestClient
+from app.main import app
+from app.game.manager import GameManager, manager
+from app.game.scheduler import SessionScheduler, TickMetrics, run_session
+from tests.helpers import FakeSocket
+
+
+def test_tick_metrics_histogram():
+    metrics = TickMetrics(buckets_ms=(1, 10))
+    metrics.record_tick(0.0005)
+    metrics.record_tick(0.005)
+    metrics.record_tick(0.05)
+    data = metrics.to_dict()
+    assert data["ticks"] == 3
+    assert data["histogram_ms"] == {"<=1": 1, "<=10": 1, ">10": 1}
+    assert data["max_ms"] == 50
+    assert (data["p50_ms"], data["p99_ms"]) == (5, 50)
+
+
+def test_slow_session_skips_ticks_and_counts_overruns():
+    game = GameManager()
+    session = game.get_session(game.create_game_session())
+    original = session.update_world
+
+    def slow_update():
+        original()
+        time.sleep(0.03)
+
+    session.update_world = slow_update
+
+    async def run():
+        task = asyncio.create_task(run_session(session, 0.01, max_catch_up=2))
+        await asyncio.sleep(0.3)
+        task.cancel()
+
+    asyncio.run(run())
+    metrics = session.tick_metrics
+    assert metrics.overruns > 0
+    assert metrics.skipped_ticks > 0
+    assert session.tick == metrics.ticks
+
+
+def test_scheduler_runs_sessions_as_separate_tasks():
+    game = GameManager()
+    first = game.create_game_session()
+    second = game.create_game_session()
+    empty = game.create_game_session()
+    for game_id in (first, second):
+        game.get_session(game_id).add_player(FakeSocket())
+    scheduler = SessionScheduler(game, tick_interval=0.005)
+
+    async def run():
+        task = asyncio.create_task(scheduler.run())
+        await asyncio.sleep(0.1)
+        assert set(scheduler.tasks) == {first, second}
+        game.game_sessions.pop(first)
+        await asyncio.sleep(0.02)
+        assert set(scheduler.tasks) == {second}
+        session = game.get_session(second)
+        session.remove_player(next(iter(session.state.players)))
+        await asyncio.sleep(0.02)
+        assert scheduler.tasks == {}
+        task.cancel()
+
+    asyncio.run(run())
+    assert game.get_session(second).tick > 5
+    assert game.get_session(empty).tick == 0
+
+
+def test_metrics_endpoint():
+    with TestClient(app) as client:
+        game_id = manager.create_game_session()
+        with client.websocket_connect(f"/ws/game/{game_id}") as ws:
+            ws.receive_json()
+            time.sleep(0.1)
+        response = client.get(f"/api/games/{game_id}/metrics")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["timing"]["ticks"] > 0
+        assert "overruns" in data["timing"]
+        assert client.get("/api/games/missing/metrics").status_code == 404
@@ -0,0 +1,44 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.game.manager import GameSession
+from app.game.models import PlayerState, ZombieState
+from app.game.schema import GameStateSchema, state_to_dict
+
+
+def test_state_objects_are_slotted():
+    zombie = ZombieState(x=1, y=2)
+    assert not hasattr(zombie, "__dict__")
+    with pytest.raises(AttributeError):
+        zombie.speed = 3
+
+
+def test_wire_dict_matches_schema():
+    session = GameSession()
+    player = PlayerState(x=50, y=60, inventory={"wood": 2})
+    player.abilities.fireball = True
+    session.state.players["p1"] = player
+    session.state.loot_due["p1"] = 10
+
+    data = state_to_dict(session.state)
+    assert GameStateSchema.model_validate(data).model_dump() == data
+    assert data["players"]["p1"]["abilities"]["fireball"]
+
+
+def test_wire_dict_is_detached_from_state():
+    session = GameSession()
+    session.state.players["p1"] = PlayerState(x=50, y=60, inventory={"wood": 2})
+    data = state_to_dict(session.state)
+
+    session.state.players["p1"].inventory["wood"] = 5
+    session.state.players["p1"].abilities.fireOrb = True
+    session.state.zombies[0].x += 10
+
+    assert data["players"]["p1"]["inventory"] == {"wood": 2}
+    assert data["players"]["p1"]["abilities"]["fireOrb"] is False
+    assert data["zombies"][0]["x"] != session.state.zombies[0].x
+
@@ -0,0 +1,158 @@
+import asyncio
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+from app.main import app
+from app.game import sharding
+from app.game.sharding import HashRing, ShardRouter, WorkerHandle
+from tests.helpers import FakeSocket
+
+
+def test_hash_ring_spreads_keys_and_moves_few_on_resize():
+    ring = HashRing(("a", "b", "c"))
+    keys = [f"game-{i}" for i in range(3000)]
+    before = {key: ring.node_for(key) for key in keys}
+    counts = {node: list(before.values()).count(node) for node in "abc"}
+    assert all(count > 600 for count in counts.values())
+    assert before == {key: HashRing(("c", "b", "a")).node_for(key) for key in keys}
+
+    ring.add("d")
+    after = {key: ring.node_for(key) for key in keys}
+    moved = [key for key in keys if before[key] != after[key]]
+    assert all(after[key] == "d" for key in moved)
+    assert len(moved) < len(keys) / 2
+
+    ring.remove("d")
+    assert {key: ring.node_for(key) for key in keys} == before
+
+
+async def _wait_for(predicate, timeout: float = 5.0) -> None:
+    for _ in range(int(timeout / 0.02)):
+        if predicate():
+            return
+        await asyncio.sleep(0.02)
+    raise AssertionError("condition not met in time")
+
+
+def test_router_runs_sessions_in_workers():
+    async def scenario() -> None:
+        router = ShardRouter(2)
+        router.start()
+        try:
+            games = [await router.create_game(seed=idx) for idx in range(4)]
+            assert [game["seed"] for game in games] == [0, 1, 2, 3]
+            game_id = games[0]["gameId"]
+
+            socket = FakeSocket()
+            conn_id = await router.join(game_id, socket, {"sync": "delta"})
+            await _wait_for(lambda: len(socket.sent) >= 3)
+            welcome, snapshot, delta = socket.messages[:3]
+            assert welcome["type"] == "welcome"
+            assert snapshot["type"] == "snapshot"
+            assert welcome["playerId"] in snapshot["players"]
+            assert delta["type"] == "delta"
+
+            router.forward(conn_id, json.dumps({"type": "hello"}), None)
+            reply = {"type": "hello", "encoding": "json"}
+            await _wait_for(lambda: reply in socket.messages)
+
+            metrics = await router.game_metrics(game_id)
+            assert metrics["connections"] == 1
+            assert await router.join("missing", FakeSocket(), {}) is None
+
+            # A bad frame ends the connection and removes the player
+            bad = FakeSocket()
+            bad_id = await router.join(game_id, bad, {})
+            router.forward(bad_id, "not json", None)
+            await _wait_for(lambda: bad.closed)
+            assert (await router.game_metrics(game_id))["connections"] == 1
+
+            router.leave(conn_id)
+            totals = await router.metrics()
+            sessions = sum(w["sessions"] for w in totals["workers"].values())
+            assert sessions == 4
+        finally:
+            router.stop()
+
+    asyncio.run(scenario())
+
+
+def test_multi_process_mode_over_http_and_websocket(monkeypatch):
+    monkeypatch.setenv("GAME_WORKERS", "2")
+    with TestClient(app) as client:
+        game_id = client.post("/api/games", json={"seed": 5}).json()["gameId"]
+        with client.websocket_connect(f"/ws/game/{game_id}") as ws:
+            welcome = ws.receive_json()
+            assert welcome["type"] == "welcome"
+            state = ws.receive_json()
+            assert welcome["playerId"] in state["players"]
+        metrics = client.get(f"/api/games/{game_id}/metrics").json()
+        assert metrics["tick"] > 0
+        assert client.get("/api/games/missing/metrics").status_code == 404
+
+
+class FakePipe:
+    def __init__(self) -> None:
+        self.posted = []
+
+    def send(self, message) -> None:
+        self.posted.append(message)
+
+
+def _router_with_pipe():
+    router = ShardRouter(1)
+    router._loop = asyncio.get_running_loop()
+    handle = WorkerHandle("w", None, FakePipe())
+    router.workers["w"] = handle
+    router.ring.add("w")
+    return router, handle
+
+
+def test_only_state_frames_are_skipped_while_a_send_is_in_flight():
+    async def scenario() -> None:
+        router, handle = _router_with_pipe()
+        socket = FakeSocket(delay=0.05)
+        handle.sockets["c"] = socket
+        router._dispatch(handle, ("state", "c", "s1"))
+        router._dispatch(handle, ("send", "c", "reply"))
+        router._dispatch(handle, ("state", "c", "s2"))
+        await asyncio.sleep(0.2)
+        assert socket.sent == ["s1", "reply"]
+        assert handle.messages_skipped == 1
+        assert handle.conn.posted == [("resync", "c")]
+        assert handle.outbox == {}
+
+    asyncio.run(scenario())
+
+
+def test_join_timeout_cleans_up_and_closes_the_socket(monkeypatch):
+    monkeypatch.setattr(sharding, "REQUEST_TIMEOUT", 0.05)
+
+    async def scenario() -> None:
+        router, handle = _router_with_pipe()
+        with pytest.raises(TimeoutError):
+            await router.join("g", FakeSocket(), {})
+        assert handle.sockets == {}
+        assert handle.conn.posted[-1][0] == "leave"
+
+    asyncio.run(scenario())
+
+    class SilentRouter:
+        async def join(self, game_id, websocket, params):
+            raise TimeoutError
+
+        def stop(self) -> None:
+            pass
+
+    with TestClient(app) as client:
+        monkeypatch.setattr(sharding, "router", SilentRouter())
+        with client.websocket_connect("/ws/game/any") as ws:
+            with pytest.raises(WebSocketDisconnect) as exc:
+                ws.receive_json()
+        assert exc.value.code == 1011
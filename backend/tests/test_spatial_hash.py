@@ -0,0 +1,56 @@
+import math
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.game.manager import GameSession
+from app.game.models import PlayerState, ZombieState, PLAYER_MAX_HEALTH
+from app.game.spatial import SpatialHash
+
+
+def test_query_radius_and_nearest_match_brute_force():
+    random.seed(1)
+    players = [
+        PlayerState(x=random.random() * 2400, y=random.random() * 1600)
+        for _ in range(40)
+    ]
+    index = SpatialHash()
+    index.sync(players)
+    for _ in range(100):
+        x, y = random.random() * 2400, random.random() * 1600
+        expected = min(players, key=lambda p: math.hypot(p.x - x, p.y - y))
+        assert index.nearest(x, y) is expected
+        radius = random.random() * 200
+        near = {id(p) for p in index.query_radius(x, y, radius)}
+        assert near == {
+            id(p) for p in players if math.hypot(p.x - x, p.y - y) <= radius
+        }
+
+
+def test_update_moves_entities_between_cells():
+    zombie = ZombieState(x=5, y=5)
+    other = ZombieState(x=6, y=6)
+    index = SpatialHash()
+    index.sync([zombie, other])
+    assert index.count((0, 0)) == 2
+    zombie.x = 45
+    index.update(zombie)
+    assert index.count((0, 0)) == 1
+    assert index.count((1, 0)) == 1
+    index.sync([zombie])
+    assert index.count((0, 0)) == 0
+    assert len(index) == 1
+
+
+def test_only_players_in_reach_are_attacked():
+    session = GameSession()
+    session.state.players = {
+        "near": PlayerState(x=50, y=50),
+        "far": PlayerState(x=900, y=900),
+    }
+    session.state.zombies = [ZombieState(x=50, y=50)]
+    session.update_world()
+    assert session.state.players["near"].health == PLAYER_MAX_HEALTH - 1
+    assert session.state.players["far"].health == PLAYER_MAX_HEALTH
@@ -0,0 +1,128 @@
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from fastapi.testclient import TestClient
+from app.main import app
+from app.game.manager import SYNC_DELTA, GameSession, manager
+from app.game.models import PlayerState
+from app.game.schema import state_to_dict
+from app.game import sync as sync_module
+from app.game.sync import StateSync
+
+
+def test_delta_only_contains_changes():
+    session = GameSession()
+    session.state.players = {"p": PlayerState(x=10, y=10)}
+    sync = StateSync()
+    first = sync.delta(session.state, 1)
+    assert len(first["walls"]["upsert"]) == len(session.state.walls)
+
+    session.state.players["p"].x = 12
+    wall = session.state.walls[0]
+    wall.opened = True
+    removed = session.state.zombies.pop()
+    second = sync.delta(session.state, 2)
+    assert second["base"] == 1
+    assert second["players"]["upsert"] == {"p": {"x": 12.0}}
+    assert second["walls"]["upsert"] == {wall.id: {"opened": True}}
+    assert second["zombies"]["remove"] == [removed.id]
+    assert "containers" not in second
+    assert "width" not in second
+
+
+def test_unchanged_walls_are_not_rescanned(monkeypatch):
+    session = GameSession(seed=4)
+    session.state.players = {"p": PlayerState(x=10, y=10)}
+    session.sync_modes["p"] = SYNC_DELTA
+    session.state_messages(["p"])
+    converted = []
+    convert = sync_module.ENTITY_CONVERTERS["walls"]
+
+    def counting(wall, tick):
+        converted.append(wall.id)
+        return convert(wall, tick)
+
+    monkeypatch.setitem(sync_module.ENTITY_CONVERTERS, "walls", counting)
+    signature = sync_module.ENTITY_SIGNATURES["walls"]
+    scanned = []
+
+    def scanning(wall):
+        scanned.append(wall.id)
+        return signature(wall)
+
+    monkeypatch.setitem(sync_module.ENTITY_SIGNATURES, "walls", scanning)
+    for _ in range(3):
+        session.update_world()
+        assert "walls" not in session.state_messages(["p"])["p"]
+    assert scanned == [] and converted == []
+
+    session.damage_wall(session.state.walls[0], 1)
+    # The template's wall was copied on write
+    wall = session.state.walls[0]
+    timers = []
+    for _ in range(8):
+        session.update_world()
+        walls = session.state_messages(["p"])["p"].get("walls")
+        timers.append(walls["upsert"][wall.id] if walls else None)
+    assert timers[0] == {"hp": wall.hp, "damage_timer": 5}
+    flash = [t and t["damage_timer"] for t in timers[1:]]
+    assert flash == [4, 3, 2, 1, 0, None, None]
+    # Only the damaged wall was converted, and scans stopped with the flash
+    assert set(converted) == {wall.id}
+    assert len(scanned) == 6 * len(session.state.walls)
+
+
+def test_delta_is_much_smaller_than_full_state():
+    session = GameSession()
+    session.state.players = {"p": PlayerState(x=10, y=10)}
+    session.sync.delta(session.state, 0)
+    session.update_world()
+    delta = session.sync.delta(session.state, session.tick)
+    full = state_to_dict(session.state)
+    assert len(json.dumps(delta)) * 10 < len(json.dumps(full))
+
+
+def test_session_sends_snapshot_then_deltas():
+    session = GameSession()
+    session.connections = {"a": object(), "b": object()}
+    session.sync_modes = {"a": SYNC_DELTA}
+    session.needs_snapshot = {"a"}
+    session.update_world()
+    messages = session.state_messages()
+    assert messages["a"]["type"] == "snapshot"
+    assert messages["a"]["tick"] == session.tick
+    assert "type" not in messages["b"]
+
+    session.update_world()
+    messages = session.state_messages()
+    assert messages["a"]["type"] == "delta"
+    assert messages["a"]["base"] == session.tick - 1
+
+    session.request_resync("a")
+    messages = session.state_messages()
+    assert messages["a"]["type"] == "snapshot"
+
+
+def test_delta_protocol_over_websocket():
+    with TestClient(app) as client:
+        game_id = manager.create_game_session()
+        with client.websocket_connect(f"/ws/game/{game_id}?sync=delta") as ws:
+            welcome = ws.receive_json()
+            assert welcome["type"] == "welcome"
+            snapshot = ws.receive_json()
+            assert snapshot["type"] == "snapshot"
+            assert welcome["playerId"] in snapshot["players"]
+            delta = ws.receive_json()
+            assert delta["type"] == "delta"
+            assert delta["base"] == snapshot["tick"]
+            assert "walls" not in delta
+
+            ws.send_json({"type": "resync"})
+            for _ in range(20):
+                if ws.receive_json()["type"] == "snapshot":
+                    break
+            else:
+                raise AssertionError("no snapshot after resync")
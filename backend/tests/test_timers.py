@@ -0,0 +1,95 @@
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.game.manager import LOOT_TICKS, GameSession
+from app.game.models import PlayerState, ZombieState
+from app.game.schema import state_to_dict
+from app.game.timers import WHEEL_LEVELS, WHEEL_SIZE, TimerWheel, remaining
+
+
+def test_wheel_fires_each_timer_on_its_tick():
+    rng = random.Random(3)
+    wheel = TimerWheel(now=5)
+    fired = []
+    dues = [rng.randrange(6, 20000) for _ in range(500)]
+    dues += [WHEEL_SIZE, WHEEL_SIZE**2, WHEEL_SIZE**2 + 1, 6]
+    for due in dues:
+        wheel.schedule(due, lambda due=due: fired.append((wheel.now, due)))
+    cancelled = wheel.schedule(100, fired.append, "cancelled")
+    wheel.cancel(cancelled)
+    wheel.cancel(cancelled)
+    assert len(wheel) == len(dues)
+
+    for now in (50, 4095, 4096, 20000):
+        wheel.advance(now)
+        assert all(tick == due for tick, due in fired)
+        assert sorted(due for _, due in fired) == sorted(d for d in dues if d <= now)
+    assert len(wheel) == 0 and wheel.fired == len(dues)
+
+
+def test_wheel_order_overdue_and_overflow():
+    wheel = TimerWheel()
+    fired = []
+    for name in "abc":
+        wheel.schedule(3, fired.append, name)
+    wheel.advance(2)
+    wheel.schedule(1, fired.append, "late")
+    far = WHEEL_SIZE**WHEEL_LEVELS + 7
+    wheel.schedule(far, fired.append, "far")
+    wheel.advance(3)
+    assert fired == ["a", "b", "c", "late"]
+    wheel.advance(far - 1)
+    assert fired[-1] == "late"
+    wheel.advance(far)
+    assert fired[-1] == "far"
+
+
+def test_cooldowns_are_derived_when_serialized():
+    session = GameSession(seed=1)
+    session.state.players = {"p": PlayerState(x=50, y=50)}
+    session.state.zombies = [ZombieState(x=50, y=50)]
+    session.update_world()
+    zombie = state_to_dict(session.state)["zombies"][0]
+    assert zombie["attack_cooldown"] == 30
+    for _ in range(10):
+        session.update_world()
+    data = state_to_dict(session.state)
+    assert data["zombies"][0]["attack_cooldown"] == 20
+    assert data["players"]["p"]["damage_cooldown"] == 20
+    assert remaining(session.state.zombies[0].attack_cooldown_until, 10**6) == 0
+
+
+def test_loot_timer_fires_and_cancels_as_events():
+    session = GameSession(seed=2)
+    container = session.state.containers[0]
+    session.state.players["p"] = PlayerState(x=container.x, y=container.y)
+    session.state.players["q"] = PlayerState(x=container.x, y=container.y)
+    session.update_player_state(
+        "p", {"action": "start_looting", "containerId": container.id}
+    )
+    session.start_looting("q", container, ticks=LOOT_TICKS + 50)
+    session.update_world()
+    assert state_to_dict(session.state)["loot_progress"] == {
+        "p": LOOT_TICKS - 1,
+        "q": LOOT_TICKS + 49,
+    }
+    for _ in range(LOOT_TICKS - 2):
+        session.update_world()
+    assert not container.opened
+    session.update_world()
+    assert container.opened
+    # The other looter's timer is cancelled rather than polled.
+    assert session.loot_timers == {} and len(session.timers) == 0
+
+    shelf = session.state.walls[0]
+    session.state.players["p"].x, session.state.players["p"].y = shelf.x, shelf.y
+    session.start_looting("p", shelf)
+    session.update_player_state("p", {"action": "move", "moveX": 1, "moveY": 0})
+    assert "p" in session.loot_timers
+    session.state.players["p"].x += 200
+    session.update_player_state("p", {"action": "move", "moveX": 1, "moveY": 0})
+    assert "p" not in session.loot_timers
+    assert session.state.loot_due == {} and len(session.timers) == 0
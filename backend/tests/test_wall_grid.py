@@ -0,0 +1,96 @@
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.game.grid import WallGrid
+from app.game.manager import GameSession
+from app.game.models import PlayerState
+from app.game.world import SEGMENT_SIZE, create_wall, generate_store_walls
+
+
+def _linear_collides(x, y, walls):
+    return any(w.x <= x <= w.x + w.size and w.y <= y <= w.y + w.size for w in walls)
+
+
+def test_grid_matches_linear_scan():
+    random.seed(5)
+    walls = generate_store_walls(2400, 1600)
+    grid = WallGrid.from_walls(2400, 1600, walls)
+    points = [(random.random() * 2400, random.random() * 1600) for _ in range(500)]
+    # Include points exactly on cell borders where walls touch inclusively.
+    points += [(w.x + w.size, w.y) for w in walls[:50]]
+    points += [(w.x, w.y + w.size) for w in walls[:50]]
+    for x, y in points:
+        assert grid.collides(x, y) == _linear_collides(x, y, walls)
+
+
+def test_grid_counts_overlapping_walls():
+    grid = WallGrid(SEGMENT_SIZE * 3, SEGMENT_SIZE * 3)
+    grid.add(create_wall(1, 1))
+    grid.add(create_wall(1, 1))
+    grid.remove(create_wall(1, 1))
+    assert grid.blocked(1, 1)
+    grid.remove(create_wall(1, 1))
+    assert not grid.blocked(1, 1)
+    assert grid.version == 4
+
+
+def test_session_patches_grid_when_walls_change():
+    session = GameSession()
+    grid = session.wall_grid
+    wall = session.state.walls[0]
+    cx = wall.x + wall.size / 2
+    cy = wall.y + wall.size / 2
+    session.state.players = {"p": PlayerState(x=cx, y=cy)}
+    session.start_looting("p", wall, ticks=10)
+    destroyed = session.damage_wall(wall, wall.hp)
+    assert destroyed
+    assert wall not in session.state.walls
+    assert "p" not in session.loot_timers
+    assert session.wall_grid is grid
+    if not any(w.x == wall.x and w.y == wall.y for w in session.state.walls):
+        assert not grid.collides(cx, cy)
+
+    barricade = create_wall(0, 0, "wood")
+    session.add_wall(barricade)
+    assert session.wall_grid is grid
+    assert grid.collides(5, 5)
+
+
+def test_session_grid_follows_replaced_wall_list():
+    session = GameSession()
+    session.state.width = SEGMENT_SIZE * 3
+    session.state.height = SEGMENT_SIZE * 2
+    session.state.walls = [create_wall(1, 0)]
+    assert session.wall_grid.collides(SEGMENT_SIZE + 1, 1)
+    assert not session.wall_grid.collides(1, 1)
+
+
+def test_free_cell_list_tracks_wall_changes():
+    grid = WallGrid(SEGMENT_SIZE * 3, SEGMENT_SIZE * 2)
+    assert grid.free_count() == 6
+    wall = create_wall(1, 1)
+    grid.add(wall)
+    grid.add(create_wall(1, 1))
+    assert grid.free_count() == 5
+    grid.remove(wall)
+    assert grid.free_count() == 5
+    grid.remove(wall)
+    assert grid.free_count() == 6
+
+    for gx in range(3):
+        for gy in range(2):
+            if (gx, gy) != (2, 0):
+                grid.add(create_wall(gx, gy))
+    rng = random.Random(0)
+    copy = grid.copy()
+    for _ in range(20):
+        assert grid.random_free_cell(rng) == (2, 0)
+        assert copy.nearest_free_cell(0, 1, rng) == (2, 0)
+        x, y = grid.point_in_cell(2, 0, rng)
+        assert not grid.collides(x, y)
+    copy.add(create_wall(2, 0))
+    assert copy.random_free_cell(rng) is None
+    assert grid.free_count() == 1
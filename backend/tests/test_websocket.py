@@ -18,6 +18,24 @@ def test_websocket_connection():
             assert "playerId" in welcome
 
 
+def test_undecodable_frames_close_the_connection():
+    with TestClient(app) as client:
+        game_id = manager.create_game_session()
+        session = manager.get_session(game_id)
+        for frame in ("not json", "[1, 2]"):
+            with client.websocket_connect(f"/ws/game/{game_id}") as ws:
+                ws.receive_json()
+                assert len(session.connections) == 1
+                ws.send_text(frame)
+                for _ in range(100):
+                    if not session.connections:
+                        break
+                    time.sleep(0.01)
+            assert session.connections == {}
+            assert session.state.players == {}
+        assert session.idle_since is not None
+
+
 def test_update_player_state_via_websocket():
     with TestClient(app) as client:
         game_id = manager.create_game_session()
@@ -56,13 +74,15 @@ def test_game_state_broadcast():
             from unittest.mock import AsyncMock
             import time
 
-            original_send = ws_obj.send_json
+            import json
+
+            original_send = ws_obj.send_text
             send_spy = AsyncMock(wraps=original_send)
-            ws_obj.send_json = send_spy
+            ws_obj.send_text = send_spy
 
             time.sleep(0.2)
             assert send_spy.called
-            sent_state = send_spy.call_args[0][0]
+            sent_state = json.loads(send_spy.call_args[0][0])
             assert player_id in sent_state["players"]
             assert "walls" in sent_state
             assert "zombies" in sent_state
@@ -88,7 +108,7 @@ def test_loot_container_command():
                 if player_id in session.loot_timers:
                     break
                 time.sleep(0.02)
-            session.loot_timers[player_id]["ticks"] = 1
+            session.start_looting(player_id, session.state.containers[0], ticks=1)
             session.update_world()
             cont = manager.get_session(game_id).state.containers[0]
             assert cont.opened is True
@@ -140,7 +160,7 @@ def test_loot_shelf_command():
                 if player_id in session.loot_timers:
                     break
                 time.sleep(0.02)
-            session.loot_timers[player_id]["ticks"] = 1
+            session.start_looting(player_id, shelf, ticks=1)
             session.update_world()
             shelf_state = manager.get_session(game_id).state.walls[0]
             assert shelf_state.opened is True
@@ -1,9 +1,23 @@
 import os
+import random
 import sys
 
+import pytest
+
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
+from app.game.grid import WallGrid
 from app.game.manager import GameSession
+from app.game.world import (
+    SEGMENT_SIZE,
+    ZOMBIE_WAVE_SIZE,
+    create_spawn_door,
+    create_wall,
+    generate_world,
+    random_open_position,
+    spawn_zombie_wave,
+)
+from tests.helpers import world_layout
 
 
 def test_world_generated_on_session_create():
@@ -18,3 +32,77 @@ def test_world_size_large():
     session = GameSession()
     assert session.state.width == 2400
     assert session.state.height == 1600
+
+
+def test_same_seed_generates_same_world():
+    first = GameSession(seed=1234)
+    second = GameSession(seed=1234)
+    assert first.seed == 1234
+    assert world_layout(first) == world_layout(second)
+    assert world_layout(GameSession(seed=4321)) != world_layout(first)
+
+
+def test_session_rng_is_independent_of_global_random():
+    random.seed(0)
+    first = GameSession(seed=99)
+    random.seed(1)
+    second = GameSession(seed=99)
+    assert world_layout(first) == world_layout(second)
+    assert first.rng.random() == second.rng.random()
+
+
+def _dense_map(width, height, open_cells):
+    walls = [
+        create_wall(gx, gy)
+        for gx in range(width // SEGMENT_SIZE)
+        for gy in range(height // SEGMENT_SIZE)
+        if (gx, gy) not in open_cells
+    ]
+    return walls, WallGrid.from_walls(width, height, walls)
+
+
+def test_open_positions_are_valid_on_dense_maps():
+    rng = random.Random(3)
+    walls, grid = _dense_map(400, 400, {(4, 4), (7, 2)})
+    for _ in range(200):
+        x, y = random_open_position(400, 400, walls, grid, rng)
+        assert not grid.collides(x, y)
+
+    walls, grid = _dense_map(400, 400, set())
+    with pytest.raises(ValueError):
+        random_open_position(400, 400, walls, grid, rng)
+
+
+def test_spawn_door_is_bounded_and_valid():
+    rng = random.Random(4)
+    # Only the top edge cell 3 and the cell below it are open.
+    walls, grid = _dense_map(400, 400, {(3, 0), (3, 1)})
+    door = create_spawn_door(400, 400, walls, grid, rng)
+    assert door.y == 0
+    assert 3 * SEGMENT_SIZE < door.x < 4 * SEGMENT_SIZE
+    assert not grid.collides(door.x, door.y)
+    assert not grid.collides(door.x, SEGMENT_SIZE)
+
+    walls, grid = _dense_map(400, 400, {(5, 5)})
+    with pytest.raises(ValueError):
+        create_spawn_door(400, 400, walls, grid, rng)
+
+
+def test_zombie_wave_always_spawns_requested_count():
+    rng = random.Random(5)
+    walls, grid = _dense_map(400, 400, {(3, 0), (3, 1), (3, 2)})
+    door = create_spawn_door(400, 400, walls, grid, rng)
+    zombies = spawn_zombie_wave(12, door, 400, 400, walls=walls, grid=grid, rng=rng)
+    assert len(zombies) == 12
+    assert not any(grid.collides(z.x, z.y) for z in zombies)
+
+
+def test_generate_world_on_small_and_large_maps():
+    for width, height in ((800, 600), (4800, 3200)):
+        walls, zombies, containers, door, grid = generate_world(
+            width, height, random.Random(width)
+        )
+        assert len(zombies) == ZOMBIE_WAVE_SIZE
+        assert not any(grid.collides(c.x, c.y) for c in containers)
+        assert not any(grid.collides(z.x, z.y) for z in zombies)
+        assert not grid.collides(door.x, door.y)
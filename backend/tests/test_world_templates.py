@@ -0,0 +1,91 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from fastapi.testclient import TestClient
+from app.main import app
+from app.game.manager import GameSession, manager
+from app.game.models import PlayerState
+from app.game.templates import TemplatePool, WorldTemplate
+from tests.helpers import world_layout
+
+
+def test_pool_counts_hits_and_misses():
+    pool = TemplatePool(per_size=2)
+    pool.take()
+    assert pool.misses == 1
+    assert pool.fill() == 2
+    pool.take()
+    assert pool.hits == 1
+    assert pool.to_dict()["hit_rate"] == 0.5
+    assert pool.to_dict()["ready"] == {"2400x1600": 1}
+
+
+def test_seeded_templates_are_cached_and_match_fresh_generation():
+    pool = TemplatePool()
+    template = pool.take(seed=77)
+    assert pool.take(seed=77) is template
+    assert pool.hits == 1
+    cloned = GameSession(template=template)
+    fresh = GameSession(seed=77)
+    assert cloned.seed == 77
+    assert world_layout(cloned) == world_layout(fresh)
+    assert cloned.rng.random() == fresh.rng.random()
+
+
+def test_walls_are_copied_on_first_write():
+    template = WorldTemplate(2400, 1600, 5)
+    first = GameSession(template=template)
+    second = GameSession(template=template)
+    assert first.state.walls[0] is second.state.walls[0]
+
+    wall = first.state.walls[0]
+    first.damage_wall(wall, 1)
+    assert first.state.walls[0] is not wall
+    assert first.state.walls[0].hp == wall.hp - 1
+    assert second.state.walls[0].hp == wall.hp
+    assert template.walls[0].hp == wall.hp
+    assert template.walls[0].damage_flash_until == 0
+
+    # A stale reference to the shared wall resolves to the session's copy
+    first.damage_wall(wall, 1)
+    assert first.state.walls[0].hp == wall.hp - 2
+
+    first.state.zombies[0].x += 5
+    assert second.state.zombies[0].x == template.zombies[0].x
+
+
+def test_wall_destruction_only_affects_one_session():
+    template = WorldTemplate(2400, 1600, 6)
+    first = GameSession(template=template)
+    second = GameSession(template=template)
+    wall = first.state.walls[0]
+    assert first.damage_wall(wall, wall.hp)
+    assert len(first.state.walls) == len(template.walls) - 1
+    assert len(second.state.walls) == len(template.walls)
+    gx, gy = first.wall_grid.cell_of(wall)
+    assert second.wall_grid.blocked(gx, gy)
+
+
+def test_metrics_endpoint_reports_pool_and_latency():
+    with TestClient(app) as client:
+        client.post("/api/games")
+        data = client.get("/api/metrics").json()
+    assert data["creation"]["sessions_created"] >= 1
+    assert data["creation"]["max_ms"] >= data["creation"]["mean_ms"] > 0
+    assert {"hits", "misses", "hit_rate", "ready"} <= set(data["templates"])
+    assert data["sessions"] == len(manager.get_all_sessions())
+
+
+def test_looting_a_shared_shelf_leaves_template_untouched():
+    template = WorldTemplate(2400, 1600, 8)
+    session = GameSession(template=template)
+    shelf = session.state.walls[0]
+    session.state.players["p"] = PlayerState(
+        x=shelf.x + shelf.size + 1, y=shelf.y + shelf.size / 2
+    )
+    session.start_looting("p", shelf, ticks=1)
+    session.update_world()
+    assert session.state.walls[0].opened
+    assert not template.walls[0].opened
@@ -0,0 +1,67 @@
+import math
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.game.flowfield import FlowField
+from app.game.grid import CellCounts, WallGrid
+from app.game.models import SEGMENT_SIZE, PlayerState, ZombieState
+from app.game.world import update_zombies
+
+
+def _reference_step(zombies, players, grid, field, width, height):
+    """Per-zombie set of other zombie cells taken at the start of the tick."""
+
+    field.update(players, grid)
+    start = [(int(o.x // SEGMENT_SIZE), int(o.y // SEGMENT_SIZE)) for o in zombies]
+    for idx, z in enumerate(zombies):
+        blocks = {cell for i, cell in enumerate(start) if i != idx}
+        cell = (int(z.x // SEGMENT_SIZE), int(z.y // SEGMENT_SIZE))
+        step = field.next_step(cell[0], cell[1], blocks)
+        if step is not None:
+            tx = step[0] * SEGMENT_SIZE + SEGMENT_SIZE / 2
+            ty = step[1] * SEGMENT_SIZE + SEGMENT_SIZE / 2
+        else:
+            target = min(players, key=lambda p: (p.x - z.x) ** 2 + (p.y - z.y) ** 2)
+            tx, ty = target.x, target.y
+        dx, dy = tx - z.x, ty - z.y
+        dist = math.sqrt(dx * dx + dy * dy)
+        if dist == 0:
+            continue
+        nx, ny = z.x + dx / dist, z.y + dy / dist
+        if not grid.collides(nx, ny):
+            z.x = max(0, min(width, nx))
+            z.y = max(0, min(height, ny))
+        z.facing_x, z.facing_y = dx / dist, dy / dist
+
+
+def test_count_grid_matches_per_zombie_blocks():
+    random.seed(7)
+    width, height = SEGMENT_SIZE * 12, SEGMENT_SIZE * 8
+    grid = WallGrid.from_walls(width, height, [])
+    players = [PlayerState(x=width - 20, y=height - 20)]
+    coords = [
+        (random.random() * width / 2, random.random() * height) for _ in range(25)
+    ]
+    ours = [ZombieState(x=x, y=y) for x, y in coords]
+    ref = [ZombieState(x=x, y=y) for x, y in coords]
+    field, ref_field = FlowField(width, height), FlowField(width, height)
+    cells = CellCounts(width, height)
+    for _ in range(60):
+        update_zombies(ours, players, [], width, height, field, grid, None, cells)
+        _reference_step(ref, players, grid, ref_field, width, height)
+    assert [(z.x, z.y) for z in ours] == [(z.x, z.y) for z in ref]
+
+
+def test_cell_counts_exclude_own_cell():
+    cells = CellCounts(SEGMENT_SIZE * 3, SEGMENT_SIZE * 3)
+    a, b = ZombieState(x=5, y=5), ZombieState(x=45, y=5)
+    cells.fill([a, b])
+    assert (0, 0) not in cells.others((0, 0))
+    assert (1, 0) in cells.others((0, 0))
+    cells.fill([a, a])
+    assert (0, 0) in cells.others((0, 0))
+    cells.fill([a])
+    assert cells.counts == {0: 1}